@@ -0,0 +1,291 @@
+"""Replay a weighted mix of real user flows against a running server.
+
+Each virtual user logs in as one of the seeded accounts (flask seed) and
+repeatedly picks a flow allowed for its role: order intake, dashboard
+views, status changes, payments and deliveries. Results are reported per
+endpoint. Start the server first, e.g. with gunicorn --config gunicorn.conf.py
+main:app, then run from the repository root:
+
+    python bench/loadtest.py --users 20 --duration 60
+    python bench/loadtest.py --base-url http://127.0.0.1:5000 --json > after.json
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+# username: (password, share of virtual users)
+ACCOUNTS = {
+    'admin': ('admin123', 1),
+    'manager': ('password123', 3),
+    'accountant': ('password123', 2),
+    'production_manager': ('password123', 1),
+    'delivery_person': ('password123', 2),
+    'designer': ('password123', 1),
+}
+
+ORDER_STAGES = ['order', 'design_sent', 'proof_given', 'proof_complete', 'plate_setting',
+                'printing_complete', 'binding_sent', 'order_ready']
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, round(pct / 100 * (len(values) - 1)))
+    return values[index]
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.recording = False
+    
+    def record(self, label, ms, ok):
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies.setdefault(label, []).append(ms)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+class Client:
+    """One keep-alive connection and session cookie per virtual user."""
+    
+    def __init__(self, base_url, stats):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.stats = stats
+        self.cookie = None
+        self.conn = None
+    
+    def request(self, method, path, body=None, label=None):
+        """Send a request and return (status, parsed JSON or None)."""
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        payload = json.dumps(body) if body is not None else None
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+            status, data = 0, b''
+        self.stats.record(label or f'{method} {path}', (time.perf_counter() - started) * 1000, 0 < status < 400)
+        
+        if status:
+            cookie = response.getheader('Set-Cookie')
+            if cookie:
+                jar = SimpleCookie(cookie)
+                if 'session' in jar:
+                    self.cookie = f"session={jar['session'].value}"
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+    
+    def get(self, path, label=None):
+        return self.request('GET', path, label=label)
+
+class Pool:
+    """Ids shared by all virtual users; new orders and deliveries are added as they are created."""
+    
+    def __init__(self, customers, orders):
+        self.lock = threading.Lock()
+        self.customers = customers
+        self.orders = orders
+        self.deliveries = []
+    
+    def pick(self, name):
+        with self.lock:
+            values = getattr(self, name)
+            return random.choice(values) if values else None
+    
+    def add(self, name, value):
+        with self.lock:
+            getattr(self, name).append(value)
+
+def view_dashboard(client, pool):
+    client.get('/api/dashboard/stats')
+    client.get('/api/dashboard/orders-by-status')
+    client.get('/api/dashboard/recent-orders')
+    client.get('/api/dashboard/revenue-trend')
+
+def browse_orders(client, pool):
+    client.get(f'/api/orders?page={random.randint(1, 20)}', label='GET /api/orders')
+    order_id = pool.pick('orders')
+    if order_id:
+        client.get(f'/api/orders/{order_id}', label='GET /api/orders/<id>')
+
+def create_order(client, pool):
+    customer_id = pool.pick('customers')
+    if customer_id is None:
+        return
+    items = [
+        {
+            'product_name': random.choice(['Visiting Card', 'Poster', 'Brochure', 'Calendar', 'Bill Book']),
+            'quantity': random.choice([100, 500, 1000, 5000]),
+            'unit_price': random.choice([2, 5, 10, 20])
+        }
+        for _ in range(random.randint(1, 4))
+    ]
+    status, order = client.request('POST', '/api/orders', {
+        'customer_id': customer_id,
+        'work_name': 'Load test order',
+        'expected_delivery_date': (datetime.now() + timedelta(days=7)).isoformat(),
+        'items': items
+    })
+    if status == 201 and order:
+        pool.add('orders', order['id'])
+
+def change_status(client, pool):
+    order_id = pool.pick('orders')
+    if order_id:
+        client.request('PUT', f'/api/orders/{order_id}/status', {
+            'status': random.choice(ORDER_STAGES), 'notes': 'load test'
+        }, label='PUT /api/orders/<id>/status')
+
+def post_payment(client, pool):
+    order_id = pool.pick('orders')
+    if order_id:
+        client.request('POST', '/api/payments', {
+            'order_id': order_id,
+            'amount': random.choice([100, 500, 1000]),
+            'payment_method': random.choice(['cash', 'bank_transfer', 'mobile_banking'])
+        })
+    client.get('/api/payments', label='GET /api/payments')
+
+def run_delivery(client, pool):
+    order_id = pool.pick('orders')
+    if order_id is None:
+        return
+    delivery_id = pool.pick('deliveries')
+    if delivery_id is None or random.random() < 0.3:
+        status, delivery = client.request('POST', '/api/deliveries', {
+            'order_id': order_id,
+            'scheduled_date': (datetime.now() + timedelta(days=1)).isoformat()
+        })
+        if status == 201 and delivery:
+            delivery_id = delivery['id']
+            pool.add('deliveries', delivery_id)
+    if delivery_id:
+        client.request('PUT', f'/api/deliveries/{delivery_id}', {
+            'status': random.choice(['out_for_delivery', 'delivered'])
+        }, label='PUT /api/deliveries/<id>')
+    client.get('/api/deliveries', label='GET /api/deliveries')
+
+def browse_production(client, pool):
+    client.get('/api/production-tasks', label='GET /api/production-tasks')
+    browse_orders(client, pool)
+
+# username: [(flow, weight)], limited to what each seeded role may do
+FLOWS = {
+    'admin': [(create_order, 3), (change_status, 3), (view_dashboard, 2), (browse_orders, 2)],
+    'manager': [(view_dashboard, 5), (browse_orders, 3), (create_order, 2), (change_status, 2)],
+    'accountant': [(post_payment, 5), (browse_orders, 2)],
+    'production_manager': [(browse_production, 1)],
+    'delivery_person': [(run_delivery, 1)],
+    'designer': [(browse_orders, 1)],
+}
+
+def virtual_user(username, args, stats, pool, deadline):
+    client = Client(args.base_url, stats)
+    status, _ = client.request('POST', '/api/auth/login', {
+        'username': username, 'password': ACCOUNTS[username][0]
+    })
+    if status != 200:
+        print(f'Login failed for {username} ({status}); is the database seeded?', file=sys.stderr)
+        return
+    flows, weights = zip(*FLOWS[username])
+    while time.monotonic() < deadline:
+        random.choices(flows, weights)[0](client, pool)
+        if args.think_ms:
+            time.sleep(random.uniform(0, 2 * args.think_ms) / 1000)
+
+def load_pool(args):
+    client = Client(args.base_url, Stats())
+    status, _ = client.request('POST', '/api/auth/login', {'username': 'admin', 'password': ACCOUNTS['admin'][0]})
+    if status != 200:
+        sys.exit(f'Cannot log in as admin at {args.base_url} ({status})')
+    _, customers = client.get('/api/customers?per_page=100&fields=id')
+    _, orders = client.get('/api/orders?per_page=100&fields=id')
+    return Pool(
+        [c['id'] for c in (customers or {}).get('customers', [])],
+        [o['id'] for o in (orders or {}).get('orders', [])]
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to measure')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds to run before measuring')
+    parser.add_argument('--think-ms', type=float, default=0, help='Mean pause between flows per user')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Exit non-zero above this share of failed requests')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for the flow mix')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    random.seed(args.seed)
+    
+    pool = load_pool(args)
+    stats = Stats()
+    # Interleave roles so even a few users cover all of them
+    most = max(share for _, share in ACCOUNTS.values())
+    names = [name for turn in range(most) for name, (_, share) in ACCOUNTS.items() if turn < share]
+    deadline = time.monotonic() + args.warmup + args.duration
+    threads = [
+        threading.Thread(target=virtual_user, args=(names[i % len(names)], args, stats, pool, deadline), daemon=True)
+        for i in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    stats.recording = True
+    started = time.monotonic()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    stats.recording = False
+    
+    results = {
+        label: {
+            'requests': len(values),
+            'rps': round(len(values) / elapsed, 2),
+            'errors': stats.errors.get(label, 0),
+            'p50_ms': round(statistics.median(values), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'p99_ms': round(percentile(values, 99), 2)
+        }
+        for label, values in sorted(stats.latencies.items())
+    }
+    total = sum(r['requests'] for r in results.values())
+    errors = sum(r['errors'] for r in results.values())
+    summary = {'users': args.users, 'seconds': round(elapsed, 2), 'requests': total,
+               'rps': round(total / elapsed, 2) if elapsed else 0, 'errors': errors}
+    
+    if args.json:
+        print(json.dumps({'summary': summary, 'endpoints': results}, indent=2))
+    else:
+        print(f"{total} requests in {elapsed:.1f}s from {args.users} users: {summary['rps']} req/s, {errors} errors")
+        print(f"  {'endpoint':<36} {'reqs':>7} {'req/s':>8} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for label, r in results.items():
+            print(f"  {label:<36} {r['requests']:>7} {r['rps']:>8.1f} {r['errors']:>5} "
+                  f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+    
+    if total and errors / total > args.max_error_rate:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""Microbenchmarks for the ORM hot paths, compared against a saved baseline.
+
+Runs against a SQLite database generated once with flask seed --scale and
+reused afterwards. Each benchmark is timed in several fresh processes. A
+change counts as a regression when a one-sided Mann-Whitney U test of the
+per-process medians against the baseline's is significant and the median
+slowed by more than --threshold. Run from the repository root:
+
+    python bench/micro.py --save        # record the baseline (bench/baseline.json)
+    python bench/micro.py               # compare; exits 1 on a regression
+    python bench/micro.py --only dashboard --samples 30
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_BASELINE = os.path.join(ROOT, 'bench', 'baseline.json')
+
+BENCHMARKS = {}
+
+def benchmark(name, http=False):
+    """Register ``setup(ctx)``, which returns the operation to time.
+    
+    Model benchmarks run inside an app context. ``http`` ones go through the
+    test client, which must push its own context per request.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, http)
+        return setup
+    return register
+
+@benchmark('Order.to_dict x20')
+def order_to_dict(ctx):
+    from server.models import Order
+    ids = ctx['order_ids'][:20]
+    def run():
+        # Fresh instances each time, so the lazy loads to_dict() triggers are included
+        ctx['db'].session.expunge_all()
+        for order in Order.query.filter(Order.id.in_(ids)):
+            order.to_dict()
+    return run
+
+@benchmark('Order.update_totals x20')
+def order_update_totals(ctx):
+    from server.models import Order
+    orders = Order.query.filter(Order.id.in_(ctx['order_ids'][:20])).all()
+    session = ctx['db'].session
+    def run():
+        with session.no_autoflush:
+            for order in orders:
+                order.update_totals()
+    return run
+
+@benchmark('OrderItem.get_materials_total x500')
+def item_materials_total(ctx):
+    from server.models import OrderItem
+    items = OrderItem.query.limit(500).all()
+    def run():
+        for item in items:
+            item.get_materials_total()
+    return run
+
+@benchmark('Order.generate_order_number')
+def order_number(ctx):
+    from server.models import Order
+    return Order().generate_order_number
+
+@benchmark('Payment.generate_payment_number')
+def payment_number(ctx):
+    from server.models import Payment
+    return Payment().generate_payment_number
+
+@benchmark('Invoice.generate_invoice_number')
+def invoice_number(ctx):
+    from server.models import Invoice
+    return Invoice().generate_invoice_number
+
+def dashboard(path):
+    def setup(ctx):
+        client = ctx['client']
+        def run():
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        return run
+    return setup
+
+for _path in ('/api/dashboard/stats', '/api/dashboard/orders-by-status',
+              '/api/dashboard/recent-orders', '/api/dashboard/revenue-trend'):
+    benchmark(f'dashboard {_path.rsplit("/", 1)[-1]}', http=True)(dashboard(_path))
+
+def prepare(args):
+    """Point the app at the benchmark database, generating it on first use."""
+    path = args.db or os.path.join(tempfile.gettempdir(), f'sapaghor-bench-{args.scale}.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    # Per-request instrumentation would be timed along with the views
+    os.environ['QUERY_STATS_ENABLED'] = 'false'
+    os.environ['METRICS_ENABLED'] = 'false'
+    sys.path.insert(0, ROOT)
+    from server.app import create_app, init_admin_user, init_roles
+    from server.extensions import db
+    from server.models import Order
+    from server.seed_data import parse_scale, seed_scaled
+    
+    app = create_app()
+    with app.app_context():
+        if not os.path.exists(path):
+            print(f'Generating {args.scale} orders into {path} (once)...', file=sys.stderr)
+            db.create_all()
+            init_roles()
+            init_admin_user()
+            seed_scaled(parse_scale(args.scale), random_seed=42)
+        order_ids = [order_id for order_id, in db.session.query(Order.id).order_by(Order.id.desc()).limit(100)]
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    return {'app': app, 'db': db, 'client': client, 'order_ids': order_ids}
+
+def measure(run, samples, min_time):
+    """Seconds per call for each sample; calls per sample are calibrated to last ``min_time``."""
+    run()
+    loops, elapsed = 1, 0
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, math.ceil(min_time / elapsed))
+    results = []
+    for _ in range(samples):
+        gc.collect()
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        results.append((time.perf_counter() - started) / loops)
+    return results
+
+def mann_whitney_greater(current, baseline):
+    """One-sided p-value that ``current`` tends to be larger than ``baseline`` (normal approximation)."""
+    combined = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    ranks = [0.0] * len(combined)
+    ties = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        size = j - i + 1
+        ties += size ** 3 - size
+        i = j + 1
+    n1, n2 = len(current), len(baseline)
+    n = n1 + n2
+    u = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0) - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def compare(results, baseline, alpha, threshold):
+    """Yield (name, change, p-value, verdict) for benchmarks present in both runs."""
+    for name, samples in results.items():
+        before = baseline.get(name)
+        if not before:
+            yield name, None, None, 'new'
+            continue
+        change = statistics.median(samples) / statistics.median(before) - 1
+        p_slower = mann_whitney_greater(samples, before)
+        p_faster = mann_whitney_greater(before, samples)
+        if p_slower < alpha and change > threshold:
+            verdict = 'REGRESSION'
+        elif p_faster < alpha and change < -threshold:
+            verdict = 'faster'
+        else:
+            verdict = 'same'
+        yield name, change, min(p_slower, p_faster), verdict
+
+def run_worker(args):
+    """Time the selected benchmarks in this process; prints {name: [seconds per call]} as JSON."""
+    ctx = prepare(args)
+    results = {}
+    for name, (setup, http) in BENCHMARKS.items():
+        if args.only and args.only not in name:
+            continue
+        if http:
+            results[name] = measure(setup(ctx), args.samples, args.min_time)
+            continue
+        with ctx['app'].app_context():
+            results[name] = measure(setup(ctx), args.samples, args.min_time)
+            ctx['db'].session.rollback()
+    print(json.dumps(results))
+
+def run_processes(args):
+    """Per benchmark, the median time per call measured in each of --processes fresh interpreters.
+    
+    Timings move between processes far more than within one (memory layout,
+    hash seeds, CPU placement), so the process medians are what gets compared.
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--scale', args.scale,
+               '--samples', str(args.samples), '--min-time', str(args.min_time)]
+    if args.db:
+        command += ['--db', args.db]
+    if args.only:
+        command += ['--only', args.only]
+    medians = {}
+    for _ in range(args.processes):
+        out = subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE, text=True, check=True).stdout
+        for name, samples in json.loads(out.strip().splitlines()[-1]).items():
+            medians.setdefault(name, []).append(statistics.median(samples))
+    return medians
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', default='100k', help='Orders in the generated database (see flask seed --scale)')
+    parser.add_argument('--db', help='SQLite file to use instead of the generated one')
+    parser.add_argument('--processes', type=int, default=5, help='Fresh interpreters to measure in')
+    parser.add_argument('--samples', type=int, default=5, help='Samples per benchmark in each process')
+    parser.add_argument('--min-time', type=float, default=0.05, help='Seconds each sample runs for at least')
+    parser.add_argument('--only', help='Run benchmarks whose name contains this text')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--alpha', type=float, default=0.01, help='Significance level')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Smallest median slowdown that counts')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+    
+    results = run_processes(args)
+    meta = {'scale': args.scale, 'python': platform.python_version(), 'machine': platform.node()}
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        if saved['meta']['scale'] != args.scale:
+            print(f"Baseline was recorded at --scale {saved['meta']['scale']}; not comparing", file=sys.stderr)
+        else:
+            baseline = saved['benchmarks']
+    rows = list(compare(results, baseline, args.alpha, args.threshold)) if baseline else [
+        (name, None, None, '') for name in results
+    ]
+    
+    if args.json:
+        print(json.dumps({
+            'meta': meta,
+            'results': {
+                name: {
+                    'median_us': round(statistics.median(results[name]) * 1e6, 2),
+                    'change': None if change is None else round(change, 4),
+                    'p_value': None if p is None else round(p, 5),
+                    'verdict': verdict
+                }
+                for name, change, p, verdict in rows
+            }
+        }, indent=2))
+    else:
+        print(f"  {'benchmark':<34} {'median':>12} {'range':>12} {'change':>8} {'p':>8}")
+        for name, change, p, verdict in rows:
+            medians = results[name]
+            print(f"  {name:<34} {statistics.median(medians) * 1e6:>9.1f} us {(max(medians) - min(medians)) * 1e6:>9.1f} us "
+                  f"{'' if change is None else f'{change:+.1%}':>8} {'' if p is None else f'{p:.4f}':>8}  {verdict}")
+    
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({'meta': {**meta, 'created': datetime.now().isoformat()}, 'benchmarks': results}, f, indent=1)
+        print(f'Saved baseline to {args.baseline}', file=sys.stderr)
+    if any(verdict == 'REGRESSION' for *_, verdict in rows):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
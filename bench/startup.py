@@ -0,0 +1,76 @@
+"""Measure how long a worker takes to boot the app.
+
+Each run starts a fresh interpreter, imports main.py's factory and calls
+create_app(), which is what a gunicorn worker (re)start pays. Run from the
+repository root:
+
+    python bench/startup.py --runs 20
+    DATABASE_URL=postgresql://... python bench/startup.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHILD = '''
+import time
+start = time.perf_counter()
+from server.app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+print(f"{imported - start} {created - imported}")
+'''
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, round(pct / 100 * (len(values) - 1)))
+    return values[index]
+
+def run_once(env):
+    out = subprocess.run(
+        [sys.executable, '-c', CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    
+    env = dict(os.environ)
+    if not env.get('DATABASE_URL'):
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+    
+    run_once(env)  # warm the OS page cache and .pyc files
+    imports, creates = [], []
+    for _ in range(args.runs):
+        imported, created = run_once(env)
+        imports.append(imported * 1000)
+        creates.append(created * 1000)
+    totals = [i + c for i, c in zip(imports, creates)]
+    
+    results = {
+        name: {
+            'median_ms': round(statistics.median(values), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'max_ms': round(max(values), 2)
+        }
+        for name, values in (('import', imports), ('create_app', creates), ('total', totals))
+    }
+    if args.json:
+        print(json.dumps({'runs': args.runs, 'results': results}, indent=2))
+        return
+    print(f'{args.runs} runs')
+    for name, stats in results.items():
+        print(f"  {name:<11} median {stats['median_ms']:>8.2f} ms   p95 {stats['p95_ms']:>8.2f} ms   max {stats['max_ms']:>8.2f} ms")
+
+if __name__ == '__main__':
+    main()
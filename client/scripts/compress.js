@@ -0,0 +1,46 @@
+// Writes .gz and .br siblings for text assets in dist/ so the server can
+// send them without compressing on each request.
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs'
+import { join, extname } from 'node:path'
+import { fileURLToPath } from 'node:url'
+import { gzipSync, brotliCompressSync, constants } from 'node:zlib'
+
+const DIST = fileURLToPath(new URL('../dist', import.meta.url))
+const COMPRESSIBLE = new Set(['.js', '.mjs', '.css', '.html', '.svg', '.json', '.txt', '.map', '.ico', '.wasm', '.xml'])
+const MIN_SIZE = 1024
+
+function* walk(dir) {
+  for (const name of readdirSync(dir)) {
+    const path = join(dir, name)
+    if (statSync(path).isDirectory()) {
+      yield* walk(path)
+    } else {
+      yield path
+    }
+  }
+}
+
+let written = 0
+for (const path of walk(DIST)) {
+  if (!COMPRESSIBLE.has(extname(path))) continue
+  const source = readFileSync(path)
+  if (source.length < MIN_SIZE) continue
+
+  const gzip = gzipSync(source, { level: 9 })
+  const brotli = brotliCompressSync(source, {
+    params: {
+      [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+      [constants.BROTLI_PARAM_SIZE_HINT]: source.length
+    }
+  })
+  if (gzip.length < source.length) {
+    writeFileSync(`${path}.gz`, gzip)
+    written++
+  }
+  if (brotli.length < source.length) {
+    writeFileSync(`${path}.br`, brotli)
+    written++
+  }
+}
+
+console.log(`Precompressed ${written} files in ${DIST}`)
@@ -13,10 +13,48 @@ export default function Notifications() {
 
   useEffect(() => {
     if (!user) return
-    
-    fetchNotifications()
-    const interval = setInterval(fetchNotifications, 30000)
-    return () => clearInterval(interval)
+
+    let cancelled = false
+    let source = null
+    let timer = null
+
+    // A long-poll that returns has already waited on the server, so the next one goes out
+    // at once; only failures back off, from retryInterval seconds doubling up to a minute
+    const poll = async (version, retryInterval, failures = 0) => {
+      let next = version
+      try {
+        const data = await api.get(`/notifications/poll?version=${encodeURIComponent(version)}`)
+        // After an outage the server may have forgotten our version, so reload instead
+        if ((data.changed && version) || failures) fetchNotifications()
+        next = data.version
+        failures = 0
+      } catch (error) {
+        console.error('Failed to poll notifications:', error)
+        next = ''
+        failures += 1
+      }
+      if (cancelled) return
+      const delay = failures ? Math.min(retryInterval * 2 ** (failures - 1), 60) : 0
+      timer = setTimeout(() => poll(next, retryInterval, failures), delay * 1000)
+    }
+
+    // The server says whether it can hold an SSE stream open (gevent workers) or wants short polls
+    fetchNotifications().then((data) => {
+      if (cancelled) return
+      const push = data?.push || {}
+      if (push.mode === 'stream' && window.EventSource) {
+        source = new EventSource('/api/notifications/stream', { withCredentials: true })
+        source.addEventListener('notifications', fetchNotifications)
+      } else {
+        poll('', push.poll_interval ?? 3)
+      }
+    })
+
+    return () => {
+      cancelled = true
+      if (source) source.close()
+      clearTimeout(timer)
+    }
   }, [user])
 
   const fetchNotifications = async () => {
@@ -24,8 +62,9 @@ export default function Notifications() {
       const data = await api.get('/notifications')
       if (data.notifications) {
         setNotifications(data.notifications)
-        setUnreadCount(data.notifications.filter(n => !n.is_read).length)
+        setUnreadCount(data.unread_count)
       }
+      return data
     } catch (error) {
       console.error('Failed to fetch notifications:', error)
     }
@@ -44,7 +83,9 @@ export default function Notifications() {
   const deleteNotification = async (id) => {
     try {
       await api.delete(`/notifications/${id}`)
+      const removed = notifications.find(n => n.id === id)
       setNotifications(notifications.filter(n => n.id !== id))
+      if (removed && !removed.is_read) setUnreadCount(Math.max(0, unreadCount - 1))
     } catch (error) {
       console.error('Failed to delete notification:', error)
     }
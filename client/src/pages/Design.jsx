@@ -156,15 +156,13 @@ export default function Design() {
                   )}
                 </div>
               </div>
-              {task.proofs && task.proofs.length > 0 && (
+              {task.proof_count > 0 && task.latest_proof && (
                 <div className="mt-4 pt-4 border-t">
-                  <p className="text-sm font-medium mb-2">Proofs ({task.proofs.length})</p>
+                  <p className="text-sm font-medium mb-2">Proofs ({task.proof_count})</p>
                   <div className="flex gap-2">
-                    {task.proofs.map((proof) => (
-                      <span key={proof.id} className="text-xs bg-gray-100 px-2 py-1 rounded">
-                        v{proof.version} - {proof.status}
-                      </span>
-                    ))}
+                    <span className="text-xs bg-gray-100 px-2 py-1 rounded">
+                      Latest: v{task.latest_proof.version} - {task.latest_proof.status}
+                    </span>
                   </div>
                 </div>
               )}
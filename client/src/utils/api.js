@@ -69,6 +69,7 @@ export const designAPI = {
   getTask: (id) => api.get(`/design-tasks/${id}`),
   createTask: (data) => api.post('/design-tasks', data),
   updateTask: (id, data) => api.put(`/design-tasks/${id}`, data),
+  listProofs: (id, params = {}) => api.get(`/design-tasks/${id}/proofs?${new URLSearchParams(params)}`),
   createProof: (id, data) => api.post(`/design-tasks/${id}/proofs`, data),
   reviewProof: (id, data) => api.put(`/design-proofs/${id}/review`, data),
   getDesigners: () => api.get('/designers')
@@ -117,5 +118,6 @@ export const usersAPI = {
   get: (id) => api.get(`/users/${id}`),
   create: (data) => api.post('/users', data),
   update: (id, data) => api.put(`/users/${id}`, data),
-  getRoles: () => api.get('/roles')
+  getRoles: () => api.get('/roles'),
+  updateRole: (id, data) => api.put(`/roles/${id}`, data)
 }
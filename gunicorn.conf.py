@@ -0,0 +1,100 @@
+"""Production gunicorn profile: gunicorn --config gunicorn.conf.py main:app
+
+Sizing is derived from the CPU count and can be overridden per box:
+
+  GUNICORN_WORKER_CLASS  gthread (default) or gevent
+  WEB_CONCURRENCY        worker processes (default: 2 x cores + 1 for gthread, cores for gevent)
+  GUNICORN_THREADS       threads per gthread worker (default 4)
+  GUNICORN_CONNECTIONS   concurrent requests per gevent worker (default 200)
+  DB_MAX_CONNECTIONS     connections the database allows this box (default 100)
+  METRICS_DIR            where workers share /metrics totals (default: a directory in /dev/shm)
+
+Each worker gets its own SQLAlchemy pool. pool_size matches the requests a
+worker can run at once, and max_overflow covers the rest of its share of
+DB_MAX_CONNECTIONS, so the box can never open more than that. The values
+reach Config via the DB_POOL_* environment variables.
+"""
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+
+cores = multiprocessing.cpu_count()
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+    raise RuntimeError('GUNICORN_WORKER_CLASS=gevent needs the gevent package installed')
+
+if worker_class == 'gevent':
+    workers = int(os.environ.get('WEB_CONCURRENCY', cores))
+    worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 200))
+    # Most greenlets wait on I/O or notification streams, not the database
+    concurrency = min(worker_connections, 20)
+    # Open SSE streams are cheap greenlets here; with threads they would hold the pool
+    os.environ.setdefault('NOTIFICATION_PUSH', 'stream')
+    os.environ.setdefault('NOTIFICATION_POLL_TIMEOUT', '25')
+else:
+    workers = int(os.environ.get('WEB_CONCURRENCY', cores * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    concurrency = threads
+
+db_max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+per_worker = max(1, db_max_connections // workers)
+pool_size = max(1, min(concurrency, per_worker))
+os.environ.setdefault('DB_POOL_SIZE', str(pool_size))
+os.environ.setdefault('DB_MAX_OVERFLOW', str(max(0, per_worker - pool_size)))
+os.environ.setdefault('DB_POOL_TIMEOUT', '10')
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+backlog = 2048
+keepalive = 5
+
+# Load the app once in the master so workers fork with the code already imported
+preload_app = True
+
+# Recycle workers gradually to cap memory growth; jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Each worker writes its metrics here; /metrics on any worker reports the sum
+metrics_dir = os.environ.setdefault(
+    'METRICS_DIR',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), f'sapaghor-metrics-{os.getuid()}')
+)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+def on_starting(server):
+    # Totals from a previous run would be added to this one's
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith('.json'):
+            os.remove(os.path.join(metrics_dir, name))
+    server.log.info(
+        'Profile: %s, %d workers x %d concurrent, DB pool %s + %s overflow per worker (%d cores)',
+        worker_class, workers, concurrency,
+        os.environ['DB_POOL_SIZE'], os.environ['DB_MAX_OVERFLOW'], cores
+    )
+
+def post_fork(server, worker):
+    if worker_class == 'gevent' and importlib.util.find_spec('psycogreen'):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+    # Connections opened in the master must not be shared with the children, on any bind
+    from server.extensions import db
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters so totals survive max_requests recycling
+    from server.services.metrics import mark_process_dead
+    mark_process_dead(metrics_dir, worker.pid)
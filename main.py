@@ -1,6 +1,8 @@
+import os
 from server.app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Development server only; production runs gunicorn with gunicorn.conf.py
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5001)), debug=os.environ.get('FLASK_DEBUG') == '1')
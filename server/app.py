@@ -1,15 +1,33 @@
-import os
 import click
-from flask import Flask, send_from_directory
+from flask import Flask, abort
 from flask_cors import CORS
+from sqlalchemy import inspect
+from werkzeug.middleware.proxy_fix import ProxyFix
 from server.config import Config
+from server.serializers import init_json
+from server.services.assets import get_manifest, send_asset
 from server.extensions import db, login_manager
-from server.models import User, Role
-from server.seed_data import seed_database, seed_if_empty
+from server.models import User, Role, SchemaVersion, SCHEMA_VERSION
+from server.services.metrics import init_metrics
+from server.services.migrations import bootstrap_lock, migrate
+from server.services.principals import load_principal
+from server.services.pubsub import init_pubsub
+from server.services.querystats import init_query_stats
+from server.services.replicas import init_replicas, sync_sqlite_replica
+from server.services.tokens import load_token_principal
 
 def create_app():
-    app = Flask(__name__, static_folder='../client/dist', static_url_path='')
+    app = Flask(__name__, static_folder=None)
     app.config.from_object(Config)
+    if app.config['PROXY_FIX_HOPS']:
+        # remote_addr is then the client's address, not the proxy's, for login throttling and logs
+        hops = app.config['PROXY_FIX_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+    init_json(app)
+    init_query_stats(app)
+    init_metrics(app)
+    init_replicas(app)
+    init_pubsub(app)
     
     CORS(app, supports_credentials=True)
     
@@ -19,7 +37,11 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_principal(int(user_id))
+    
+    @login_manager.request_loader
+    def load_user_from_request(request):
+        return load_token_principal(request)
     
     from server.routes import api
     app.register_blueprint(api, url_prefix='/api')
@@ -27,33 +49,97 @@ def create_app():
     @app.route('/')
     @app.route('/<path:path>')
     def serve(path=''):
-        if path and os.path.exists(os.path.join(app.static_folder, path)):
-            return send_from_directory(app.static_folder, path)
-        return send_from_directory(app.static_folder, 'index.html')
+        manifest = get_manifest()
+        asset = manifest.get(path) or manifest.get('index.html')
+        if asset is None:
+            abort(404)
+        return send_asset(asset)
     
     @app.cli.command('seed')
     @click.option('--force', is_flag=True, help='Force seed even if data exists')
-    def seed_command(force):
+    @click.option('--scale', default=None, help='Generate this many orders with bulk inserts, e.g. 50k or 1m')
+    @click.option('--batch-size', type=int, default=5000, help='Orders generated per INSERT batch with --scale')
+    @click.option('--random-seed', type=int, default=None, help='Make --scale output reproducible')
+    def seed_command(force, scale, batch_size, random_seed):
         """Seed the database with sample data."""
-        if force:
+        from server.seed_data import parse_scale, seed_database, seed_if_empty, seed_scaled
+        if scale:
+            try:
+                orders = parse_scale(scale)
+            except ValueError:
+                raise click.BadParameter(f'{scale!r} is not a number like 5000, 50k or 1m', param_hint='--scale')
+            if not seed_scaled(orders, batch_size, random_seed):
+                raise SystemExit(1)
+        elif force:
             click.echo('Force seeding database...')
             seed_database()
         else:
             seed_if_empty()
         click.echo('Seed complete!')
     
-    with app.app_context():
-        db.create_all()
-        init_roles()
-        init_admin_user()
-        seed_if_empty()
+    @app.cli.command('bootstrap')
+    @click.option('--seed', is_flag=True, help='Also load sample data into an empty database')
+    @click.option('--force', is_flag=True, help='Re-run even if the schema version is current')
+    def bootstrap_command(seed, force):
+        """Create tables, apply pending migrations, then ensure default roles and the admin user."""
+        # Autoscaled instances all bootstrap on start; the rest wait, then find the work done
+        with bootstrap_lock():
+            has_marker = inspect(db.engine).has_table(SchemaVersion.__tablename__)
+            current = SchemaVersion.current() if has_marker else 0
+            if current >= SCHEMA_VERSION and not force:
+                click.echo(f'Schema is at version {current}, nothing to do')
+            else:
+                db.create_all()
+                if current == 0:
+                    db.session.add(SchemaVersion(version=1))
+                    db.session.commit()
+                for version in migrate(max(current, 1)):
+                    click.echo(f'Applied schema migration {version}')
+                init_roles()
+                init_admin_user()
+                click.echo(f'Bootstrapped schema version {SCHEMA_VERSION}')
+            if seed:
+                from server.seed_data import seed_if_empty
+                seed_if_empty()
+    
+    @app.cli.command('purge-notifications')
+    @click.option('--days', type=int, default=None, help='Retention in days (default: NOTIFICATION_RETENTION_DAYS)')
+    @click.option('--batch-size', type=int, default=None, help='Rows deleted per transaction')
+    def purge_notifications_command(days, batch_size):
+        """Delete read notifications older than the retention window."""
+        from server.services import notify
+        removed = notify.purge_read(
+            days if days is not None else app.config['NOTIFICATION_RETENTION_DAYS'],
+            batch_size or app.config['NOTIFICATION_PURGE_BATCH_SIZE']
+        )
+        click.echo(f'Purged {removed} read notifications')
+        from server.services.pubsub import purge_signals
+        purge_signals()
+    
+    @app.cli.command('replica-sync')
+    def replica_sync_command():
+        """Copy the primary SQLite database to REPLICA_DATABASE_URL for local testing."""
+        if 'replica' not in db.engines:
+            raise click.UsageError('REPLICA_DATABASE_URL is not set')
+        try:
+            sync_sqlite_replica(db.engines)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        click.echo('Replica is up to date')
+    
+    @app.cli.command('rebuild-workloads')
+    def rebuild_workloads_command():
+        """Recompute designer workload rows and deadline pressure."""
+        from server.services import workload
+        count = workload.rebuild()
+        click.echo(f'Rebuilt workload for {count} designers')
     
     return app
 
 def init_roles():
     roles = [
         {'name': 'Super Admin', 'description': 'Full access to all modules', 'permissions': {'all': True}},
-        {'name': 'Management', 'description': 'Oversight and reports access', 'permissions': {'orders': True, 'reports': True, 'customers': True}},
+        {'name': 'Management', 'description': 'Oversight and reports access', 'permissions': {'orders': True, 'reports': True, 'customers': True, 'design': 'view', 'production': 'view', 'delivery': 'view', 'finance': 'view', 'notifications': True}},
         {'name': 'Shareholder', 'description': 'Financial reports and analytics', 'permissions': {'reports': True, 'finance': True}},
         {'name': 'Designer', 'description': 'Design module access', 'permissions': {'design': True, 'orders': 'view'}},
         {'name': 'Production', 'description': 'Production module access', 'permissions': {'production': True, 'orders': 'view'}},
@@ -3,11 +3,101 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'sapaghor-erp-secret-key-2024')
+    
+    # Reverse proxies in front of the app (1 for the Nginx config in DEPLOYMENT.md). Their
+    # X-Forwarded-For/-Proto/-Host headers are trusted for that many hops; 0 ignores them.
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS', 0))
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_recycle": 300,
         "pool_pre_ping": True,
     }
+    # Per-process pool sizing; gunicorn.conf.py derives these from the worker profile
+    if os.environ.get('DB_POOL_SIZE'):
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=int(os.environ['DB_POOL_SIZE']),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 0)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        )
+    
+    # Read-only requests are served by this replica when set; a user's own writes pin them
+    # to the primary for REPLICA_STICKY_SECONDS so they always see what they just saved
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    
+    # Seconds an authenticated user + role snapshot is reused across requests
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+    # Seconds between checks for users and roles edited by other workers
+    PRINCIPAL_INVALIDATION_INTERVAL = int(os.environ.get('PRINCIPAL_INVALIDATION_INTERVAL', 1))
+    
+    # API tokens for machine clients: lifetime cap, and how often other workers' revocations are reloaded
+    API_TOKEN_MAX_AGE_DAYS = int(os.environ.get('API_TOKEN_MAX_AGE_DAYS', 90))
+    API_TOKEN_REVOCATION_TTL = int(os.environ.get('API_TOKEN_REVOCATION_TTL', 30))
+    
+    # Login: hashes older than PASSWORD_HASH_METHOD are upgraded on the next successful login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', 2))
+    LOGIN_HASH_QUEUE = int(os.environ.get('LOGIN_HASH_QUEUE', 32))
+    LOGIN_HASH_TIMEOUT = 10
+    LOGIN_THROTTLE_WINDOW = int(os.environ.get('LOGIN_THROTTLE_WINDOW', 300))
+    LOGIN_MAX_FAILURES_PER_ACCOUNT = int(os.environ.get('LOGIN_MAX_FAILURES_PER_ACCOUNT', 5))
+    LOGIN_MAX_FAILURES_PER_IP = int(os.environ.get('LOGIN_MAX_FAILURES_PER_IP', 30))
+    # last_login is written in batches rather than once per login
+    LAST_LOGIN_FLUSH_INTERVAL = int(os.environ.get('LAST_LOGIN_FLUSH_INTERVAL', 10))
+    LAST_LOGIN_BATCH_SIZE = 100
+    
+    # Per-request SQL instrumentation: Server-Timing header, slow-request log and repeated-query detection
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+    QUERY_STATS_SERVER_TIMING = os.environ.get('QUERY_STATS_SERVER_TIMING', 'true').lower() == 'true'
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    QUERY_DUPLICATE_THRESHOLD = int(os.environ.get('QUERY_DUPLICATE_THRESHOLD', 5))
+    # Raise instead of logging when a view exceeds its @query_budget (always on under TESTING)
+    QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'false').lower() == 'true'
+    
+    # Prometheus metrics at /metrics; gunicorn workers share totals through files in METRICS_DIR
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    # Scrapers must send `Authorization: Bearer <token>` when this is set. Without it only
+    # direct loopback requests are served, unless METRICS_PUBLIC opens /metrics to everyone.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() == 'true'
+    
+    # Rows fetched per round trip by the streaming CSV/XLSX exports
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    
+    # Built React client (`npm run build`), served with precompressed variants
+    CLIENT_DIST_FOLDER = os.environ.get('CLIENT_DIST_FOLDER', os.path.join(basedir, 'client', 'dist'))
+    
+    # File storage for design proofs and reference files
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', os.path.join(basedir, 'uploads'))
+    UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 500 * 1024 * 1024))
+    UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024))
+    THUMBNAIL_SIZE = (480, 480)
+    DELIVERY_ARTIFACT_MAX_SIZE = int(os.environ.get('DELIVERY_ARTIFACT_MAX_SIZE', 20 * 1024 * 1024))
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+    
+    # Starting point for delivery route planning (default: Motijheel, Dhaka)
+    DEPOT_LATITUDE = float(os.environ.get('DEPOT_LATITUDE', 23.7330))
+    DEPOT_LONGITUDE = float(os.environ.get('DEPOT_LONGITUDE', 90.4172))
+    
+    # Read notifications older than this are purged by `flask purge-notifications`
+    NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))
+    NOTIFICATION_PURGE_BATCH_SIZE = int(os.environ.get('NOTIFICATION_PURGE_BATCH_SIZE', 1000))
+    # Push channel: 'stream' (SSE) holds a worker per open tab, so gunicorn.conf.py only
+    # enables it for gevent workers; 'poll' waits NOTIFICATION_POLL_TIMEOUT seconds at most, the
+    # client polls again straight away and, after a failed poll, retries NOTIFICATION_POLL_INTERVAL
+    # seconds later (doubling while failures continue)
+    NOTIFICATION_PUSH = os.environ.get('NOTIFICATION_PUSH', 'poll')
+    NOTIFICATION_POLL_TIMEOUT = int(os.environ.get('NOTIFICATION_POLL_TIMEOUT', 2))
+    NOTIFICATION_POLL_INTERVAL = int(os.environ.get('NOTIFICATION_POLL_INTERVAL', 3))
+    # SSE streams are closed after this many seconds (the browser reconnects)
+    NOTIFICATION_STREAM_MAX_AGE = int(os.environ.get('NOTIFICATION_STREAM_MAX_AGE', 300))
+    NOTIFICATION_STREAM_KEEPALIVE = 15
+    # How often each worker reads notification_signals to wake waiters changed by other workers
+    NOTIFICATION_SIGNAL_POLL_MS = int(os.environ.get('NOTIFICATION_SIGNAL_POLL_MS', 250))
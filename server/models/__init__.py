@@ -1,26 +1,32 @@
-from server.models.user import User, Role
+from server.models.user import User, Role, PrincipalInvalidation
 from server.models.customer import Customer
 from server.models.order import Order, OrderItem, OrderStatusHistory, OrderMaterial, ORDER_STATUS, STATUS_LABELS, MATERIAL_LABELS
-from server.models.design import DesignTask, DesignProof
+from server.models.design import DesignTask, DesignProof, DesignerWorkload
 from server.models.production import ProductionTask, Equipment
-from server.models.delivery import Delivery
+from server.models.delivery import Delivery, DeliveryArtifact
 from server.models.finance import Invoice, Payment, Expense
 from server.models.inventory import InventoryItem, InventoryTransaction
 from server.models.shareholder import Shareholder, ShareholderProfit
-from server.models.notification import Notification
+from server.models.notification import Notification, NotificationCounter, NotificationSignal
 from server.models.task import EmployeeTask
+from server.models.upload import StoredFile, FileUpload
+from server.models.token import ApiToken
+from server.models.meta import SchemaVersion, SCHEMA_VERSION
 
 __all__ = [
-    'User', 'Role',
+    'User', 'Role', 'PrincipalInvalidation',
     'Customer',
     'Order', 'OrderItem', 'OrderStatusHistory', 'OrderMaterial',
     'ORDER_STATUS', 'STATUS_LABELS', 'MATERIAL_LABELS',
-    'DesignTask', 'DesignProof',
+    'DesignTask', 'DesignProof', 'DesignerWorkload',
     'ProductionTask', 'Equipment',
-    'Delivery',
+    'Delivery', 'DeliveryArtifact',
     'Invoice', 'Payment', 'Expense',
     'InventoryItem', 'InventoryTransaction',
     'Shareholder', 'ShareholderProfit',
-    'Notification',
-    'EmployeeTask'
+    'Notification', 'NotificationCounter', 'NotificationSignal',
+    'EmployeeTask',
+    'StoredFile', 'FileUpload',
+    'ApiToken',
+    'SchemaVersion', 'SCHEMA_VERSION'
 ]
@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, Money, DateTime, Method
 
 class Customer(db.Model):
     __tablename__ = 'customers'
@@ -13,6 +14,8 @@ class Customer(db.Model):
     address = db.Column(db.Text)
     city = db.Column(db.String(100))
     district = db.Column(db.String(100))
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
     category = db.Column(db.String(50))
     credit_limit = db.Column(db.Numeric(12, 2), default=0)
     outstanding_balance = db.Column(db.Numeric(12, 2), default=0)
@@ -23,22 +26,26 @@ class Customer(db.Model):
     
     orders = db.relationship('Order', backref='customer', lazy='dynamic')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'company_name': self.company_name,
-            'contact_person': self.contact_person,
-            'email': self.email,
-            'phone': self.phone,
-            'alternate_phone': self.alternate_phone,
-            'address': self.address,
-            'city': self.city,
-            'district': self.district,
-            'category': self.category,
-            'credit_limit': float(self.credit_limit) if self.credit_limit else 0,
-            'outstanding_balance': float(self.outstanding_balance) if self.outstanding_balance else 0,
-            'notes': self.notes,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'total_orders': self.orders.count() if self.orders else 0
-        }
+    def to_dict(self, fields=None):
+        return customer_schema.dump(self, fields)
+
+customer_schema = Schema(
+    id=Field(),
+    company_name=Field(),
+    contact_person=Field(),
+    email=Field(),
+    phone=Field(),
+    alternate_phone=Field(),
+    address=Field(),
+    city=Field(),
+    district=Field(),
+    latitude=Field(),
+    longitude=Field(),
+    category=Field(),
+    credit_limit=Money(),
+    outstanding_balance=Money(),
+    notes=Field(),
+    is_active=Field(),
+    created_at=DateTime(),
+    total_orders=Method(lambda customer: customer.orders.count())
+)
@@ -1,7 +1,9 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, DateTime, Nested, Method
 
 DELIVERY_STATUS = ['scheduled', 'out_for_delivery', 'delivered', 'failed', 'rescheduled']
+ARTIFACT_KINDS = ['signature', 'photo']
 
 class Delivery(db.Model):
     __tablename__ = 'deliveries'
@@ -18,10 +20,16 @@ class Delivery(db.Model):
     actual_delivery_date = db.Column(db.DateTime)
     
     status = db.Column(db.String(30), default='scheduled')
+    route_sequence = db.Column(db.Integer)
     
     recipient_name = db.Column(db.String(150))
-    recipient_signature = db.Column(db.Text)
-    delivery_photo = db.Column(db.String(500))
+    # use_alter: delivery_artifacts also points back here, so these are added after both tables exist
+    signature_artifact_id = db.Column(db.Integer, db.ForeignKey(
+        'delivery_artifacts.id', use_alter=True, name='fk_deliveries_signature_artifact_id'
+    ))
+    photo_artifact_id = db.Column(db.Integer, db.ForeignKey(
+        'delivery_artifacts.id', use_alter=True, name='fk_deliveries_photo_artifact_id'
+    ))
     
     notes = db.Column(db.Text)
     customer_feedback = db.Column(db.Text)
@@ -30,18 +38,53 @@ class Delivery(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'order_id': self.order_id,
-            'delivery_person': self.delivery_person.to_dict() if self.delivery_person else None,
-            'delivery_address': self.delivery_address,
-            'contact_phone': self.contact_phone,
-            'scheduled_date': self.scheduled_date.isoformat() if self.scheduled_date else None,
-            'actual_delivery_date': self.actual_delivery_date.isoformat() if self.actual_delivery_date else None,
-            'status': self.status,
-            'recipient_name': self.recipient_name,
-            'customer_feedback': self.customer_feedback,
-            'rating': self.rating,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=None):
+        return delivery_schema.dump(self, fields)
+
+class DeliveryArtifact(db.Model):
+    __tablename__ = 'delivery_artifacts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    delivery_id = db.Column(db.Integer, db.ForeignKey('deliveries.id'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)
+    
+    storage_key = db.Column(db.String(64), nullable=False)
+    compression = db.Column(db.String(10), default='gzip')
+    content_type = db.Column(db.String(100))
+    size = db.Column(db.Integer)
+    stored_size = db.Column(db.Integer)
+    
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self, fields=None):
+        return delivery_artifact_schema.dump(self, fields)
+
+delivery_schema = Schema(
+    id=Field(),
+    order_id=Field(),
+    delivery_person=Nested(),
+    delivery_address=Field(),
+    contact_phone=Field(),
+    scheduled_date=DateTime(),
+    actual_delivery_date=DateTime(),
+    status=Field(),
+    route_sequence=Field(),
+    recipient_name=Field(),
+    signature_url=Method(lambda d: f'/api/deliveries/{d.id}/artifacts/signature' if d.signature_artifact_id else None),
+    photo_url=Method(lambda d: f'/api/deliveries/{d.id}/artifacts/photo' if d.photo_artifact_id else None),
+    customer_feedback=Field(),
+    rating=Field(),
+    created_at=DateTime()
+)
+
+delivery_artifact_schema = Schema(
+    id=Field(),
+    delivery_id=Field(),
+    kind=Field(),
+    content_type=Field(),
+    size=Field(),
+    stored_size=Field(),
+    url=Method(lambda a: f'/api/deliveries/{a.delivery_id}/artifacts/{a.kind}'),
+    created_at=DateTime()
+)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, DateTime, Nested, Method
 
 DESIGN_STATUS = ['pending', 'in_progress', 'proof_sent', 'revision_requested', 'approved', 'completed']
 
@@ -25,30 +26,27 @@ class DesignTask(db.Model):
     
     revision_count = db.Column(db.Integer, default=0)
     feedback = db.Column(db.Text)
+    workload_weight = db.Column(db.Float)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     proofs = db.relationship('DesignProof', backref='design_task', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'order_id': self.order_id,
-            'designer': self.designer.to_dict() if self.designer else None,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'design_requirements': self.design_requirements,
-            'reference_files': self.reference_files,
-            'assigned_at': self.assigned_at.isoformat() if self.assigned_at else None,
-            'deadline': self.deadline.isoformat() if self.deadline else None,
-            'revision_count': self.revision_count,
-            'feedback': self.feedback,
-            'proofs': [proof.to_dict() for proof in self.proofs],
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, include_proofs=True, proof_summary=None, fields=None):
+        data = design_task_schema.dump(self, fields)
+        
+        if include_proofs:
+            if fields is None or 'proofs' in fields:
+                data['proofs'] = [proof.to_dict() for proof in self.proofs.order_by(DesignProof.version)]
+        else:
+            proof_count, latest_proof = proof_summary or (0, None)
+            if fields is None or 'proof_count' in fields:
+                data['proof_count'] = proof_count
+            if fields is None or 'latest_proof' in fields:
+                data['latest_proof'] = latest_proof.to_dict() if latest_proof else None
+        
+        return data
 
 class DesignProof(db.Model):
     __tablename__ = 'design_proofs'
@@ -59,6 +57,9 @@ class DesignProof(db.Model):
     version = db.Column(db.Integer, default=1)
     file_path = db.Column(db.String(500))
     file_name = db.Column(db.String(200))
+    file_hash = db.Column(db.String(64), db.ForeignKey('stored_files.sha256'))
+    file_size = db.Column(db.BigInteger)
+    content_type = db.Column(db.String(100))
     
     status = db.Column(db.String(30), default='pending')
     client_feedback = db.Column(db.Text)
@@ -70,14 +71,83 @@ class DesignProof(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'version': self.version,
-            'file_path': self.file_path,
-            'file_name': self.file_name,
-            'status': self.status,
-            'client_feedback': self.client_feedback,
-            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
-            'approved_at': self.approved_at.isoformat() if self.approved_at else None
-        }
+    stored_file = db.relationship('StoredFile')
+    
+    __table_args__ = (
+        db.Index('ix_design_proofs_task_version', 'design_task_id', 'version'),
+    )
+    
+    @classmethod
+    def summaries_for(cls, task_ids):
+        """Return {task_id: (proof_count, latest_proof)} for many tasks in one query."""
+        if not task_ids:
+            return {}
+        
+        stats = db.session.query(
+            cls.design_task_id,
+            db.func.count(cls.id).label('proof_count'),
+            db.func.max(cls.version).label('latest_version')
+        ).filter(cls.design_task_id.in_(task_ids)).group_by(cls.design_task_id).subquery()
+        
+        rows = db.session.query(cls, stats.c.proof_count).join(
+            stats,
+            db.and_(cls.design_task_id == stats.c.design_task_id, cls.version == stats.c.latest_version)
+        ).options(db.joinedload(cls.stored_file)).all()
+        
+        return {proof.design_task_id: (proof_count, proof) for proof, proof_count in rows}
+    
+    def to_dict(self, fields=None):
+        return design_proof_schema.dump(self, fields)
+
+class DesignerWorkload(db.Model):
+    __tablename__ = 'designer_workloads'
+    
+    designer_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    open_tasks = db.Column(db.Integer, default=0, nullable=False)
+    revision_load = db.Column(db.Integer, default=0, nullable=False)
+    deadline_pressure = db.Column(db.Float, default=0, nullable=False)
+    load_score = db.Column(db.Float, default=0, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self, fields=None):
+        return designer_workload_schema.dump(self, fields)
+
+design_task_schema = Schema(
+    id=Field(),
+    order_id=Field(),
+    designer=Nested(),
+    title=Field(),
+    description=Field(),
+    status=Field(),
+    priority=Field(),
+    design_requirements=Field(),
+    reference_files=Field(),
+    assigned_at=DateTime(),
+    deadline=DateTime(),
+    revision_count=Field(),
+    feedback=Field(),
+    created_at=DateTime()
+)
+
+design_proof_schema = Schema(
+    id=Field(),
+    version=Field(),
+    file_path=Field(),
+    file_name=Field(),
+    file_hash=Field(),
+    file_size=Field(),
+    content_type=Field(),
+    thumbnail_url=Method(lambda proof: proof.stored_file.thumbnail_url if proof.stored_file else None),
+    status=Field(),
+    client_feedback=Field(),
+    sent_at=DateTime(),
+    approved_at=DateTime()
+)
+
+designer_workload_schema = Schema(
+    open_tasks=Field(),
+    revision_load=Field(),
+    deadline_pressure=Method(lambda workload: round(workload.deadline_pressure or 0, 2)),
+    load_score=Method(lambda workload: round(workload.load_score or 0, 2)),
+    updated_at=DateTime()
+)
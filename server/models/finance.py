@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, Money, DateTime
 
 PAYMENT_METHODS = ['cash', 'bank_transfer', 'mobile_banking', 'cheque', 'credit']
 PAYMENT_TYPES = ['advance', 'partial', 'full', 'refund']
@@ -44,22 +45,8 @@ class Invoice(db.Model):
         
         return f"{prefix}{new_num}"
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'invoice_number': self.invoice_number,
-            'order_id': self.order_id,
-            'invoice_date': self.invoice_date.isoformat() if self.invoice_date else None,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'subtotal': float(self.subtotal) if self.subtotal else 0,
-            'discount': float(self.discount) if self.discount else 0,
-            'tax_rate': float(self.tax_rate) if self.tax_rate else 0,
-            'tax_amount': float(self.tax_amount) if self.tax_amount else 0,
-            'total_amount': float(self.total_amount) if self.total_amount else 0,
-            'paid_amount': float(self.paid_amount) if self.paid_amount else 0,
-            'status': self.status,
-            'notes': self.notes
-        }
+    def to_dict(self, fields=None):
+        return invoice_schema.dump(self, fields)
 
 class Payment(db.Model):
     __tablename__ = 'payments'
@@ -96,18 +83,8 @@ class Payment(db.Model):
         
         return f"{prefix}{new_num}"
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'payment_number': self.payment_number,
-            'order_id': self.order_id,
-            'amount': float(self.amount) if self.amount else 0,
-            'payment_type': self.payment_type,
-            'payment_method': self.payment_method,
-            'payment_date': self.payment_date.isoformat() if self.payment_date else None,
-            'reference_number': self.reference_number,
-            'notes': self.notes
-        }
+    def to_dict(self, fields=None):
+        return payment_schema.dump(self, fields)
 
 class Expense(db.Model):
     __tablename__ = 'expenses'
@@ -132,15 +109,45 @@ class Expense(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'expense_number': self.expense_number,
-            'category': self.category,
-            'description': self.description,
-            'amount': float(self.amount) if self.amount else 0,
-            'payment_method': self.payment_method,
-            'expense_date': self.expense_date.isoformat() if self.expense_date else None,
-            'vendor_name': self.vendor_name,
-            'notes': self.notes
-        }
+    def to_dict(self, fields=None):
+        return expense_schema.dump(self, fields)
+
+invoice_schema = Schema(
+    id=Field(),
+    invoice_number=Field(),
+    order_id=Field(),
+    invoice_date=DateTime(),
+    due_date=DateTime(),
+    subtotal=Money(),
+    discount=Money(),
+    tax_rate=Money(),
+    tax_amount=Money(),
+    total_amount=Money(),
+    paid_amount=Money(),
+    status=Field(),
+    notes=Field()
+)
+
+payment_schema = Schema(
+    id=Field(),
+    payment_number=Field(),
+    order_id=Field(),
+    amount=Money(),
+    payment_type=Field(),
+    payment_method=Field(),
+    payment_date=DateTime(),
+    reference_number=Field(),
+    notes=Field()
+)
+
+expense_schema = Schema(
+    id=Field(),
+    expense_number=Field(),
+    category=Field(),
+    description=Field(),
+    amount=Money(),
+    payment_method=Field(),
+    expense_date=DateTime(),
+    vendor_name=Field(),
+    notes=Field()
+)
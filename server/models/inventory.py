@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, Money, DateTime, Nested
 
 MATERIAL_TYPES = ['paper', 'ink', 'binding', 'pvc', 'sticker', 'consumable', 'other']
 TRANSACTION_TYPES = ['stock_in', 'stock_out', 'adjustment', 'wastage']
@@ -39,24 +40,8 @@ class InventoryItem(db.Model):
     def is_low_stock(self):
         return float(self.current_stock or 0) <= float(self.minimum_stock or 0)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'sku': self.sku,
-            'name': self.name,
-            'description': self.description,
-            'category': self.category,
-            'material_type': self.material_type,
-            'unit': self.unit,
-            'current_stock': float(self.current_stock) if self.current_stock else 0,
-            'minimum_stock': float(self.minimum_stock) if self.minimum_stock else 0,
-            'reorder_level': float(self.reorder_level) if self.reorder_level else 0,
-            'unit_cost': float(self.unit_cost) if self.unit_cost else 0,
-            'selling_price': float(self.selling_price) if self.selling_price else 0,
-            'supplier_name': self.supplier_name,
-            'is_low_stock': self.is_low_stock,
-            'is_active': self.is_active
-        }
+    def to_dict(self, fields=None):
+        return inventory_item_schema.dump(self, fields)
 
 class InventoryTransaction(db.Model):
     __tablename__ = 'inventory_transactions'
@@ -78,14 +63,34 @@ class InventoryTransaction(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'item': self.item.to_dict() if self.item else None,
-            'transaction_type': self.transaction_type,
-            'quantity': float(self.quantity) if self.quantity else 0,
-            'unit_cost': float(self.unit_cost) if self.unit_cost else 0,
-            'total_cost': float(self.total_cost) if self.total_cost else 0,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=None):
+        return inventory_transaction_schema.dump(self, fields)
+
+inventory_item_schema = Schema(
+    id=Field(),
+    sku=Field(),
+    name=Field(),
+    description=Field(),
+    category=Field(),
+    material_type=Field(),
+    unit=Field(),
+    current_stock=Money(),
+    minimum_stock=Money(),
+    reorder_level=Money(),
+    unit_cost=Money(),
+    selling_price=Money(),
+    supplier_name=Field(),
+    is_low_stock=Field(),
+    is_active=Field()
+)
+
+inventory_transaction_schema = Schema(
+    id=Field(),
+    item=Nested(),
+    transaction_type=Field(),
+    quantity=Money(),
+    unit_cost=Money(),
+    total_cost=Money(),
+    notes=Field(),
+    created_at=DateTime()
+)
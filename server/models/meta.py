@@ -0,0 +1,17 @@
+from datetime import datetime
+from server.extensions import db
+
+# Bump when models change in a way `flask bootstrap` must apply, and add the
+# step that applies it to MIGRATIONS in server/services/migrations.py
+SCHEMA_VERSION = 9
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def current(cls):
+        """Highest applied version, or 0 for a database that was never bootstrapped."""
+        return db.session.query(db.func.max(cls.version)).scalar() or 0
@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, DateTime, Method
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
@@ -12,18 +13,49 @@ class Notification(db.Model):
     role_based = db.Column(db.String(50))  # Specific role, or None for all
     is_read = db.Column(db.Boolean, default=False)
     action_url = db.Column(db.String(500))
+    digest_key = db.Column(db.String(100))  # Unread alerts sharing a key collapse into one row
+    occurrences = db.Column(db.Integer, default=1)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    user = db.relationship('User', backref='notifications', lazy='joined')
+    user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic'))
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'title': self.title,
-            'message': self.message,
-            'notification_type': self.notification_type,
-            'is_read': self.is_read,
-            'action_url': self.action_url,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_user_digest', 'user_id', 'digest_key'),
+        # For the retention purge, which selects across all users
+        db.Index('ix_notifications_read_created', 'is_read', 'created_at'),
+    )
+    
+    def to_dict(self, fields=None):
+        return notification_schema.dump(self, fields)
+
+class NotificationCounter(db.Model):
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    unread_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class NotificationSignal(db.Model):
+    """A user whose notifications changed in a committed transaction.
+    
+    Every worker tails this table by id to wake the streams and long-polls
+    it holds, whichever process made the change.
+    """
+    __tablename__ = 'notification_signals'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+notification_schema = Schema(
+    id=Field(),
+    user_id=Field(),
+    title=Field(),
+    message=Field(),
+    notification_type=Field(),
+    is_read=Field(),
+    action_url=Field(),
+    occurrences=Method(lambda notification: notification.occurrences or 1),
+    created_at=DateTime()
+)
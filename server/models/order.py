@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, Money, DateTime, Label, Nested, Method
 
 ORDER_STATUS = [
     'order',           # অর্ডার
@@ -122,35 +123,8 @@ class Order(db.Model):
         else:
             self.payment_status = 'pending'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'order_number': self.order_number,
-            'customer': self.customer.to_dict() if self.customer else None,
-            'order_type': self.order_type,
-            'status': self.status,
-            'status_label': STATUS_LABELS.get(self.status, self.status),
-            'work_name': self.work_name,
-            'description': self.description,
-            'order_date': self.order_date.isoformat() if self.order_date else None,
-            'expected_delivery_date': self.expected_delivery_date.isoformat() if self.expected_delivery_date else None,
-            'actual_delivery_date': self.actual_delivery_date.isoformat() if self.actual_delivery_date else None,
-            'subtotal': float(self.subtotal) if self.subtotal else 0,
-            'discount': float(self.discount) if self.discount else 0,
-            'tax_amount': float(self.tax_amount) if self.tax_amount else 0,
-            'design_fee': float(self.design_fee) if self.design_fee else 0,
-            'urgency_fee': float(self.urgency_fee) if self.urgency_fee else 0,
-            'cashing_fee': float(self.cashing_fee) if self.cashing_fee else 0,
-            'misc_fee': float(self.misc_fee) if self.misc_fee else 0,
-            'total_amount': float(self.total_amount) if self.total_amount else 0,
-            'paid_amount': float(self.paid_amount) if self.paid_amount else 0,
-            'due_amount': float(self.due_amount) if self.due_amount else 0,
-            'payment_status': self.payment_status,
-            'special_instructions': self.special_instructions,
-            'items': [item.to_dict() for item in self.items],
-            'materials': [material.to_dict() for material in self.materials],
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=None):
+        return order_schema.dump(self, fields)
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
@@ -190,28 +164,8 @@ class OrderItem(db.Model):
             (self.others or 0)
         )
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'product_name': self.product_name,
-            'description': self.description,
-            'quantity': self.quantity,
-            'size': self.size,
-            'color': self.color,
-            'material_type': self.material_type,
-            'unit_price': float(self.unit_price) if self.unit_price else 0,
-            'total_price': float(self.total_price) if self.total_price else 0,
-            'plate': float(self.plate) if self.plate else 0,
-            'paper': float(self.paper) if self.paper else 0,
-            'duplicate': float(self.duplicate) if self.duplicate else 0,
-            'ink': float(self.ink) if self.ink else 0,
-            'printing': float(self.printing) if self.printing else 0,
-            'binding': float(self.binding) if self.binding else 0,
-            'laminating': float(self.laminating) if self.laminating else 0,
-            'others': float(self.others) if self.others else 0,
-            'materials_total': float(self.get_materials_total()),
-            'specifications': self.specifications
-        }
+    def to_dict(self, fields=None):
+        return order_item_schema.dump(self, fields)
 
 class OrderMaterial(db.Model):
     __tablename__ = 'order_materials'
@@ -232,21 +186,8 @@ class OrderMaterial(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'order_id': self.order_id,
-            'material_type': self.material_type,
-            'material_type_label': MATERIAL_LABELS.get(self.material_type, self.material_type),
-            'material_name': self.material_name,
-            'description': self.description,
-            'quantity': float(self.quantity) if self.quantity else 0,
-            'unit': self.unit,
-            'unit_cost': float(self.unit_cost) if self.unit_cost else 0,
-            'total_cost': float(self.total_cost) if self.total_cost else 0,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=None):
+        return order_material_schema.dump(self, fields)
 
 class OrderStatusHistory(db.Model):
     __tablename__ = 'order_status_history'
@@ -258,11 +199,79 @@ class OrderStatusHistory(db.Model):
     changed_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     changed_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'status': self.status,
-            'status_label': STATUS_LABELS.get(self.status, self.status),
-            'notes': self.notes,
-            'changed_at': self.changed_at.isoformat() if self.changed_at else None
-        }
+    def to_dict(self, fields=None):
+        return order_status_history_schema.dump(self, fields)
+
+order_schema = Schema(
+    id=Field(),
+    order_number=Field(),
+    customer=Nested(),
+    order_type=Field(),
+    status=Field(),
+    status_label=Label('status', STATUS_LABELS),
+    work_name=Field(),
+    description=Field(),
+    order_date=DateTime(),
+    expected_delivery_date=DateTime(),
+    actual_delivery_date=DateTime(),
+    subtotal=Money(),
+    discount=Money(),
+    tax_amount=Money(),
+    design_fee=Money(),
+    urgency_fee=Money(),
+    cashing_fee=Money(),
+    misc_fee=Money(),
+    total_amount=Money(),
+    paid_amount=Money(),
+    due_amount=Money(),
+    payment_status=Field(),
+    special_instructions=Field(),
+    items=Nested(many=True),
+    materials=Nested(many=True),
+    created_at=DateTime()
+)
+
+order_item_schema = Schema(
+    id=Field(),
+    product_name=Field(),
+    description=Field(),
+    quantity=Field(),
+    size=Field(),
+    color=Field(),
+    material_type=Field(),
+    unit_price=Money(),
+    total_price=Money(),
+    plate=Money(),
+    paper=Money(),
+    duplicate=Money(),
+    ink=Money(),
+    printing=Money(),
+    binding=Money(),
+    laminating=Money(),
+    others=Money(),
+    materials_total=Method(lambda item: float(item.get_materials_total())),
+    specifications=Field()
+)
+
+order_material_schema = Schema(
+    id=Field(),
+    order_id=Field(),
+    material_type=Field(),
+    material_type_label=Label('material_type', MATERIAL_LABELS),
+    material_name=Field(),
+    description=Field(),
+    quantity=Money(),
+    unit=Field(),
+    unit_cost=Money(),
+    total_cost=Money(),
+    notes=Field(),
+    created_at=DateTime()
+)
+
+order_status_history_schema = Schema(
+    id=Field(),
+    status=Field(),
+    status_label=Label('status', STATUS_LABELS),
+    notes=Field(),
+    changed_at=DateTime()
+)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, DateTime, Nested
 
 PRODUCTION_STATUS = ['pending', 'in_process', 'printing', 'binding', 'quality_check', 'completed', 'on_hold']
 
@@ -15,15 +16,8 @@ class Equipment(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'equipment_type': self.equipment_type,
-            'description': self.description,
-            'status': self.status,
-            'location': self.location
-        }
+    def to_dict(self, fields=None):
+        return equipment_schema.dump(self, fields)
 
 class ProductionTask(db.Model):
     __tablename__ = 'production_tasks'
@@ -54,17 +48,28 @@ class ProductionTask(db.Model):
     
     equipment = db.relationship('Equipment', backref='production_tasks')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'order_id': self.order_id,
-            'task_type': self.task_type,
-            'status': self.status,
-            'priority': self.priority,
-            'equipment': self.equipment.to_dict() if self.equipment else None,
-            'materials_used': self.materials_used,
-            'scheduled_start': self.scheduled_start.isoformat() if self.scheduled_start else None,
-            'actual_start': self.actual_start.isoformat() if self.actual_start else None,
-            'time_spent_minutes': self.time_spent_minutes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=None):
+        return production_task_schema.dump(self, fields)
+
+equipment_schema = Schema(
+    id=Field(),
+    name=Field(),
+    equipment_type=Field(),
+    description=Field(),
+    status=Field(),
+    location=Field()
+)
+
+production_task_schema = Schema(
+    id=Field(),
+    order_id=Field(),
+    task_type=Field(),
+    status=Field(),
+    priority=Field(),
+    equipment=Nested(),
+    materials_used=Field(),
+    scheduled_start=DateTime(),
+    actual_start=DateTime(),
+    time_spent_minutes=Field(),
+    created_at=DateTime()
+)
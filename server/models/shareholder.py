@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, Money, DateTime, Nested
 from decimal import Decimal
 
 class Shareholder(db.Model):
@@ -17,17 +18,8 @@ class Shareholder(db.Model):
     user = db.relationship('User', backref='shareholder_profile', lazy='joined')
     profit_history = db.relationship('ShareholderProfit', backref='shareholder', lazy='dynamic')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'user': self.user.to_dict() if self.user else None,
-            'share_percentage': float(self.share_percentage),
-            'share_amount': float(self.share_amount),
-            'invested_amount': float(self.invested_amount),
-            'profit_earned': float(self.profit_earned),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
+    def to_dict(self, fields=None):
+        return shareholder_schema.dump(self, fields)
 
 class ShareholderProfit(db.Model):
     __tablename__ = 'shareholder_profits'
@@ -42,14 +34,27 @@ class ShareholderProfit(db.Model):
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'shareholder_id': self.shareholder_id,
-            'profit_amount': float(self.profit_amount),
-            'period_start': self.period_start.isoformat() if self.period_start else None,
-            'period_end': self.period_end.isoformat() if self.period_end else None,
-            'payment_status': self.payment_status,
-            'paid_date': self.paid_date.isoformat() if self.paid_date else None,
-            'notes': self.notes,
-        }
+    def to_dict(self, fields=None):
+        return shareholder_profit_schema.dump(self, fields)
+
+shareholder_schema = Schema(
+    id=Field(),
+    user_id=Field(),
+    user=Nested(),
+    share_percentage=Money(),
+    share_amount=Money(),
+    invested_amount=Money(),
+    profit_earned=Money(),
+    created_at=DateTime()
+)
+
+shareholder_profit_schema = Schema(
+    id=Field(),
+    shareholder_id=Field(),
+    profit_amount=Money(),
+    period_start=DateTime(),
+    period_end=DateTime(),
+    payment_status=Field(),
+    paid_date=DateTime(),
+    notes=Field()
+)
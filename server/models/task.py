@@ -1,5 +1,6 @@
 from datetime import datetime
 from server.extensions import db
+from server.serializers import Schema, Field, DateTime
 
 class EmployeeTask(db.Model):
     __tablename__ = 'employee_tasks'
@@ -26,24 +27,38 @@ class EmployeeTask(db.Model):
     assigned_by = db.relationship('User', foreign_keys=[assigned_by_id], backref='created_tasks')
     order = db.relationship('Order', backref='employee_tasks')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'assigned_to_id': self.assigned_to_id,
-            'assigned_to': self.assigned_to.to_dict() if self.assigned_to else None,
-            'assigned_by_id': self.assigned_by_id,
-            'assigned_by': self.assigned_by.to_dict() if self.assigned_by else None,
-            'order_id': self.order_id,
-            'title': self.title,
-            'description': self.description,
-            'task_type': self.task_type,
-            'status': self.status,
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'estimated_hours': self.estimated_hours,
-            'actual_hours': self.actual_hours,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-        }
+    __table_args__ = (
+        db.Index('ix_employee_tasks_assignee_status', 'assigned_to_id', 'status'),
+        db.Index('ix_employee_tasks_due_date', 'due_date'),
+    )
+    
+    def to_dict(self, users=None, fields=None):
+        """Serialize the task; ``users`` maps user id to an already-built user dict."""
+        data = employee_task_schema.dump(self, fields)
+        for name in ('assigned_to', 'assigned_by'):
+            if fields is None or name in fields:
+                if users is not None:
+                    data[name] = users.get(getattr(self, f'{name}_id'))
+                else:
+                    user = getattr(self, name)
+                    data[name] = user.to_dict() if user else None
+        return data
+
+employee_task_schema = Schema(
+    id=Field(),
+    assigned_to_id=Field(),
+    assigned_by_id=Field(),
+    order_id=Field(),
+    title=Field(),
+    description=Field(),
+    task_type=Field(),
+    status=Field(),
+    priority=Field(),
+    due_date=DateTime(),
+    estimated_hours=Field(),
+    actual_hours=Field(),
+    notes=Field(),
+    created_at=DateTime(),
+    updated_at=DateTime(),
+    completed_at=DateTime()
+)
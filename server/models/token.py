@@ -0,0 +1,28 @@
+from datetime import datetime
+from server.extensions import db
+from server.serializers import Schema, Field, DateTime, Method
+
+class ApiToken(db.Model):
+    """Issued API token; the signed token itself is never stored."""
+    __tablename__ = 'api_tokens'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    scopes = db.Column(db.JSON, default=list)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, index=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self, fields=None):
+        return api_token_schema.dump(self, fields)
+
+api_token_schema = Schema(
+    id=Field(),
+    name=Field(),
+    scopes=Method(lambda token: token.scopes or []),
+    expires_at=DateTime(),
+    revoked_at=DateTime(),
+    created_at=DateTime()
+)
@@ -0,0 +1,69 @@
+from datetime import datetime
+from server.extensions import db
+from server.serializers import Schema, Field, DateTime, Nested, Method
+
+UPLOAD_STATUS = ['uploading', 'completing', 'complete']
+THUMBNAIL_STATUS = ['pending', 'ready', 'unsupported', 'failed']
+
+class StoredFile(db.Model):
+    __tablename__ = 'stored_files'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100))
+    thumbnail_status = db.Column(db.String(20), default='pending')
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @property
+    def url(self):
+        return f'/api/files/{self.sha256}'
+    
+    @property
+    def thumbnail_url(self):
+        return f'/api/files/{self.sha256}/thumbnail' if self.thumbnail_status == 'ready' else None
+    
+    def to_dict(self, fields=None):
+        return stored_file_schema.dump(self, fields)
+
+class FileUpload(db.Model):
+    __tablename__ = 'file_uploads'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    file_name = db.Column(db.String(200), nullable=False)
+    content_type = db.Column(db.String(100))
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received_size = db.Column(db.BigInteger, default=0)
+    status = db.Column(db.String(20), default='uploading')
+    
+    sha256 = db.Column(db.String(64), db.ForeignKey('stored_files.sha256'))
+    
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    stored_file = db.relationship('StoredFile')
+    
+    def to_dict(self, fields=None):
+        return file_upload_schema.dump(self, fields)
+
+stored_file_schema = Schema(
+    sha256=Field(),
+    size=Field(),
+    content_type=Field(),
+    url=Field(),
+    thumbnail_status=Field(),
+    thumbnail_url=Field(),
+    created_at=DateTime()
+)
+
+file_upload_schema = Schema(
+    id=Field(),
+    file_name=Field(),
+    content_type=Field(),
+    total_size=Field(),
+    received_size=Method(lambda upload: upload.received_size or 0),
+    status=Field(),
+    file=Nested('stored_file'),
+    created_at=DateTime()
+)
@@ -1,7 +1,9 @@
 from datetime import datetime
+from flask import current_app
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from server.extensions import db
+from server.serializers import Schema, Field, DateTime, Nested
 
 class Role(db.Model):
     __tablename__ = 'roles'
@@ -14,13 +16,8 @@ class Role(db.Model):
     
     users = db.relationship('User', backref='role', lazy='dynamic')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'permissions': self.permissions
-        }
+    def to_dict(self, fields=None):
+        return role_schema.dump(self, fields)
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -41,21 +38,48 @@ class User(UserMixin, db.Model):
     deliveries = db.relationship('Delivery', backref='delivery_person', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'full_name': self.full_name,
-            'phone': self.phone,
-            'role': self.role.to_dict() if self.role else None,
-            'department': self.department,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
-        }
+    def to_summary_dict(self):
+        return user_schema.dump(self, SUMMARY_FIELDS)
+    
+    def to_dict(self, fields=None):
+        return user_schema.dump(self, fields)
+
+class PrincipalInvalidation(db.Model):
+    """A user or role edited in a committed transaction.
+    
+    Every worker reads recent rows to drop its cached principals for them,
+    whichever process made the change.
+    """
+    __tablename__ = 'principal_invalidations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)
+    role_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+role_schema = Schema(
+    id=Field(),
+    name=Field(),
+    description=Field(),
+    permissions=Field()
+)
+
+user_schema = Schema(
+    id=Field(),
+    username=Field(),
+    email=Field(),
+    full_name=Field(),
+    phone=Field(),
+    role=Nested(),
+    department=Field(),
+    is_active=Field(),
+    created_at=DateTime(),
+    last_login=DateTime()
+)
+
+SUMMARY_FIELDS = frozenset(['id', 'username', 'full_name', 'department'])
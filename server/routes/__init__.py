@@ -2,7 +2,7 @@ from flask import Blueprint
 
 api = Blueprint('api', __name__)
 
-from server.routes import auth, customers, orders, design, production, delivery, finance, dashboard, users
+from server.routes import auth, customers, orders, design, production, delivery, finance, dashboard, users, uploads
 from server.routes.shareholder import shareholder_bp
 from server.routes.tasks import tasks_bp
 from server.routes.notifications import notifications_bp
@@ -1,9 +1,10 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime
 from server.routes import api
 from server.extensions import db
-from server.models import User, Role
+from server.models import User, Role, ApiToken
+from server.services import logins, tokens
 
 @api.route('/auth/login', methods=['POST'])
 def login():
@@ -14,21 +15,41 @@ def login():
     if not username or not password:
         return jsonify({'error': 'Username and password required'}), 400
     
+    account_throttle, ip_throttle = logins.get_throttles()
+    address = request.remote_addr
+    retry_after = max(account_throttle.retry_after(username), ip_throttle.retry_after(address))
+    if retry_after:
+        return jsonify({'error': 'Too many failed login attempts, try again later'}), 429, {'Retry-After': str(retry_after)}
+    
     user = User.query.filter_by(username=username).first()
     
-    if user and user.check_password(password):
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    try:
+        valid, new_hash = logins.hasher.verify(user.password_hash if user else None, password, method)
+    except (logins.LoginBusy, TimeoutError):
+        return jsonify({'error': 'Login service is busy, try again shortly'}), 503, {'Retry-After': '2'}
+    
+    if valid:
         if not user.is_active:
             return jsonify({'error': 'Account is disabled'}), 403
         
-        user.last_login = datetime.utcnow()
-        db.session.commit()
+        account_throttle.reset(username)
+        if new_hash:
+            user.password_hash = new_hash
+            db.session.commit()
+        now = datetime.utcnow()
+        logins.last_logins.record(current_app._get_current_object(), user.id, now)
         login_user(user)
         
+        result = user.to_dict()
+        result['last_login'] = now.isoformat()
         return jsonify({
             'message': 'Login successful',
-            'user': user.to_dict()
+            'user': result
         })
     
+    account_throttle.record(username)
+    ip_throttle.record(address)
     return jsonify({'error': 'Invalid username or password'}), 401
 
 @api.route('/auth/logout', methods=['POST'])
@@ -71,3 +92,40 @@ def register():
         'message': 'Registration successful',
         'user': user.to_dict()
     }), 201
+
+@api.route('/auth/tokens', methods=['GET'])
+@login_required
+def list_tokens():
+    tokens = ApiToken.query.filter_by(user_id=current_user.id).order_by(ApiToken.created_at.desc()).all()
+    return jsonify([t.to_dict() for t in tokens])
+
+@api.route('/auth/tokens', methods=['POST'])
+@login_required
+def create_token():
+    if current_user.token_id:
+        return jsonify({'error': 'API tokens cannot issue other tokens'}), 403
+    
+    data = request.get_json()
+    if not data.get('name') or not isinstance(data.get('scopes'), list) or not data['scopes']:
+        return jsonify({'error': 'Token name and scopes required'}), 400
+    
+    max_age = current_app.config['API_TOKEN_MAX_AGE_DAYS']
+    try:
+        expires_in = max(1, min(int(data.get('expires_in_days', max_age)), max_age))
+        token, signed = tokens.issue(current_user.id, data['name'], data['scopes'], expires_in)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    result = token.to_dict()
+    result['token'] = signed
+    return jsonify(result), 201
+
+@api.route('/auth/tokens/<token_id>', methods=['DELETE'])
+@login_required
+def revoke_token(token_id):
+    token = ApiToken.query.filter_by(id=token_id, user_id=current_user.id).first_or_404()
+    if not token.revoked_at:
+        tokens.revoke(token)
+        db.session.commit()
+    return jsonify({'message': 'Token revoked'})
@@ -3,9 +3,12 @@ from flask_login import login_required
 from server.routes import api
 from server.extensions import db
 from server.models import Customer
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
 
 @api.route('/customers', methods=['GET'])
 @login_required
+@require_permission('customers')
 def get_customers():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -28,8 +31,9 @@ def get_customers():
     
     customers = query.order_by(Customer.created_at.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'customers': [c.to_dict() for c in customers.items],
+        'customers': [c.to_dict(fields) for c in customers.items],
         'total': customers.total,
         'pages': customers.pages,
         'current_page': page
@@ -37,12 +41,14 @@ def get_customers():
 
 @api.route('/customers/<int:id>', methods=['GET'])
 @login_required
+@require_permission('customers')
 def get_customer(id):
     customer = Customer.query.get_or_404(id)
     return jsonify(customer.to_dict())
 
 @api.route('/customers', methods=['POST'])
 @login_required
+@require_permission('customers')
 def create_customer():
     data = request.get_json()
     
@@ -55,6 +61,8 @@ def create_customer():
         address=data.get('address'),
         city=data.get('city'),
         district=data.get('district'),
+        latitude=data.get('latitude'),
+        longitude=data.get('longitude'),
         category=data.get('category'),
         credit_limit=data.get('credit_limit', 0),
         notes=data.get('notes')
@@ -67,6 +75,7 @@ def create_customer():
 
 @api.route('/customers/<int:id>', methods=['PUT'])
 @login_required
+@require_permission('customers')
 def update_customer(id):
     customer = Customer.query.get_or_404(id)
     data = request.get_json()
@@ -79,6 +88,8 @@ def update_customer(id):
     customer.address = data.get('address', customer.address)
     customer.city = data.get('city', customer.city)
     customer.district = data.get('district', customer.district)
+    customer.latitude = data.get('latitude', customer.latitude)
+    customer.longitude = data.get('longitude', customer.longitude)
     customer.category = data.get('category', customer.category)
     customer.credit_limit = data.get('credit_limit', customer.credit_limit)
     customer.notes = data.get('notes', customer.notes)
@@ -89,6 +100,7 @@ def update_customer(id):
 
 @api.route('/customers/<int:id>', methods=['DELETE'])
 @login_required
+@require_permission('customers')
 def delete_customer(id):
     customer = Customer.query.get_or_404(id)
     customer.is_active = False
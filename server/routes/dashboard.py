@@ -5,9 +5,13 @@ from sqlalchemy import func
 from server.routes import api
 from server.extensions import db
 from server.models import Order, Customer, Payment, Expense, InventoryItem, Delivery
+from server.services.permissions import require_permission
+from server.services.querystats import query_budget
 
 @api.route('/dashboard/stats', methods=['GET'])
 @login_required
+@require_permission('dashboard')
+@query_budget(14)
 def get_dashboard_stats():
     today = datetime.utcnow().date()
     week_ago = today - timedelta(days=7)
@@ -81,6 +85,8 @@ def get_dashboard_stats():
 
 @api.route('/dashboard/orders-by-status', methods=['GET'])
 @login_required
+@require_permission('dashboard')
+@query_budget(4)
 def get_orders_by_status():
     status_counts = db.session.query(
         Order.status,
@@ -91,12 +97,14 @@ def get_orders_by_status():
 
 @api.route('/dashboard/recent-orders', methods=['GET'])
 @login_required
+@require_permission('dashboard')
 def get_recent_orders():
     orders = Order.query.order_by(Order.created_at.desc()).limit(10).all()
     return jsonify([o.to_dict() for o in orders])
 
 @api.route('/dashboard/pending-deliveries', methods=['GET'])
 @login_required
+@require_permission('dashboard')
 def get_pending_deliveries():
     deliveries = Delivery.query.filter(
         Delivery.status.in_(['scheduled', 'out_for_delivery'])
@@ -105,6 +113,8 @@ def get_pending_deliveries():
 
 @api.route('/dashboard/revenue-trend', methods=['GET'])
 @login_required
+@require_permission('dashboard')
+@query_budget(4)
 def get_revenue_trend():
     thirty_days_ago = datetime.utcnow().date() - timedelta(days=30)
     
@@ -1,12 +1,52 @@
-from flask import request, jsonify
+import io
+from flask import request, jsonify, current_app, Response
 from flask_login import login_required, current_user
 from datetime import datetime
 from server.routes import api
 from server.extensions import db
-from server.models import Delivery, Order, User, Role
+from server.models import Delivery, DeliveryArtifact, Order, User, Role
+from server.models.delivery import ARTIFACT_KINDS
+from server.services.blobs import get_blob_store, decode_data_url, BlobTooLarge
+from server.services.route_planner import Stop, plan_routes
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
+
+def delivery_personnel_query():
+    delivery_role = Role.query.filter_by(name='Delivery').first()
+    if delivery_role:
+        return User.query.filter_by(role_id=delivery_role.id, is_active=True)
+    return User.query.filter_by(department='Delivery', is_active=True)
+
+def store_artifact(delivery, kind, stream, content_type):
+    key, size, stored_size, compression = get_blob_store().put(
+        stream, content_type, current_app.config['DELIVERY_ARTIFACT_MAX_SIZE']
+    )
+    
+    artifact = DeliveryArtifact(
+        delivery_id=delivery.id,
+        kind=kind,
+        storage_key=key,
+        compression=compression,
+        content_type=content_type,
+        size=size,
+        stored_size=stored_size,
+        created_by=current_user.id
+    )
+    db.session.add(artifact)
+    db.session.flush()
+    
+    previous_id = getattr(delivery, f'{kind}_artifact_id')
+    setattr(delivery, f'{kind}_artifact_id', artifact.id)
+    if previous_id:
+        # Repoint the delivery first; the foreign key still guards the old row until then
+        db.session.flush()
+        DeliveryArtifact.query.filter_by(id=previous_id).delete()
+    
+    return artifact
 
 @api.route('/deliveries', methods=['GET'])
 @login_required
+@require_permission('delivery')
 def get_deliveries():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -25,8 +65,9 @@ def get_deliveries():
     
     deliveries = query.order_by(Delivery.scheduled_date.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'deliveries': [d.to_dict() for d in deliveries.items],
+        'deliveries': [d.to_dict(fields) for d in deliveries.items],
         'total': deliveries.total,
         'pages': deliveries.pages,
         'current_page': page
@@ -34,12 +75,14 @@ def get_deliveries():
 
 @api.route('/deliveries/<int:id>', methods=['GET'])
 @login_required
+@require_permission('delivery')
 def get_delivery(id):
     delivery = Delivery.query.get_or_404(id)
     return jsonify(delivery.to_dict())
 
 @api.route('/deliveries', methods=['POST'])
 @login_required
+@require_permission('delivery')
 def create_delivery():
     data = request.get_json()
     
@@ -61,6 +104,7 @@ def create_delivery():
 
 @api.route('/deliveries/<int:id>', methods=['PUT'])
 @login_required
+@require_permission('delivery')
 def update_delivery(id):
     delivery = Delivery.query.get_or_404(id)
     data = request.get_json()
@@ -81,6 +125,14 @@ def update_delivery(id):
         delivery.recipient_name = data.get('recipient_name')
         delivery.customer_feedback = data.get('customer_feedback')
         delivery.rating = data.get('rating')
+        if data.get('recipient_signature'):
+            content_type, payload = decode_data_url(data.get('recipient_signature'))
+            if payload is None:
+                return jsonify({'error': 'recipient_signature must be a base64 data URL'}), 400
+            try:
+                store_artifact(delivery, 'signature', io.BytesIO(payload), content_type)
+            except BlobTooLarge:
+                return jsonify({'error': 'Signature is too large'}), 413
         order.status = 'delivered'
         order.actual_delivery_date = datetime.utcnow()
     elif data.get('status') == 'failed':
@@ -89,12 +141,140 @@ def update_delivery(id):
     db.session.commit()
     return jsonify(delivery.to_dict())
 
+@api.route('/deliveries/<int:id>/artifacts/<kind>', methods=['PUT', 'POST'])
+@login_required
+@require_permission('delivery')
+def upload_delivery_artifact(id, kind):
+    if kind not in ARTIFACT_KINDS:
+        return jsonify({'error': 'Unknown artifact type'}), 404
+    delivery = Delivery.query.get_or_404(id)
+    
+    upload = request.files.get('file')
+    if upload:
+        stream, content_type = upload.stream, upload.mimetype
+    else:
+        stream, content_type = request.stream, request.mimetype
+    
+    try:
+        artifact = store_artifact(delivery, kind, stream, content_type or 'application/octet-stream')
+    except BlobTooLarge:
+        db.session.rollback()
+        return jsonify({'error': 'File is too large'}), 413
+    
+    db.session.commit()
+    return jsonify(artifact.to_dict()), 201
+
+@api.route('/deliveries/<int:id>/artifacts/<kind>', methods=['GET'])
+@login_required
+@require_permission('delivery')
+def get_delivery_artifact(id, kind):
+    if kind not in ARTIFACT_KINDS:
+        return jsonify({'error': 'Unknown artifact type'}), 404
+    delivery = Delivery.query.get_or_404(id)
+    
+    artifact_id = getattr(delivery, f'{kind}_artifact_id')
+    if not artifact_id:
+        return jsonify({'error': 'Not found'}), 404
+    artifact = DeliveryArtifact.query.get_or_404(artifact_id)
+    
+    if artifact.storage_key in request.if_none_match:
+        return Response(status=304)
+    
+    response = Response(
+        get_blob_store().iter_content(artifact.storage_key, artifact.compression),
+        mimetype=artifact.content_type,
+        direct_passthrough=True
+    )
+    response.content_length = artifact.size
+    response.set_etag(artifact.storage_key)
+    response.cache_control.private = True
+    response.cache_control.max_age = 86400
+    return response
+
 @api.route('/delivery-personnel', methods=['GET'])
 @login_required
+@require_permission('delivery')
 def get_delivery_personnel():
-    delivery_role = Role.query.filter_by(name='Delivery').first()
-    if delivery_role:
-        personnel = User.query.filter_by(role_id=delivery_role.id, is_active=True).all()
-    else:
-        personnel = User.query.filter_by(department='Delivery', is_active=True).all()
+    personnel = delivery_personnel_query().all()
     return jsonify([p.to_dict() for p in personnel])
+
+@api.route('/deliveries/plan', methods=['POST'])
+@login_required
+@require_permission('delivery')
+def plan_deliveries():
+    data = request.get_json() or {}
+    
+    try:
+        run_date = datetime.fromisoformat(data['date']).date() if data.get('date') else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date'}), 400
+    
+    riders_query = delivery_personnel_query()
+    if data.get('rider_ids'):
+        riders_query = riders_query.filter(User.id.in_(data['rider_ids']))
+    riders = {r.id: r for r in riders_query.all()}
+    if not riders:
+        return jsonify({'error': 'No active delivery personnel available'}), 400
+    
+    deliveries = Delivery.query.filter(
+        Delivery.status == 'scheduled',
+        db.func.date(Delivery.scheduled_date) == run_date
+    ).options(
+        db.joinedload(Delivery.order).joinedload(Order.customer)
+    ).all()
+    
+    keep_assigned = data.get('keep_assigned', True)
+    stops = []
+    for delivery in deliveries:
+        customer = delivery.order.customer if delivery.order else None
+        point = None
+        if customer and customer.latitude is not None and customer.longitude is not None:
+            point = (customer.latitude, customer.longitude)
+        stops.append(Stop(
+            delivery.id,
+            (customer.district or customer.city) if customer else None,
+            point,
+            rider_id=delivery.delivery_person_id if keep_assigned else None,
+            payload=delivery
+        ))
+    
+    depot = (current_app.config['DEPOT_LATITUDE'], current_app.config['DEPOT_LONGITUDE'])
+    plans = plan_routes(stops, sorted(riders), depot)
+    
+    manifests = []
+    for rider_id, route in plans.items():
+        manifest_stops = []
+        for sequence, (stop, leg_km) in enumerate(route, start=1):
+            delivery = stop.payload
+            order = delivery.order
+            if data.get('apply'):
+                delivery.delivery_person_id = rider_id
+                delivery.route_sequence = sequence
+            manifest_stops.append({
+                'sequence': sequence,
+                'delivery_id': delivery.id,
+                'order_id': delivery.order_id,
+                'order_number': order.order_number if order else None,
+                'customer': order.customer.company_name if order and order.customer else None,
+                'delivery_address': delivery.delivery_address,
+                'contact_phone': delivery.contact_phone,
+                'zone': stop.zone,
+                'located': stop.located,
+                'leg_km': round(leg_km, 2)
+            })
+        rider = riders[rider_id]
+        manifests.append({
+            'rider': {'id': rider.id, 'full_name': rider.full_name, 'phone': rider.phone},
+            'stops': manifest_stops,
+            'total_km': round(sum(s['leg_km'] for s in manifest_stops), 2)
+        })
+    
+    if data.get('apply'):
+        db.session.commit()
+    
+    return jsonify({
+        'date': run_date.isoformat(),
+        'applied': bool(data.get('apply')),
+        'total_stops': len(stops),
+        'manifests': manifests
+    })
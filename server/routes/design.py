@@ -3,10 +3,21 @@ from flask_login import login_required, current_user
 from datetime import datetime
 from server.routes import api
 from server.extensions import db
-from server.models import DesignTask, DesignProof, Order, User
+from server.models import DesignTask, DesignProof, DesignerWorkload, Order, User
+from server.routes.uploads import get_upload_for_user
+from server.services import workload
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
+
+def get_completed_upload(upload_id):
+    upload = get_upload_for_user(upload_id)
+    if upload.status != 'complete':
+        return None
+    return upload
 
 @api.route('/design-tasks', methods=['GET'])
 @login_required
+@require_permission('design')
 def get_design_tasks():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -20,10 +31,13 @@ def get_design_tasks():
     if designer_id:
         query = query.filter(DesignTask.designer_id == designer_id)
     
+    query = query.options(db.joinedload(DesignTask.designer).joinedload(User.role))
     tasks = query.order_by(DesignTask.created_at.desc()).paginate(page=page, per_page=per_page)
+    summaries = DesignProof.summaries_for([t.id for t in tasks.items])
     
+    fields = requested_fields()
     return jsonify({
-        'tasks': [t.to_dict() for t in tasks.items],
+        'tasks': [t.to_dict(include_proofs=False, proof_summary=summaries.get(t.id), fields=fields) for t in tasks.items],
         'total': tasks.total,
         'pages': tasks.pages,
         'current_page': page
@@ -31,12 +45,34 @@ def get_design_tasks():
 
 @api.route('/design-tasks/<int:id>', methods=['GET'])
 @login_required
+@require_permission('design')
 def get_design_task(id):
     task = DesignTask.query.get_or_404(id)
-    return jsonify(task.to_dict())
+    summaries = DesignProof.summaries_for([task.id])
+    return jsonify(task.to_dict(include_proofs=False, proof_summary=summaries.get(task.id)))
+
+@api.route('/design-tasks/<int:id>/proofs', methods=['GET'])
+@login_required
+@require_permission('design')
+def get_design_proofs(id):
+    DesignTask.query.get_or_404(id)
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    
+    proofs = DesignProof.query.filter_by(design_task_id=id).options(
+        db.joinedload(DesignProof.stored_file)
+    ).order_by(DesignProof.version.desc()).paginate(page=page, per_page=per_page)
+    
+    return jsonify({
+        'proofs': [p.to_dict() for p in proofs.items],
+        'total': proofs.total,
+        'pages': proofs.pages,
+        'current_page': page
+    })
 
 @api.route('/design-tasks', methods=['POST'])
 @login_required
+@require_permission('design')
 def create_design_task():
     data = request.get_json()
     
@@ -52,22 +88,31 @@ def create_design_task():
         deadline=datetime.fromisoformat(data.get('deadline')) if data.get('deadline') else None
     )
     
-    if data.get('designer_id'):
+    if not task.designer_id and data.get('auto_assign'):
+        # Counts the task on the designer it picks
+        workload.claim_least_loaded(task)
+    
+    if task.designer_id:
         task.assigned_at = datetime.utcnow()
         task.status = 'pending'
         order.status = 'designer_assigned'
     
     db.session.add(task)
+    if task.workload_weight is None:
+        workload.claim(task)
     db.session.commit()
     
     return jsonify(task.to_dict()), 201
 
 @api.route('/design-tasks/<int:id>', methods=['PUT'])
 @login_required
+@require_permission('design')
 def update_design_task(id):
     task = DesignTask.query.get_or_404(id)
     data = request.get_json()
     
+    workload.release(task)
+    
     task.designer_id = data.get('designer_id', task.designer_id)
     task.title = data.get('title', task.title)
     task.description = data.get('description', task.description)
@@ -82,11 +127,13 @@ def update_design_task(id):
     if data.get('status') == 'completed':
         task.completed_at = datetime.utcnow()
     
+    workload.claim(task)
     db.session.commit()
     return jsonify(task.to_dict())
 
 @api.route('/design-tasks/<int:id>/proofs', methods=['POST'])
 @login_required
+@require_permission('design')
 def create_design_proof(id):
     task = DesignTask.query.get_or_404(id)
     data = request.get_json()
@@ -102,6 +149,16 @@ def create_design_proof(id):
         internal_notes=data.get('internal_notes')
     )
     
+    if data.get('upload_id'):
+        upload = get_completed_upload(data.get('upload_id'))
+        if not upload:
+            return jsonify({'error': 'Upload is not complete'}), 409
+        proof.file_hash = upload.sha256
+        proof.file_size = upload.received_size
+        proof.content_type = upload.content_type
+        proof.file_path = upload.stored_file.url
+        proof.file_name = data.get('file_name') or upload.file_name
+    
     db.session.add(proof)
     
     task.status = 'proof_sent'
@@ -113,8 +170,34 @@ def create_design_proof(id):
     db.session.commit()
     return jsonify(proof.to_dict()), 201
 
+@api.route('/design-tasks/<int:id>/reference-files', methods=['POST'])
+@login_required
+@require_permission('design')
+def add_reference_file(id):
+    task = DesignTask.query.get_or_404(id)
+    data = request.get_json()
+    
+    upload = get_completed_upload(data.get('upload_id'))
+    if not upload:
+        return jsonify({'error': 'Upload is not complete'}), 409
+    
+    reference_files = list(task.reference_files or [])
+    if not any(isinstance(f, dict) and f.get('sha256') == upload.sha256 for f in reference_files):
+        reference_files.append({
+            'sha256': upload.sha256,
+            'file_name': upload.file_name,
+            'size': upload.received_size,
+            'content_type': upload.content_type,
+            'url': upload.stored_file.url
+        })
+        task.reference_files = reference_files
+        db.session.commit()
+    
+    return jsonify(task.to_dict()), 201
+
 @api.route('/design-proofs/<int:id>/review', methods=['PUT'])
 @login_required
+@require_permission('design')
 def review_design_proof(id):
     proof = DesignProof.query.get_or_404(id)
     data = request.get_json()
@@ -128,6 +211,8 @@ def review_design_proof(id):
     task = proof.design_task
     order = task.order
     
+    workload.release(task)
+    
     if action == 'approve':
         proof.status = 'approved'
         proof.approved_at = datetime.utcnow()
@@ -139,16 +224,29 @@ def review_design_proof(id):
         task.revision_count += 1
         task.feedback = feedback
     
+    workload.claim(task)
     db.session.commit()
     return jsonify(proof.to_dict())
 
 @api.route('/designers', methods=['GET'])
 @login_required
+@require_permission('design')
 def get_designers():
-    from server.models import Role
-    designer_role = Role.query.filter_by(name='Designer').first()
-    if designer_role:
-        designers = User.query.filter_by(role_id=designer_role.id, is_active=True).all()
-    else:
-        designers = User.query.filter_by(department='Design', is_active=True).all()
-    return jsonify([d.to_dict() for d in designers])
+    designers = workload.designer_query().outerjoin(
+        DesignerWorkload, DesignerWorkload.designer_id == User.id
+    ).add_entity(DesignerWorkload).options(db.joinedload(User.role)).all()
+    return jsonify([
+        dict(d.to_dict(), workload=w.to_dict() if w else None)
+        for d, w in designers
+    ])
+
+@api.route('/designers/candidates', methods=['GET'])
+@login_required
+@require_permission('design')
+def get_designer_candidates():
+    limit = request.args.get('limit', 5, type=int)
+    candidates = workload.rank_candidates(limit=limit)
+    return jsonify([
+        dict(d.to_dict(), workload=w.to_dict() if w else None)
+        for d, w in candidates
+    ])
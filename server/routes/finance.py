@@ -1,12 +1,20 @@
 from flask import request, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import select
 from server.routes import api
 from server.extensions import db
-from server.models import Invoice, Payment, Expense, Order
+from server.models import Invoice, Payment, Expense, Order, Customer
+from server.models.finance import PAYMENT_METHODS
+from server.services import metrics
+from server.services.exports import FORMATS, export_response
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
 
 @api.route('/invoices', methods=['GET'])
 @login_required
+@require_permission('finance')
 def get_invoices():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -19,8 +27,9 @@ def get_invoices():
     
     invoices = query.order_by(Invoice.created_at.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'invoices': [i.to_dict() for i in invoices.items],
+        'invoices': [i.to_dict(fields) for i in invoices.items],
         'total': invoices.total,
         'pages': invoices.pages,
         'current_page': page
@@ -28,12 +37,14 @@ def get_invoices():
 
 @api.route('/invoices/<int:id>', methods=['GET'])
 @login_required
+@require_permission('finance')
 def get_invoice(id):
     invoice = Invoice.query.get_or_404(id)
     return jsonify(invoice.to_dict())
 
 @api.route('/invoices', methods=['POST'])
 @login_required
+@require_permission('finance')
 def create_invoice():
     data = request.get_json()
     
@@ -61,38 +72,82 @@ def create_invoice():
 
 @api.route('/invoices/<int:id>/send', methods=['POST'])
 @login_required
+@require_permission('finance')
 def send_invoice(id):
     invoice = Invoice.query.get_or_404(id)
     invoice.status = 'sent'
     db.session.commit()
     return jsonify(invoice.to_dict())
 
+def payment_filters():
+    """Criteria from the query string, shared by the payment list and its export."""
+    criteria = []
+    order_id = request.args.get('order_id', type=int)
+    payment_method = request.args.get('payment_method')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    if order_id:
+        criteria.append(Payment.order_id == order_id)
+    if payment_method:
+        criteria.append(Payment.payment_method == payment_method)
+    if start_date:
+        criteria.append(Payment.payment_date >= datetime.fromisoformat(start_date))
+    if end_date:
+        criteria.append(Payment.payment_date <= datetime.fromisoformat(end_date))
+    return criteria
+
 @api.route('/payments', methods=['GET'])
 @login_required
+@require_permission('finance')
 def get_payments():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
-    order_id = request.args.get('order_id', type=int)
-    payment_method = request.args.get('payment_method')
-    
-    query = Payment.query
     
-    if order_id:
-        query = query.filter(Payment.order_id == order_id)
-    if payment_method:
-        query = query.filter(Payment.payment_method == payment_method)
+    try:
+        criteria = payment_filters()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be ISO dates'}), 400
     
+    query = Payment.query.filter(*criteria)
     payments = query.order_by(Payment.created_at.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'payments': [p.to_dict() for p in payments.items],
+        'payments': [p.to_dict(fields) for p in payments.items],
         'total': payments.total,
         'pages': payments.pages,
         'current_page': page
     })
 
+@api.route('/payments/export', methods=['GET'])
+@login_required
+@require_permission('finance')
+def export_payments():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    
+    try:
+        criteria = payment_filters()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be ISO dates'}), 400
+    
+    # Plain rows rather than ORM objects, in primary-key order so no sort is needed
+    statement = select(
+        Payment.payment_number, Payment.payment_date, Order.order_number, Customer.company_name,
+        Payment.amount, Payment.payment_type, Payment.payment_method, Payment.reference_number, Payment.notes
+    ).join(Order, Payment.order_id == Order.id).outerjoin(Customer, Order.customer_id == Customer.id).where(
+        *criteria
+    ).order_by(Payment.id)
+    
+    return export_response(statement, [
+        'Payment No', 'Date', 'Order No', 'Customer', 'Amount', 'Type', 'Method', 'Reference', 'Notes'
+    ], f"payments-{datetime.now().strftime('%Y%m%d')}", fmt)
+
 @api.route('/payments', methods=['POST'])
 @login_required
+@require_permission('finance')
 def create_payment():
     data = request.get_json()
     
@@ -113,7 +168,8 @@ def create_payment():
     
     db.session.add(payment)
     
-    order.paid_amount = float(order.paid_amount or 0) + float(payment.amount)
+    # Numeric columns load as Decimal, which update_totals() cannot mix with float
+    order.paid_amount = (order.paid_amount or 0) + Decimal(str(payment.amount))
     order.update_totals()
     
     if data.get('invoice_id'):
@@ -126,38 +182,76 @@ def create_payment():
                 invoice.status = 'partial'
     
     db.session.commit()
+    # Label values come from the request, so anything unexpected is bucketed
+    method = payment.payment_method if payment.payment_method in PAYMENT_METHODS else 'other'
+    metrics.inc('payments_posted_total', payment_method=method)
+    metrics.inc('payments_posted_amount_total', float(payment.amount), payment_method=method)
     
     return jsonify(payment.to_dict()), 201
 
-@api.route('/expenses', methods=['GET'])
-@login_required
-def get_expenses():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+def expense_filters():
+    """Criteria from the query string, shared by the expense list and its export."""
+    criteria = []
     category = request.args.get('category')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Expense.query
-    
     if category:
-        query = query.filter(Expense.category == category)
+        criteria.append(Expense.category == category)
     if start_date:
-        query = query.filter(Expense.expense_date >= datetime.fromisoformat(start_date))
+        criteria.append(Expense.expense_date >= datetime.fromisoformat(start_date))
     if end_date:
-        query = query.filter(Expense.expense_date <= datetime.fromisoformat(end_date))
+        criteria.append(Expense.expense_date <= datetime.fromisoformat(end_date))
+    return criteria
+
+@api.route('/expenses', methods=['GET'])
+@login_required
+@require_permission('finance')
+def get_expenses():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
     
+    try:
+        criteria = expense_filters()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be ISO dates'}), 400
+    
+    query = Expense.query.filter(*criteria)
     expenses = query.order_by(Expense.created_at.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'expenses': [e.to_dict() for e in expenses.items],
+        'expenses': [e.to_dict(fields) for e in expenses.items],
         'total': expenses.total,
         'pages': expenses.pages,
         'current_page': page
     })
 
+@api.route('/expenses/export', methods=['GET'])
+@login_required
+@require_permission('finance')
+def export_expenses():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    
+    try:
+        criteria = expense_filters()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be ISO dates'}), 400
+    
+    statement = select(
+        Expense.expense_number, Expense.expense_date, Expense.category, Expense.description,
+        Expense.vendor_name, Expense.amount, Expense.payment_method, Expense.reference_number, Expense.notes
+    ).where(*criteria).order_by(Expense.id)
+    
+    return export_response(statement, [
+        'Expense No', 'Date', 'Category', 'Description', 'Vendor', 'Amount', 'Method', 'Reference', 'Notes'
+    ], f"expenses-{datetime.now().strftime('%Y%m%d')}", fmt)
+
 @api.route('/expenses', methods=['POST'])
 @login_required
+@require_permission('finance')
 def create_expense():
     data = request.get_json()
     
@@ -194,6 +288,7 @@ def create_expense():
 
 @api.route('/expense-categories', methods=['GET'])
 @login_required
+@require_permission('finance')
 def get_expense_categories():
     return jsonify([
         'materials', 'utilities', 'rent', 'salary', 'transport',
@@ -202,5 +297,6 @@ def get_expense_categories():
 
 @api.route('/payment-methods', methods=['GET'])
 @login_required
+@require_permission('finance')
 def get_payment_methods():
     return jsonify(['cash', 'bank_transfer', 'mobile_banking', 'cheque', 'credit'])
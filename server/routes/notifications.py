@@ -1,13 +1,22 @@
-from flask import Blueprint, request, jsonify
+import json
+import time
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_login import login_required, current_user
 from server.extensions import db
 from server.models.notification import Notification
+from server.services import notify
+from server.services.pubsub import channels
+from server.services.permissions import require_permission
+from server.services.replicas import use_primary
+from server.serializers import requested_fields
 from datetime import datetime
 
-notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
+notifications_bp = Blueprint('notifications', __name__, url_prefix='/notifications')
 
 @notifications_bp.route('', methods=['GET'])
 @login_required
+@require_permission('notifications')
+@use_primary
 def list_notifications():
     unread_only = request.args.get('unread_only', 'false').lower() == 'true'
     
@@ -18,32 +27,119 @@ def list_notifications():
     
     notifications = query.order_by(Notification.created_at.desc()).limit(50).all()
     
+    fields = requested_fields()
+    config = current_app.config
     return jsonify({
-        'notifications': [n.to_dict() for n in notifications],
-        'unread_count': Notification.query.filter_by(user_id=current_user.id, is_read=False).count()
+        'notifications': [n.to_dict(fields) for n in notifications],
+        'unread_count': notify.unread_count(current_user.id),
+        # How the client should wait for changes: an SSE stream, or back-to-back long-polls
+        'push': {
+            'mode': config['NOTIFICATION_PUSH'],
+            'poll_interval': config['NOTIFICATION_POLL_INTERVAL']
+        }
     })
 
+@notifications_bp.route('/unread-count', methods=['GET'])
+@login_required
+@require_permission('notifications')
+@use_primary
+def get_unread_count():
+    return jsonify({'unread_count': notify.unread_count(current_user.id)})
+
+@notifications_bp.route('/poll', methods=['GET'])
+@login_required
+@require_permission('notifications')
+def poll_notifications():
+    token = request.args.get('version', '')
+    timeout = min(
+        request.args.get('timeout', current_app.config['NOTIFICATION_POLL_TIMEOUT'], type=float),
+        current_app.config['NOTIFICATION_POLL_TIMEOUT']
+    )
+    user_id = current_user.id
+    db.session.remove()
+    
+    version = channels.wait(user_id, token, timeout)
+    return jsonify({'version': version, 'changed': version != token})
+
+@notifications_bp.route('/stream', methods=['GET'])
+@login_required
+@require_permission('notifications')
+def stream_notifications():
+    # Each open stream holds its worker for minutes, which only gevent workers can afford
+    if current_app.config['NOTIFICATION_PUSH'] != 'stream':
+        return jsonify({'error': 'Streaming is not enabled; use /api/notifications/poll'}), 404
+    
+    user_id = current_user.id
+    keepalive = current_app.config['NOTIFICATION_STREAM_KEEPALIVE']
+    deadline = time.monotonic() + current_app.config['NOTIFICATION_STREAM_MAX_AGE']
+    token = request.headers.get('Last-Event-ID') or channels.token(user_id)
+    db.session.remove()
+    
+    def events():
+        nonlocal token
+        yield f'retry: 3000\nid: {token}\nevent: ready\ndata: {json.dumps({"version": token})}\n\n'
+        while time.monotonic() < deadline:
+            version = channels.wait(user_id, token, keepalive)
+            if version == token:
+                yield ': keepalive\n\n'
+                continue
+            token = version
+            yield f'id: {token}\nevent: notifications\ndata: {json.dumps({"version": token})}\n\n'
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@notifications_bp.route('/read-all', methods=['POST'])
+@login_required
+@require_permission('notifications', 'view')
+def mark_all_as_read():
+    updated = notify.mark_read(current_user.id)
+    db.session.commit()
+    return jsonify({'updated': updated, 'unread_count': notify.unread_count(current_user.id)})
+
+@notifications_bp.route('/read', methods=['POST'])
+@login_required
+@require_permission('notifications', 'view')
+def mark_many_as_read():
+    data = request.get_json() or {}
+    ids = data.get('ids')
+    
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return jsonify({'error': 'ids must be a list of notification ids'}), 400
+    
+    updated = notify.mark_read(current_user.id, ids) if ids else 0
+    db.session.commit()
+    return jsonify({'updated': updated, 'unread_count': notify.unread_count(current_user.id)})
+
 @notifications_bp.route('/<int:notification_id>/read', methods=['POST'])
 @login_required
+@require_permission('notifications', 'view')
 def mark_as_read(notification_id):
     notification = Notification.query.get_or_404(notification_id)
     
     if notification.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    notification.is_read = True
+    if not notification.is_read:
+        notification.is_read = True
+        notify.adjust_unread({current_user.id: -1})
     db.session.commit()
     
     return jsonify(notification.to_dict())
 
 @notifications_bp.route('/<int:notification_id>', methods=['DELETE'])
 @login_required
+@require_permission('notifications', 'view')
 def delete_notification(notification_id):
     notification = Notification.query.get_or_404(notification_id)
     
     if notification.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
+    if not notification.is_read:
+        notify.adjust_unread({current_user.id: -1})
     db.session.delete(notification)
     db.session.commit()
     
@@ -51,19 +147,66 @@ def delete_notification(notification_id):
 
 @notifications_bp.route('', methods=['POST'])
 @login_required
+@require_permission('notifications')
 def create_notification():
     data = request.get_json()
     
-    notification = Notification(
-        user_id=data.get('user_id'),
-        title=data.get('title'),
-        message=data.get('message'),
+    if not data.get('user_id') and data.get('role_based'):
+        count = notify.broadcast(
+            data.get('title'),
+            data.get('message'),
+            role=data.get('role_based'),
+            notification_type=data.get('notification_type', 'info'),
+            action_url=data.get('action_url'),
+            digest_key=data.get('digest_key')
+        )
+        db.session.commit()
+        return jsonify({'recipients': count}), 201
+    
+    notification = notify.notify_user(
+        data.get('user_id'),
+        data.get('title'),
+        data.get('message'),
         notification_type=data.get('notification_type', 'info'),
         action_url=data.get('action_url'),
-        role_based=data.get('role_based')
+        role_based=data.get('role_based'),
+        digest_key=data.get('digest_key')
     )
-    
-    db.session.add(notification)
     db.session.commit()
     
     return jsonify(notification.to_dict()), 201
+
+@notifications_bp.route('/broadcast', methods=['POST'])
+@login_required
+@require_permission('notifications')
+def broadcast_notification():
+    data = request.get_json()
+    
+    if not data.get('title') or not data.get('message'):
+        return jsonify({'error': 'title and message are required'}), 400
+    
+    role = data.get('role')
+    department = data.get('department')
+    user_ids = data.get('user_ids')
+    
+    if user_ids is not None and (
+        not isinstance(user_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in user_ids)
+    ):
+        return jsonify({'error': 'user_ids must be a list of user ids'}), 400
+    
+    if not (role or department or user_ids or data.get('all_staff')):
+        return jsonify({'error': 'Specify role, department, user_ids or all_staff'}), 400
+    
+    count = notify.broadcast(
+        data['title'],
+        data['message'],
+        role=role,
+        department=department,
+        user_ids=user_ids,
+        notification_type=data.get('notification_type', 'info'),
+        action_url=data.get('action_url'),
+        digest_key=data.get('digest_key')
+    )
+    db.session.commit()
+    
+    return jsonify({'recipients': count}), 201
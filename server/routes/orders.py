@@ -1,53 +1,104 @@
 from flask import request, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime
+from sqlalchemy import select
 from server.routes import api
 from server.extensions import db
 from server.models import Order, OrderItem, OrderStatusHistory, Customer
+from server.models.order import ORDER_TYPES
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
+from server.services import metrics
+from server.services.exports import FORMATS, export_response
+from server.services.querystats import query_budget
 
-@api.route('/orders', methods=['GET'])
-@login_required
-def get_orders():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+def order_filters():
+    """Criteria from the query string, shared by the order list and its export."""
+    criteria = []
     status = request.args.get('status')
     order_type = request.args.get('order_type')
     customer_id = request.args.get('customer_id', type=int)
     search = request.args.get('search', '')
-    
-    query = Order.query
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
     
     if status:
-        query = query.filter(Order.status == status)
+        criteria.append(Order.status == status)
     if order_type:
-        query = query.filter(Order.order_type == order_type)
+        criteria.append(Order.order_type == order_type)
     if customer_id:
-        query = query.filter(Order.customer_id == customer_id)
+        criteria.append(Order.customer_id == customer_id)
     if search:
-        query = query.filter(
+        criteria.append(
             db.or_(
                 Order.order_number.ilike(f'%{search}%'),
                 Order.work_name.ilike(f'%{search}%')
             )
         )
+    if start_date:
+        criteria.append(Order.order_date >= datetime.fromisoformat(start_date))
+    if end_date:
+        criteria.append(Order.order_date <= datetime.fromisoformat(end_date))
+    return criteria
+
+@api.route('/orders', methods=['GET'])
+@login_required
+@require_permission('orders')
+def get_orders():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
     
+    try:
+        criteria = order_filters()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be ISO dates'}), 400
+    
+    query = Order.query.filter(*criteria)
     orders = query.order_by(Order.created_at.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'orders': [o.to_dict() for o in orders.items],
+        'orders': [o.to_dict(fields) for o in orders.items],
         'total': orders.total,
         'pages': orders.pages,
         'current_page': page
     })
 
+@api.route('/orders/export', methods=['GET'])
+@login_required
+@require_permission('orders')
+def export_orders():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    
+    try:
+        criteria = order_filters()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be ISO dates'}), 400
+    
+    statement = select(
+        Order.order_number, Order.order_date, Customer.company_name, Order.work_name, Order.order_type,
+        Order.status, Order.expected_delivery_date, Order.total_amount, Order.paid_amount, Order.due_amount,
+        Order.payment_status
+    ).outerjoin(Customer, Order.customer_id == Customer.id).where(*criteria).order_by(Order.id)
+    
+    return export_response(statement, [
+        'Order No', 'Date', 'Customer', 'Work', 'Type', 'Status', 'Expected Delivery',
+        'Total', 'Paid', 'Due', 'Payment Status'
+    ], f"orders-{datetime.now().strftime('%Y%m%d')}", fmt)
+
 @api.route('/orders/<int:id>', methods=['GET'])
 @login_required
+@require_permission('orders')
+@query_budget(7)
 def get_order(id):
     order = Order.query.get_or_404(id)
     return jsonify(order.to_dict())
 
 @api.route('/orders', methods=['POST'])
 @login_required
+@require_permission('orders')
 def create_order():
     data = request.get_json()
     
@@ -96,10 +147,12 @@ def create_order():
     db.session.add(status_history)
     
     db.session.commit()
+    metrics.inc('orders_created_total', order_type=order.order_type if order.order_type in ORDER_TYPES else 'other')
     return jsonify(order.to_dict()), 201
 
 @api.route('/orders/<int:id>', methods=['PUT'])
 @login_required
+@require_permission('orders')
 def update_order(id):
     order = Order.query.get_or_404(id)
     data = request.get_json()
@@ -133,6 +186,7 @@ def update_order(id):
 
 @api.route('/orders/<int:id>/status', methods=['PUT'])
 @login_required
+@require_permission('orders')
 def update_order_status(id):
     order = Order.query.get_or_404(id)
     data = request.get_json()
@@ -159,6 +213,7 @@ def update_order_status(id):
 
 @api.route('/orders/<int:id>/history', methods=['GET'])
 @login_required
+@require_permission('orders')
 def get_order_history(id):
     order = Order.query.get_or_404(id)
     history = OrderStatusHistory.query.filter_by(order_id=id).order_by(OrderStatusHistory.changed_at.desc()).all()
@@ -166,6 +221,7 @@ def get_order_history(id):
 
 @api.route('/order-statuses', methods=['GET'])
 @login_required
+@require_permission('orders')
 def get_order_statuses():
     from server.models.order import ORDER_STATUS
     return jsonify(ORDER_STATUS)
@@ -4,9 +4,12 @@ from datetime import datetime
 from server.routes import api
 from server.extensions import db
 from server.models import ProductionTask, Equipment, Order
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
 
 @api.route('/production-tasks', methods=['GET'])
 @login_required
+@require_permission('production')
 def get_production_tasks():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -22,8 +25,9 @@ def get_production_tasks():
     
     tasks = query.order_by(ProductionTask.created_at.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'tasks': [t.to_dict() for t in tasks.items],
+        'tasks': [t.to_dict(fields) for t in tasks.items],
         'total': tasks.total,
         'pages': tasks.pages,
         'current_page': page
@@ -31,12 +35,14 @@ def get_production_tasks():
 
 @api.route('/production-tasks/<int:id>', methods=['GET'])
 @login_required
+@require_permission('production')
 def get_production_task(id):
     task = ProductionTask.query.get_or_404(id)
     return jsonify(task.to_dict())
 
 @api.route('/production-tasks', methods=['POST'])
 @login_required
+@require_permission('production')
 def create_production_task():
     data = request.get_json()
     
@@ -61,6 +67,7 @@ def create_production_task():
 
 @api.route('/production-tasks/<int:id>', methods=['PUT'])
 @login_required
+@require_permission('production')
 def update_production_task(id):
     task = ProductionTask.query.get_or_404(id)
     data = request.get_json()
@@ -97,12 +104,14 @@ def update_production_task(id):
 
 @api.route('/equipment', methods=['GET'])
 @login_required
+@require_permission('production')
 def get_equipment():
     equipment = Equipment.query.filter_by(status='available').all()
     return jsonify([e.to_dict() for e in equipment])
 
 @api.route('/equipment', methods=['POST'])
 @login_required
+@require_permission('production')
 def create_equipment():
     data = request.get_json()
     
@@ -120,5 +129,6 @@ def create_equipment():
 
 @api.route('/production-types', methods=['GET'])
 @login_required
+@require_permission('production')
 def get_production_types():
     return jsonify(['printing', 'binding', 'lamination', 'cutting', 'packing', 'other'])
@@ -2,12 +2,14 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from server.extensions import db
 from server.models.shareholder import Shareholder, ShareholderProfit
+from server.services.permissions import require_permission
 from datetime import datetime
 
-shareholder_bp = Blueprint('shareholder', __name__, url_prefix='/api/shareholder')
+shareholder_bp = Blueprint('shareholder', __name__, url_prefix='/shareholder')
 
 @shareholder_bp.route('/dashboard', methods=['GET'])
 @login_required
+@require_permission('finance')
 def get_shareholder_dashboard():
     shareholder = Shareholder.query.filter_by(user_id=current_user.id).first()
     
@@ -23,6 +25,7 @@ def get_shareholder_dashboard():
 
 @shareholder_bp.route('/list', methods=['GET'])
 @login_required
+@require_permission('finance')
 def list_shareholders():
     shareholders = Shareholder.query.all()
     return jsonify({
@@ -31,6 +34,7 @@ def list_shareholders():
 
 @shareholder_bp.route('/<int:shareholder_id>', methods=['GET'])
 @login_required
+@require_permission('finance')
 def get_shareholder(shareholder_id):
     shareholder = Shareholder.query.get_or_404(shareholder_id)
     profit_history = ShareholderProfit.query.filter_by(shareholder_id=shareholder_id).all()
@@ -42,6 +46,7 @@ def get_shareholder(shareholder_id):
 
 @shareholder_bp.route('/<int:shareholder_id>', methods=['PUT'])
 @login_required
+@require_permission('finance')
 def update_shareholder(shareholder_id):
     shareholder = Shareholder.query.get_or_404(shareholder_id)
     data = request.get_json()
@@ -56,6 +61,7 @@ def update_shareholder(shareholder_id):
 
 @shareholder_bp.route('/<int:shareholder_id>/profit', methods=['POST'])
 @login_required
+@require_permission('finance')
 def create_shareholder_profit(shareholder_id):
     shareholder = Shareholder.query.get_or_404(shareholder_id)
     data = request.get_json()
@@ -2,12 +2,33 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from server.extensions import db
 from server.models.task import EmployeeTask
+from server.models.user import User
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
 from datetime import datetime
 
-tasks_bp = Blueprint('tasks', __name__, url_prefix='/api/tasks')
+tasks_bp = Blueprint('tasks', __name__, url_prefix='/tasks')
+
+OPEN_TASK_STATUSES = ['pending', 'in_progress']
+
+def resolve_users(tasks, summary=False):
+    """Load every assignee and assigner of ``tasks`` in one query, keyed by id."""
+    user_ids = {t.assigned_to_id for t in tasks} | {t.assigned_by_id for t in tasks}
+    if not user_ids:
+        return {}
+    query = User.query.filter(User.id.in_(user_ids))
+    if not summary:
+        query = query.options(db.joinedload(User.role))
+    users = query.all()
+    return {u.id: u.to_summary_dict() if summary else u.to_dict() for u in users}
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
 
 @tasks_bp.route('', methods=['GET'])
 @login_required
+@require_permission('tasks')
 def list_tasks():
     status = request.args.get('status')
     priority = request.args.get('priority')
@@ -20,13 +41,96 @@ def list_tasks():
         query = query.filter_by(priority=priority)
     
     tasks = query.order_by(EmployeeTask.due_date).all()
+    users = resolve_users(tasks)
     
+    fields = requested_fields()
+    return jsonify({
+        'tasks': [t.to_dict(users=users, fields=fields) for t in tasks]
+    })
+
+@tasks_bp.route('/board', methods=['GET'])
+@login_required
+@require_permission('reports', 'view')
+def task_board():
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 50, type=int), 500)
+    department = request.args.get('department')
+    statuses = [s for s in request.args.get('status', '').split(',') if s]
+    assigned_to_id = request.args.get('assigned_to_id', type=int)
+    
+    try:
+        due_from = parse_date_arg('due_from')
+        due_to = parse_date_arg('due_to')
+    except ValueError:
+        return jsonify({'error': 'due_from and due_to must be ISO dates'}), 400
+    
+    query = EmployeeTask.query
+    
+    if department:
+        query = query.join(User, EmployeeTask.assigned_to_id == User.id).filter(User.department == department)
+    if statuses:
+        query = query.filter(EmployeeTask.status.in_(statuses))
+    if assigned_to_id:
+        query = query.filter(EmployeeTask.assigned_to_id == assigned_to_id)
+    if due_from:
+        query = query.filter(EmployeeTask.due_date >= due_from)
+    if due_to:
+        query = query.filter(EmployeeTask.due_date <= due_to)
+    
+    now = datetime.utcnow()
+    is_open = EmployeeTask.status.in_(OPEN_TASK_STATUSES)
+    workload_rows = query.with_entities(
+        EmployeeTask.assigned_to_id,
+        db.func.count(EmployeeTask.id),
+        db.func.sum(db.case((is_open, 1), else_=0)),
+        db.func.sum(db.case((EmployeeTask.status == 'completed', 1), else_=0)),
+        db.func.sum(db.case((db.and_(is_open, EmployeeTask.due_date < now), 1), else_=0)),
+        db.func.coalesce(db.func.sum(EmployeeTask.estimated_hours), 0),
+        db.func.coalesce(db.func.sum(EmployeeTask.actual_hours), 0)
+    ).group_by(EmployeeTask.assigned_to_id).all()
+    
+    tasks = query.order_by(
+        EmployeeTask.due_date.is_(None), EmployeeTask.due_date, EmployeeTask.id
+    ).paginate(page=page, per_page=per_page, count=False)
+    
+    workload = [{
+        'assigned_to_id': user_id,
+        'total': total,
+        'open': int(open_count or 0),
+        'completed': int(completed or 0),
+        'overdue': int(overdue or 0),
+        'estimated_hours': float(estimated),
+        'actual_hours': float(actual)
+    } for user_id, total, open_count, completed, overdue, estimated, actual in workload_rows]
+    
+    users = resolve_users(tasks.items, summary=True)
+    missing = {w['assigned_to_id'] for w in workload} - users.keys()
+    if missing:
+        users.update({u.id: u.to_summary_dict() for u in User.query.filter(User.id.in_(missing))})
+    for w in workload:
+        w['assigned_to'] = users.get(w['assigned_to_id'])
+    
+    total = sum(w['total'] for w in workload)
+    
+    fields = requested_fields()
     return jsonify({
-        'tasks': [t.to_dict() for t in tasks]
+        'tasks': [t.to_dict(users=users, fields=fields) for t in tasks.items],
+        'workload': sorted(workload, key=lambda w: (-w['open'], w['assigned_to_id'])),
+        'totals': {
+            'tasks': total,
+            'open': sum(w['open'] for w in workload),
+            'overdue': sum(w['overdue'] for w in workload),
+            'estimated_hours': sum(w['estimated_hours'] for w in workload),
+            'actual_hours': sum(w['actual_hours'] for w in workload)
+        },
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'current_page': page
     })
 
 @tasks_bp.route('/<int:task_id>', methods=['GET'])
 @login_required
+@require_permission('tasks')
 def get_task(task_id):
     task = EmployeeTask.query.get_or_404(task_id)
     
@@ -37,6 +141,7 @@ def get_task(task_id):
 
 @tasks_bp.route('/<int:task_id>', methods=['PATCH'])
 @login_required
+@require_permission('tasks')
 def update_task(task_id):
     task = EmployeeTask.query.get_or_404(task_id)
     
@@ -61,6 +166,7 @@ def update_task(task_id):
 
 @tasks_bp.route('', methods=['POST'])
 @login_required
+@require_permission('tasks')
 def create_task():
     data = request.get_json()
     
@@ -83,6 +189,7 @@ def create_task():
 
 @tasks_bp.route('/<int:task_id>', methods=['DELETE'])
 @login_required
+@require_permission('tasks')
 def delete_task(task_id):
     task = EmployeeTask.query.get_or_404(task_id)
     
@@ -0,0 +1,214 @@
+import re
+import uuid
+from datetime import datetime
+from flask import request, jsonify, send_file, current_app, abort
+from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+from server.routes import api
+from server.extensions import db
+from server.models import FileUpload, StoredFile
+from server.services.storage import get_content_store, UploadOffsetError
+from server.services.thumbnails import schedule_thumbnail
+from server.services.permissions import require_permission
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# Types a browser may render in place; anything else (HTML, SVG, scripts) could run
+# script on our origin, so it is only ever sent as an opaque download
+INLINE_CONTENT_TYPES = frozenset({'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'application/pdf'})
+
+def get_upload_for_user(upload_id):
+    upload = FileUpload.query.get_or_404(upload_id)
+    if upload.created_by != current_user.id:
+        abort(403)
+    return upload
+
+@api.route('/uploads', methods=['POST'])
+@login_required
+@require_permission('design')
+def create_upload():
+    data = request.get_json()
+    
+    file_name = data.get('file_name')
+    total_size = data.get('total_size')
+    
+    if not file_name or not isinstance(total_size, int) or total_size < 0:
+        return jsonify({'error': 'file_name and total_size are required'}), 400
+    
+    if total_size > current_app.config['UPLOAD_MAX_SIZE']:
+        return jsonify({'error': 'File is too large'}), 413
+    
+    upload = FileUpload(
+        id=uuid.uuid4().hex,
+        file_name=file_name,
+        content_type=data.get('content_type') or 'application/octet-stream',
+        total_size=total_size,
+        created_by=current_user.id
+    )
+    
+    db.session.add(upload)
+    db.session.commit()
+    get_content_store().create_part(upload.id)
+    
+    return jsonify(upload.to_dict()), 201
+
+@api.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+@require_permission('design')
+def get_upload(upload_id):
+    upload = get_upload_for_user(upload_id)
+    return jsonify(upload.to_dict())
+
+@api.route('/uploads/<upload_id>', methods=['PUT'])
+@login_required
+@require_permission('design')
+def upload_chunk(upload_id):
+    upload = get_upload_for_user(upload_id)
+    
+    if upload.status != 'uploading':
+        return jsonify({'error': 'Upload is already complete'}), 409
+    
+    length = request.content_length
+    if length is None:
+        return jsonify({'error': 'Content-Length is required'}), 411
+    if length > current_app.config['UPLOAD_MAX_CHUNK_SIZE']:
+        return jsonify({'error': 'Chunk is too large'}), 413
+    
+    offset = upload.received_size or 0
+    content_range = request.headers.get('Content-Range')
+    if content_range:
+        match = CONTENT_RANGE_RE.match(content_range)
+        if not match or int(match.group(2)) - int(match.group(1)) + 1 != length:
+            return jsonify({'error': 'Invalid Content-Range header'}), 400
+        offset = int(match.group(1))
+    
+    if offset + length > upload.total_size:
+        return jsonify({'error': 'Chunk exceeds declared file size'}), 400
+    
+    store = get_content_store()
+    try:
+        upload.received_size = store.append_chunk(upload.id, request.stream, offset, length)
+    except UploadOffsetError as e:
+        upload.received_size = e.expected
+        db.session.commit()
+        return jsonify({'error': str(e), 'received_size': e.expected}), 409
+    
+    db.session.commit()
+    return jsonify(upload.to_dict())
+
+@api.route('/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+@require_permission('design')
+def complete_upload(upload_id):
+    upload = get_upload_for_user(upload_id)
+    
+    if upload.status == 'complete':
+        return jsonify(upload.to_dict())
+    
+    store = get_content_store()
+    if store.part_size(upload.id) != upload.total_size:
+        return jsonify({'error': 'Upload is incomplete', 'received_size': store.part_size(upload.id)}), 409
+    
+    # Claim the upload before touching its part file: of two concurrent
+    # completions (from any worker) only the one whose UPDATE matched goes on
+    claimed = db.session.execute(
+        db.update(FileUpload)
+        .where(FileUpload.id == upload.id, FileUpload.status == 'uploading')
+        .values(status='completing', updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        db.session.refresh(upload)
+        if upload.status == 'complete':
+            return jsonify(upload.to_dict())
+        return jsonify({'error': 'Upload is already being completed'}), 409
+    
+    try:
+        if upload.total_size == 0:
+            # Empty uploads created before part files were started up front have none yet
+            store.create_part(upload.id)
+        sha256, size, _ = store.commit(upload.id)
+    except OSError:
+        upload.status = 'uploading'
+        db.session.commit()
+        raise
+    
+    stored = db.session.get(StoredFile, sha256)
+    if stored is None:
+        # Another upload of the same content may be completing at the same moment
+        try:
+            with db.session.begin_nested():
+                stored = StoredFile(sha256=sha256, size=size, content_type=upload.content_type)
+                db.session.add(stored)
+        except IntegrityError:
+            stored = db.session.get(StoredFile, sha256)
+    
+    upload.sha256 = sha256
+    upload.received_size = size
+    upload.status = 'complete'
+    db.session.commit()
+    
+    if stored.thumbnail_status == 'pending':
+        schedule_thumbnail(current_app._get_current_object(), sha256)
+    
+    return jsonify(upload.to_dict())
+
+@api.route('/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+@require_permission('design')
+def cancel_upload(upload_id):
+    upload = get_upload_for_user(upload_id)
+    
+    if upload.status != 'uploading':
+        return jsonify({'error': 'Upload is already complete'}), 409
+    
+    get_content_store().discard(upload.id)
+    db.session.delete(upload)
+    db.session.commit()
+    
+    return jsonify({'message': 'Upload cancelled'})
+
+@api.route('/files/<sha256>', methods=['GET'])
+@login_required
+@require_permission('design')
+def download_file(sha256):
+    if not SHA256_RE.match(sha256):
+        abort(404)
+    stored = StoredFile.query.get_or_404(sha256)
+    
+    content_type = (stored.content_type or '').split(';')[0].strip().lower()
+    inline = content_type in INLINE_CONTENT_TYPES
+    response = send_file(
+        get_content_store().object_path(sha256),
+        mimetype=content_type if inline else 'application/octet-stream',
+        as_attachment=not inline or request.args.get('download') == '1',
+        download_name=request.args.get('name') or sha256,
+        conditional=True,
+        etag=sha256,
+        max_age=31536000
+    )
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+@api.route('/files/<sha256>/thumbnail', methods=['GET'])
+@login_required
+@require_permission('design')
+def download_thumbnail(sha256):
+    if not SHA256_RE.match(sha256):
+        abort(404)
+    stored = StoredFile.query.get_or_404(sha256)
+    
+    if stored.thumbnail_status != 'ready':
+        return jsonify({'error': 'Thumbnail not available', 'thumbnail_status': stored.thumbnail_status}), 404
+    
+    response = send_file(
+        get_content_store().thumbnail_path(sha256),
+        mimetype='image/jpeg',
+        conditional=True,
+        etag=f'{sha256}-thumb',
+        max_age=31536000
+    )
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -3,9 +3,12 @@ from flask_login import login_required, current_user
 from server.routes import api
 from server.extensions import db
 from server.models import User, Role
+from server.services.permissions import require_permission
+from server.serializers import requested_fields
 
 @api.route('/users', methods=['GET'])
 @login_required
+@require_permission('users')
 def get_users():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -21,8 +24,9 @@ def get_users():
     
     users = query.order_by(User.created_at.desc()).paginate(page=page, per_page=per_page)
     
+    fields = requested_fields()
     return jsonify({
-        'users': [u.to_dict() for u in users.items],
+        'users': [u.to_dict(fields) for u in users.items],
         'total': users.total,
         'pages': users.pages,
         'current_page': page
@@ -30,12 +34,14 @@ def get_users():
 
 @api.route('/users/<int:id>', methods=['GET'])
 @login_required
+@require_permission('users')
 def get_user(id):
     user = User.query.get_or_404(id)
     return jsonify(user.to_dict())
 
 @api.route('/users', methods=['POST'])
 @login_required
+@require_permission('users')
 def create_user():
     data = request.get_json()
     
@@ -59,6 +65,7 @@ def create_user():
 
 @api.route('/users/<int:id>', methods=['PUT'])
 @login_required
+@require_permission('users')
 def update_user(id):
     user = User.query.get_or_404(id)
     data = request.get_json()
@@ -78,12 +85,14 @@ def update_user(id):
 
 @api.route('/roles', methods=['GET'])
 @login_required
+@require_permission('users')
 def get_roles():
     roles = Role.query.all()
     return jsonify([r.to_dict() for r in roles])
 
 @api.route('/roles', methods=['POST'])
 @login_required
+@require_permission('users')
 def create_role():
     data = request.get_json()
     
@@ -97,3 +106,18 @@ def create_role():
     db.session.commit()
     
     return jsonify(role.to_dict()), 201
+
+@api.route('/roles/<int:id>', methods=['PUT'])
+@login_required
+@require_permission('users')
+def update_role(id):
+    role = Role.query.get_or_404(id)
+    data = request.get_json()
+    
+    role.name = data.get('name', role.name)
+    role.description = data.get('description', role.description)
+    if 'permissions' in data:
+        role.permissions = data['permissions']
+    
+    db.session.commit()
+    return jsonify(role.to_dict())
@@ -1,11 +1,14 @@
 from datetime import datetime, timedelta
 import random
 from decimal import Decimal
+from itertools import accumulate
 from server.extensions import db
 from server.models import (
     User, Role, Customer, Order, OrderItem, OrderMaterial,
-    OrderStatusHistory, InventoryItem, Equipment, Payment, Invoice
+    OrderStatusHistory, InventoryItem, InventoryTransaction, Equipment, Payment, Invoice, Expense
 )
+from server.models.finance import PAYMENT_METHODS
+from server.models.order import ORDER_STATUS
 
 def seed_database():
     """Populate the database with realistic test data"""
@@ -624,6 +627,335 @@ def seed_orders():
     db.session.commit()
     print(f"Created {orders_created} orders with items and payments")
 
+SCALE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+# Order, payment and expense numbers carry a 4-digit sequence per month, so
+# the generated history is stretched until no month needs more than this
+MAX_ORDERS_PER_MONTH = 7000
+
+CITIES = ['ঢাকা', 'চট্টগ্রাম', 'রাজশাহী', 'খুলনা', 'সিলেট', 'বরিশাল', 'রংপুর', 'ময়মনসিংহ',
+          'কুমিল্লা', 'গাজীপুর', 'নারায়ণগঞ্জ', 'দিনাজপুর']
+BUSINESS_WORDS = ['প্রিন্টিং হাউস', 'গ্রাফিক্স', 'প্রেস', 'অফসেট প্রিন্টার্স', 'বুক হাউস', 'অ্যাড এজেন্সি',
+                  'মিডিয়া সার্ভিস', 'প্যাকেজিং', 'পাবলিশার্স', 'ডিজাইন সেন্টার', 'ক্রিয়েটিভ', 'ট্রেডার্স']
+WORK_NAMES = ['Visiting Card', 'Business Card', 'Letterhead', 'Bill Book', 'Money Receipt',
+              'Poster', 'Banner', 'Brochure', 'Flyer', 'Catalog', 'Magazine',
+              'Wedding Card', 'Invitation Card', 'Calendar', 'Diary', 'Notebook',
+              'Packaging Box', 'Label Sticker', 'Certificate', 'ID Card', 'Menu Card']
+SIZES = ['A4', 'A5', 'A3', '3x2 inch', '4x6 inch', '8.5x11 inch', '12x18 inch', '24x36 inch', 'Custom']
+COLORS = ['4-Color (CMYK)', '2-Color', 'Black & White', 'Single Color', 'Full Color + Spot UV']
+# Workflow stages in order; 'cancelled' can follow any of them
+STAGES = ORDER_STATUS[:-1]
+EXPENSE_CATEGORIES = ['materials', 'utilities', 'rent', 'salary', 'transport',
+                      'maintenance', 'marketing', 'office_supplies', 'other']
+
+def parse_scale(value):
+    """Number of orders for a scale like ``1m``, ``250k`` or ``5000``."""
+    value = value.strip().lower()
+    multiplier = SCALE_SUFFIXES.get(value[-1:])
+    if multiplier:
+        value = value[:-1]
+    count = int(float(value) * (multiplier or 1))
+    if count <= 0:
+        raise ValueError('scale must be positive')
+    return count
+
+class ScaledSeeder:
+    """Generates a large order history with bulk INSERTs, one batch of orders at a time.
+    
+    Primary keys are assigned here rather than by the database, so child rows
+    can be built without reading anything back. Memory use depends on the
+    batch size, not the number of orders.
+    """
+    
+    TABLES = [Customer, Order, OrderItem, OrderStatusHistory, Payment, Expense, InventoryTransaction]
+    
+    def __init__(self, orders, batch_size=5000, random_seed=None):
+        self.orders = orders
+        self.batch_size = batch_size
+        self.rng = random.Random(random_seed)
+        self.now = datetime.now()
+        self.next_ids = {
+            model: (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+            for model in self.TABLES
+        }
+        self.rows = {model: [] for model in self.TABLES}
+        self.sequences = {}
+    
+    def run(self):
+        self.user_ids = [user_id for user_id, in db.session.query(User.id)]
+        self.inventory = db.session.query(InventoryItem.id, InventoryItem.unit_cost).all()
+        self.seed_customers(max(50, self.orders // 40))
+        self.seed_orders()
+        self.seed_expenses(max(100, self.orders // 20))
+        self.reset_sequences()
+    
+    def new_id(self, model):
+        value = self.next_ids[model]
+        self.next_ids[model] = value + 1
+        return value
+    
+    def number(self, prefix, when):
+        """Next ``PREFIXyymmNNNN`` number for the month of ``when``."""
+        key = f"{prefix}{when.strftime('%y%m')}"
+        value = self.sequences.get(key, 0) + 1
+        self.sequences[key] = value
+        return f"{key}{str(value).zfill(4)}"
+    
+    def add(self, model, **row):
+        row['id'] = self.new_id(model)
+        self.rows[model].append(row)
+        return row['id']
+    
+    def flush(self):
+        for model in self.TABLES:
+            rows = self.rows[model]
+            if rows:
+                db.session.execute(model.__table__.insert(), rows)
+                rows.clear()
+        db.session.commit()
+    
+    def seed_customers(self, count):
+        print(f"Generating {count} customers...")
+        rng = self.rng
+        first_id = self.next_ids[Customer]
+        for i in range(count):
+            city = rng.choice(CITIES)
+            self.add(
+                Customer,
+                company_name=f"{city} {rng.choice(BUSINESS_WORDS)} {i + 1}",
+                contact_person=f"Contact {i + 1}",
+                email=f"customer{first_id + i}@example.com",
+                phone=f"01{rng.randint(300000000, 999999999)}",
+                address=f"{rng.randint(1, 300)} Main Road, {city}",
+                city=city,
+                district=city,
+                category=rng.choices(['regular', 'corporate', 'agency'], weights=[60, 25, 15])[0],
+                credit_limit=rng.choice([10000, 20000, 30000, 50000, 100000]),
+                outstanding_balance=0,
+                is_active=rng.random() > 0.05,
+                created_at=self.now - timedelta(days=rng.randint(0, 3650))
+            )
+            if len(self.rows[Customer]) >= self.batch_size:
+                self.flush()
+        self.flush()
+        
+        # A few customers place most of the orders
+        self.customer_ids = list(range(first_id, first_id + count))
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(count)]
+        self.customer_weights = list(accumulate(weights))
+    
+    def months(self):
+        """(start, end, order count) per month, oldest first, ending now."""
+        total = self.orders
+        count = max(12, -(-total // MAX_ORDERS_PER_MONTH))
+        start = self.now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        starts = [start]
+        for _ in range(count - 1):
+            start = (start - timedelta(days=1)).replace(day=1)
+            starts.append(start)
+        starts.reverse()
+        self.start = starts[0]
+        ends = starts[1:] + [self.now]
+        for index, (month_start, month_end) in enumerate(zip(starts, ends)):
+            orders = (index + 1) * total // count - index * total // count
+            yield month_start, month_end, orders
+    
+    def seed_orders(self):
+        print(f"Generating {self.orders} orders in batches of {self.batch_size}...")
+        rng = self.rng
+        done = 0
+        for month_start, month_end, count in self.months():
+            span = (month_end - month_start).total_seconds()
+            customers = rng.choices(self.customer_ids, cum_weights=self.customer_weights, k=count)
+            for k in range(count):
+                order_date = month_start + timedelta(seconds=span * (k + rng.random()) / count)
+                self.add_order(order_date, customers[k])
+                done += 1
+                if len(self.rows[Order]) >= self.batch_size:
+                    self.flush()
+                    print(f"  {done}/{self.orders} orders")
+        self.flush()
+    
+    def add_order(self, order_date, customer_id):
+        rng = self.rng
+        created_by = rng.choice(self.user_ids)
+        age_days = (self.now - order_date).days
+        # Old orders have finished; recent ones are spread over the workflow
+        if age_days > 30:
+            stage = len(STAGES) - 1
+        else:
+            stage = min(len(STAGES) - 1, int(age_days / 30 * len(STAGES) + rng.random() * 2))
+        cancelled = rng.random() < 0.04
+        status = 'cancelled' if cancelled else STAGES[stage]
+        
+        order_id = self.new_id(Order)
+        subtotal = 0
+        for _ in range(rng.choices([1, 2, 3, 4], weights=[50, 30, 15, 5])[0]):
+            quantity = rng.choice([100, 250, 500, 1000, 2000, 5000, 10000])
+            unit_price = rng.choice([2, 3, 5, 8, 10, 15, 20, 25])
+            subtotal += quantity * unit_price
+            self.add(
+                OrderItem,
+                order_id=order_id,
+                product_name=rng.choice(WORK_NAMES),
+                quantity=quantity,
+                size=rng.choice(SIZES),
+                color=rng.choice(COLORS),
+                material_type=rng.choice(['art_paper', 'bond_paper', 'glossy', 'matte', 'pvc']),
+                unit_price=unit_price,
+                total_price=quantity * unit_price,
+                plate=rng.randint(200, 800),
+                paper=rng.randint(500, 3000),
+                ink=rng.randint(100, 500),
+                printing=rng.randint(200, 1000),
+                binding=rng.randint(0, 1000) if rng.random() > 0.5 else 0,
+                laminating=rng.randint(0, 800) if rng.random() > 0.6 else 0,
+                specifications={}
+            )
+        
+        design_fee = rng.choice([500, 1000, 1500, 2000]) if rng.random() > 0.5 else 0
+        urgency_fee = rng.choice([500, 1000, 2000]) if rng.random() > 0.8 else 0
+        discount = rng.choice([100, 200, 500]) if rng.random() > 0.7 else 0
+        total = subtotal + design_fee + urgency_fee - discount
+        
+        changed_at = order_date
+        for step in STAGES[:stage + 1]:
+            self.add(
+                OrderStatusHistory,
+                order_id=order_id,
+                status=step,
+                notes='Order created' if step == 'order' else None,
+                changed_by=created_by,
+                changed_at=changed_at
+            )
+            changed_at += timedelta(hours=rng.randint(2, 48))
+        if cancelled:
+            self.add(
+                OrderStatusHistory,
+                order_id=order_id,
+                status='cancelled',
+                notes=None,
+                changed_by=created_by,
+                changed_at=changed_at
+            )
+        
+        paid = 0
+        if not cancelled:
+            roll = rng.random()
+            if (status == 'delivered' and roll < 0.9) or roll < 0.2:
+                paid = total
+            elif roll < 0.7:
+                paid = round(total * rng.choice([0.25, 0.5, 0.75]))
+        if paid:
+            # Some fully paid orders were settled in one payment, the rest as advance + balance
+            advance = paid if paid < total or rng.random() < 0.5 else round(total * 0.5)
+            self.add_payment(order_id, advance, 'advance' if advance < total else 'full', order_date, created_by)
+            if advance < paid:
+                self.add_payment(order_id, paid - advance, 'full', changed_at, created_by)
+        
+        if self.inventory and rng.random() < 0.3:
+            item_id, unit_cost = rng.choice(self.inventory)
+            quantity = rng.randint(1, 20)
+            self.add(
+                InventoryTransaction,
+                item_id=item_id,
+                transaction_type='stock_out',
+                quantity=quantity,
+                reference_type='order',
+                reference_id=order_id,
+                unit_cost=unit_cost,
+                total_cost=(unit_cost or 0) * quantity,
+                created_by=created_by,
+                created_at=order_date
+            )
+        
+        self.rows[Order].append({
+            'id': order_id,
+            'order_number': self.number('SAP', order_date),
+            'customer_id': customer_id,
+            'order_type': 'pre_order' if rng.random() < 0.1 else 'regular_order',
+            'status': status,
+            'work_name': rng.choice(WORK_NAMES),
+            'order_date': order_date,
+            'expected_delivery_date': order_date + timedelta(days=rng.randint(3, 15)),
+            'actual_delivery_date': changed_at if status == 'delivered' else None,
+            'subtotal': subtotal,
+            'discount': discount,
+            'tax_amount': 0,
+            'design_fee': design_fee,
+            'urgency_fee': urgency_fee,
+            'cashing_fee': 0,
+            'misc_fee': 0,
+            'total_amount': total,
+            'paid_amount': paid,
+            'due_amount': total - paid,
+            'payment_status': 'paid' if paid >= total else 'partial' if paid else 'pending',
+            'created_by': created_by,
+            'created_at': order_date,
+            'updated_at': changed_at
+        })
+    
+    def add_payment(self, order_id, amount, payment_type, when, received_by):
+        when = min(when, self.now)
+        self.add(
+            Payment,
+            payment_number=self.number('PAY', when),
+            order_id=order_id,
+            amount=amount,
+            payment_type=payment_type,
+            payment_method=self.rng.choices(PAYMENT_METHODS, weights=[50, 25, 20, 4, 1])[0],
+            payment_date=when,
+            received_by=received_by,
+            created_at=when
+        )
+    
+    def seed_expenses(self, count):
+        print(f"Generating {count} expenses...")
+        rng = self.rng
+        history = (self.now - self.start).total_seconds()
+        dates = sorted(self.now - timedelta(seconds=rng.random() * history) for _ in range(count))
+        for when in dates:
+            category = rng.choice(EXPENSE_CATEGORIES)
+            self.add(
+                Expense,
+                expense_number=self.number('EXP', when),
+                category=category,
+                description=f"{category.replace('_', ' ').title()} expense",
+                amount=rng.choice([500, 1000, 2500, 5000, 10000, 25000]),
+                payment_method=rng.choice(['cash', 'bank_transfer', 'mobile_banking']),
+                expense_date=when,
+                created_by=rng.choice(self.user_ids),
+                created_at=when
+            )
+            if len(self.rows[Expense]) >= self.batch_size:
+                self.flush()
+        self.flush()
+    
+    def reset_sequences(self):
+        """Move PostgreSQL id sequences past the ids assigned here."""
+        if db.engine.dialect.name != 'postgresql':
+            return
+        for model in self.TABLES:
+            table = model.__tablename__
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            ))
+        db.session.commit()
+
+def seed_scaled(orders, batch_size=5000, random_seed=None):
+    """Load reference data, then generate ``orders`` orders with their history."""
+    if Order.query.first() is not None:
+        print("Orders already exist. Scaled seeding needs an empty orders table.")
+        return False
+    
+    seed_users()
+    seed_inventory()
+    seed_equipment()
+    started = datetime.now()
+    ScaledSeeder(orders, batch_size, random_seed).run()
+    print(f"Generated {orders} orders in {(datetime.now() - started).total_seconds():.0f}s")
+    return True
+
 def check_if_seeded():
     """Check if the database has been seeded (has more than just admin user)"""
     user_count = User.query.count()
@@ -0,0 +1,143 @@
+from decimal import Decimal
+from operator import attrgetter
+from flask import request
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class Field:
+    """Copies an attribute as-is. ``attr`` defaults to the output name."""
+    
+    def __init__(self, attr=None):
+        self.attr = attr
+    
+    def compile(self, name):
+        return attrgetter(self.attr or name)
+
+class Money(Field):
+    """Numeric column rendered as a float, with NULL and zero both as 0."""
+    
+    def compile(self, name):
+        get = attrgetter(self.attr or name)
+        def money(obj):
+            value = get(obj)
+            return float(value) if value else 0
+        return money
+
+class DateTime(Field):
+    def compile(self, name):
+        get = attrgetter(self.attr or name)
+        def iso(obj):
+            value = get(obj)
+            return value.isoformat() if value else None
+        return iso
+
+class Label(Field):
+    """Looks the attribute up in ``labels``, falling back to the raw value."""
+    
+    def __init__(self, attr, labels):
+        super().__init__(attr)
+        self.labels = labels
+    
+    def compile(self, name):
+        get = attrgetter(self.attr)
+        labels = self.labels
+        def label(obj):
+            value = get(obj)
+            return labels.get(value, value)
+        return label
+
+class Nested(Field):
+    """Related object (or list of objects with ``many``) rendered with its own to_dict()."""
+    
+    def __init__(self, attr=None, many=False):
+        super().__init__(attr)
+        self.many = many
+    
+    def compile(self, name):
+        get = attrgetter(self.attr or name)
+        if self.many:
+            return lambda obj: [child.to_dict() for child in get(obj)]
+        def nested(obj):
+            value = get(obj)
+            return value.to_dict() if value is not None else None
+        return nested
+
+class Method(Field):
+    """Computed value: ``func(obj)``."""
+    
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+    
+    def compile(self, name):
+        return self.func
+
+class Schema:
+    """Ordered field specs compiled to (name, getter) pairs once per field subset."""
+    
+    # Field subsets come from query strings, so only this many are kept compiled
+    MAX_PLANS = 64
+    
+    def __init__(self, **fields):
+        self.fields = fields
+        self._compiled = {}
+    
+    def compile(self, only=None):
+        plan = self._compiled.get(only)
+        if plan is None:
+            plan = tuple(
+                (name, field.compile(name))
+                for name, field in self.fields.items()
+                if only is None or name in only
+            )
+            if len(self._compiled) < self.MAX_PLANS:
+                self._compiled[only] = plan
+        return plan
+    
+    def dump(self, obj, only=None):
+        return {name: get(obj) for name, get in self.compile(only)}
+    
+    def dump_many(self, objs, only=None):
+        plan = self.compile(only)
+        return [{name: get(obj) for name, get in plan} for obj in objs]
+
+def requested_fields():
+    """The ``?fields=a,b`` sparse fieldset of the current request, or None for all fields."""
+    value = request.args.get('fields')
+    if not value:
+        return None
+    return frozenset(name.strip() for name in value.split(',') if name.strip())
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+class OrjsonProvider(JSONProvider):
+    """Encodes responses with orjson; Decimal becomes a float and datetimes ISO 8601."""
+    
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.options).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.options),
+            mimetype='application/json'
+        )
+
+def init_json(app):
+    """Use orjson for request and response bodies when it is installed."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
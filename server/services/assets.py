@@ -0,0 +1,104 @@
+import mimetypes
+import os
+import re
+from flask import current_app, request
+from werkzeug.http import http_date, parse_accept_header
+from werkzeug.wsgi import wrap_file
+
+# Vite writes build output as assets/[name]-[hash].[ext] with an 8-character hash; those
+# never change content. Files copied from public/ keep their names and can be replaced.
+HASHED_ASSET = re.compile(r'^assets/(?:[^/]+/)*[^/]+-[A-Za-z0-9_-]{8}\.[a-z0-9]+$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE = 'public, max-age=3600'
+INDEX_CACHE = 'no-cache'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+class Asset:
+    __slots__ = ('path', 'size', 'mtime', 'etag', 'mimetype', 'cache_control', 'variants')
+    
+    def __init__(self, path, size, mtime, mimetype, cache_control):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.etag = f'{int(mtime):x}-{size:x}'
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        # {encoding: (path, size)} for precompressed siblings
+        self.variants = {}
+
+class AssetManifest:
+    """Snapshot of the built client, taken once so requests never stat the disk."""
+    
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}
+        if os.path.isdir(root):
+            self._scan()
+    
+    def _scan(self):
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(suffixes):
+                    continue
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                st = os.stat(path)
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                if key == 'index.html':
+                    cache_control = INDEX_CACHE
+                elif HASHED_ASSET.match(key):
+                    cache_control = IMMUTABLE_CACHE
+                else:
+                    cache_control = DEFAULT_CACHE
+                asset = Asset(path, st.st_size, st.st_mtime, mimetype, cache_control)
+                for encoding, suffix in ENCODINGS:
+                    if os.path.exists(path + suffix):
+                        asset.variants[encoding] = (path + suffix, os.path.getsize(path + suffix))
+                self.assets[key] = asset
+    
+    def get(self, key):
+        return self.assets.get(key)
+
+def get_manifest():
+    manifest = current_app.extensions.get('asset_manifest')
+    if manifest is None:
+        manifest = AssetManifest(current_app.config['CLIENT_DIST_FOLDER'])
+        # Rescan while debugging or until a build exists, so `npm run build` is picked up
+        if manifest.assets and not current_app.debug:
+            current_app.extensions['asset_manifest'] = manifest
+    return manifest
+
+def send_asset(asset):
+    """Send ``asset``, preferring a precompressed variant the client accepts.
+    
+    The body is a WSGI file wrapper, which gunicorn serves with sendfile().
+    """
+    path, size, encoding = asset.path, asset.size, None
+    if asset.variants:
+        accepted = parse_accept_header(request.headers.get('Accept-Encoding'))
+        for name, _ in ENCODINGS:
+            if name in asset.variants and accepted[name]:
+                encoding = name
+                path, size = asset.variants[name]
+                break
+    
+    app = current_app
+    if app.config['USE_X_SENDFILE']:
+        response = app.response_class(mimetype=asset.mimetype)
+        response.headers['X-Sendfile'] = path
+    else:
+        response = app.response_class(
+            wrap_file(request.environ, open(path, 'rb')),
+            mimetype=asset.mimetype,
+            direct_passthrough=True
+        )
+    response.content_length = size
+    response.headers['Cache-Control'] = asset.cache_control
+    response.headers['Last-Modified'] = http_date(asset.mtime)
+    if asset.variants:
+        response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(f'{asset.etag}-{encoding}' if encoding else asset.etag)
+    return response.make_conditional(request)
@@ -0,0 +1,86 @@
+import base64
+import binascii
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from flask import current_app
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Formats that are already compressed gain nothing from gzip.
+PRECOMPRESSED_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/heic', 'image/heif'}
+
+DATA_URL_RE = re.compile(r'^data:([\w/+.-]+);base64,(.*)$', re.DOTALL)
+
+class BlobTooLarge(Exception):
+    pass
+
+class BlobStore:
+    """Compressed, content-addressed storage for proof-of-delivery artifacts."""
+    
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'tmp'), exist_ok=True)
+    
+    def path(self, key, compression):
+        suffix = '.gz' if compression == 'gzip' else ''
+        return os.path.join(self.root, key[:2], f'{key}{suffix}')
+    
+    def put(self, stream, content_type, max_size):
+        """Stream ``stream`` to disk, returning (key, size, stored_size, compression)."""
+        compression = 'none' if content_type in PRECOMPRESSED_TYPES else 'gzip'
+        digest = hashlib.sha256()
+        size = 0
+        
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'))
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                out = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) if compression == 'gzip' else raw
+                for block in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+                    size += len(block)
+                    if size > max_size:
+                        raise BlobTooLarge()
+                    digest.update(block)
+                    out.write(block)
+                if out is not raw:
+                    out.close()
+            
+            key = digest.hexdigest()
+            target = self.path(key, compression)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+            return key, size, os.path.getsize(target), compression
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def iter_content(self, key, compression):
+        """Yield the original bytes, decompressing on the fly."""
+        path = self.path(key, compression)
+        opener = gzip.open if compression == 'gzip' else open
+        with opener(path, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                yield block
+
+def decode_data_url(value):
+    """Return (content_type, bytes) for a base64 data URL, or (None, None)."""
+    match = DATA_URL_RE.match(value or '')
+    if not match:
+        return None, None
+    try:
+        return match.group(1), base64.b64decode(match.group(2), validate=True)
+    except (binascii.Error, ValueError):
+        return None, None
+
+def get_blob_store():
+    store = current_app.extensions.get('blob_store')
+    if store is None:
+        store = BlobStore(os.path.join(current_app.config['UPLOAD_FOLDER'], 'blobs'))
+        current_app.extensions['blob_store'] = store
+    return store
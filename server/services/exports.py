@@ -0,0 +1,211 @@
+import codecs
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+from flask import Response, current_app, stream_with_context
+from server.extensions import db
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Bytes gathered before a chunk is handed to the server
+CHUNK_SIZE = 64 * 1024
+
+# Rows per XLSX sheet, header included; longer exports continue on the next sheet
+XLSX_MAX_ROWS = 1048576
+
+# Text starting with these is read as a formula by spreadsheet apps; such cells get a leading '
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+_XML_ILLEGAL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+def stream_rows(statement):
+    """Rows of ``statement`` fetched in EXPORT_BATCH_SIZE batches from a server-side cursor."""
+    result = db.session.execute(
+        statement.execution_options(yield_per=current_app.config['EXPORT_BATCH_SIZE'])
+    )
+    try:
+        yield from result
+    finally:
+        result.close()
+
+class _Chunks:
+    """Write target that hands back what was written since the last ``drain()``."""
+    
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+    
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        return data
+
+def _text(value):
+    # Customer names, notes and references are user input; keep them from running as formulas
+    text = str(value)
+    return "'" + text if text.startswith(FORMULA_PREFIXES) else text
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, str):
+        return _text(value)
+    return value
+
+def iter_csv(headers, rows):
+    # The BOM makes Excel read the file as UTF-8, so Bengali text survives a double-click
+    sink = _Chunks()
+    writer = csv.writer(codecs.getwriter('utf-8')(sink))
+    sink.write(codecs.BOM_UTF8)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if sink.size >= CHUNK_SIZE:
+            yield sink.drain()
+    yield sink.drain()
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _xlsx_cell(ref, value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        return f'<c r="{ref}" s="1"><v>{(value - _EXCEL_EPOCH).total_seconds() / 86400}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{ref}" s="2"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    text = escape(_XML_ILLEGAL.sub('', _text(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+def _xlsx_package(sheets):
+    """The parts that list the sheets, written last once their number is known."""
+    ns = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for n in range(1, sheets + 1)
+    )
+    return {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'
+        ),
+        '_rels/.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/workbook.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="{ns}"><sheets>'
+            + ''.join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in range(1, sheets + 1))
+            + '</sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(
+                f'<Relationship Id="rId{n}" Type="{ns}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                for n in range(1, sheets + 1)
+            )
+            + f'<Relationship Id="rId{sheets + 1}" Type="{ns}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/styles.xml': _STYLES,
+    }
+
+def iter_xlsx(headers, rows):
+    """A minimal XLSX workbook, zipped as it is generated.
+    
+    Cells are written as inline strings, so nothing has to be kept for a
+    shared-strings table and memory stays flat however many rows there are.
+    """
+    sink = _Chunks()
+    letters = [_column_letter(i) for i in range(len(headers))]
+    header = ''.join(_xlsx_cell(f'{letter}1', name) for letter, name in zip(letters, headers))
+    sheets = 0
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        rows = iter(rows)
+        row = next(rows, None)
+        while sheets == 0 or row is not None:
+            sheets += 1
+            with archive.open(f'xl/worksheets/sheet{sheets}.xml', 'w') as sheet:
+                sheet.write(f'{_SHEET_START}<row r="1">{header}</row>'.encode())
+                number = 1
+                while row is not None and number < XLSX_MAX_ROWS:
+                    number += 1
+                    cells = ''.join(
+                        _xlsx_cell(f'{letter}{number}', value) for letter, value in zip(letters, row)
+                    )
+                    sheet.write(f'<row r="{number}">{cells}</row>'.encode())
+                    if sink.size >= CHUNK_SIZE:
+                        yield sink.drain()
+                    row = next(rows, None)
+                sheet.write(_SHEET_END.encode())
+        for name, content in _xlsx_package(sheets).items():
+            archive.writestr(name, content)
+    yield sink.drain()
+
+WRITERS = {'csv': iter_csv, 'xlsx': iter_xlsx}
+
+def export_response(statement, headers, filename, fmt):
+    """Stream the rows of ``statement`` as a CSV or XLSX download without loading them all."""
+    body = WRITERS[fmt](headers, stream_rows(statement))
+    return Response(stream_with_context(body), content_type=FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{filename}.{fmt}"',
+        'X-Accel-Buffering': 'no'
+    })
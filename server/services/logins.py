@@ -0,0 +1,186 @@
+import atexit
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+from server.extensions import db
+from server.models import User
+
+class LoginBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+class Throttle:
+    """Sliding-window failure counter keyed by account or client address.
+    
+    Counts are kept per worker process, so with N workers a client can make
+    up to N times ``limit`` attempts before every worker refuses it.
+    """
+    
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._failures = {}
+    
+    def retry_after(self, key):
+        """Seconds until ``key`` may try again, or 0 if it is not throttled."""
+        with self._lock:
+            failures = self._prune(key)
+            if failures is None or len(failures) < self.limit:
+                return 0
+            return int(failures[0] + self.window - time.monotonic()) + 1
+    
+    def record(self, key):
+        with self._lock:
+            failures = self._prune(key)
+            if failures is None:
+                failures = self._failures[key] = deque()
+                if len(self._failures) > 10000:
+                    for stale in [k for k in self._failures if k != key and not self._prune(k)]:
+                        del self._failures[stale]
+            failures.append(time.monotonic())
+    
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+    
+    def _prune(self, key):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        cutoff = time.monotonic() - self.window
+        while failures and failures[0] <= cutoff:
+            failures.popleft()
+        return failures
+
+class PasswordHasher:
+    """Caps how many password checks a worker process runs at once.
+    
+    Hashing is CPU-bound. The check runs on the request's own thread, which
+    waits for one of LOGIN_HASH_WORKERS slots; at most LOGIN_HASH_QUEUE more
+    logins may wait, and the rest get LoginBusy at once. This bounds the CPU
+    a burst of logins takes and how many threads it ties up, but a waiting
+    login still holds its thread.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = None
+        self._admitted = None
+    
+    def _start(self, config):
+        with self._lock:
+            if self._running is None:
+                workers = config['LOGIN_HASH_WORKERS']
+                self._admitted = threading.BoundedSemaphore(workers + config['LOGIN_HASH_QUEUE'])
+                self._running = threading.BoundedSemaphore(workers)
+    
+    def verify(self, password_hash, password, method):
+        """Return (valid, new_hash); ``new_hash`` is set when the stored hash is outdated.
+        
+        Raises LoginBusy when the queue is full, TimeoutError when no slot
+        frees up within LOGIN_HASH_TIMEOUT.
+        """
+        config = current_app.config
+        if self._running is None:
+            self._start(config)
+        if not self._admitted.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            if not self._running.acquire(timeout=config['LOGIN_HASH_TIMEOUT']):
+                raise TimeoutError()
+            try:
+                return _check_and_upgrade(password_hash, password, method)
+            finally:
+                self._running.release()
+        finally:
+            self._admitted.release()
+
+@lru_cache(maxsize=None)
+def hash_prefix(method):
+    """The ``method:params`` prefix werkzeug writes for ``method`` with its current defaults."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+# Checked against when the username is unknown so failures take the same time
+_DUMMY_HASHES = {}
+
+def _check_and_upgrade(password_hash, password, method):
+    if password_hash is None:
+        password_hash = _DUMMY_HASHES.get(method)
+        if password_hash is None:
+            password_hash = _DUMMY_HASHES[method] = generate_password_hash('', method=method)
+        check_password_hash(password_hash, password)
+        return False, None
+    
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if password_hash.split('$', 1)[0] != hash_prefix(method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+class LastLoginBuffer:
+    """Collects last_login timestamps and writes them in one batched UPDATE."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+        self._app = None
+    
+    def record(self, app, user_id, timestamp):
+        with self._lock:
+            self._pending[user_id] = timestamp
+            if self._app is None:
+                self._app = app
+                atexit.register(self.flush)
+            if len(self._pending) >= app.config['LAST_LOGIN_BATCH_SIZE']:
+                flush_now = True
+            else:
+                flush_now = False
+                if self._timer is None:
+                    self._timer = threading.Timer(app.config['LAST_LOGIN_FLUSH_INTERVAL'], self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if flush_now:
+            self.flush()
+    
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending or self._app is None:
+            return 0
+        
+        with self._app.app_context():
+            try:
+                db.session.execute(
+                    db.update(User),
+                    [{'id': user_id, 'last_login': timestamp} for user_id, timestamp in pending.items()]
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self._app.logger.exception('Failed to write last_login for %d users', len(pending))
+            finally:
+                db.session.remove()
+        return len(pending)
+
+hasher = PasswordHasher()
+last_logins = LastLoginBuffer()
+
+def get_throttles():
+    """Return the (per-account, per-address) login throttles for this app."""
+    throttles = current_app.extensions.get('login_throttles')
+    if throttles is None:
+        config = current_app.config
+        window = config['LOGIN_THROTTLE_WINDOW']
+        throttles = (
+            Throttle(config['LOGIN_MAX_FAILURES_PER_ACCOUNT'], window),
+            Throttle(config['LOGIN_MAX_FAILURES_PER_IP'], window)
+        )
+        current_app.extensions['login_throttles'] = throttles
+    return throttles
@@ -0,0 +1,244 @@
+import bisect
+import hmac
+import ipaddress
+import json
+import os
+import threading
+import time
+from flask import current_app, g, request
+from server.extensions import db
+
+# Request latency buckets in seconds; the last, implicit bucket is +Inf
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# name: (type, help)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by route and status'),
+    'http_request_errors_total': ('counter', 'Requests that ended with a 5xx response'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by route'),
+    'db_pool_size': ('gauge', 'Connections the SQLAlchemy pools keep open'),
+    'db_pool_checked_out': ('gauge', 'Connections currently in use by requests'),
+    'db_pool_overflow': ('gauge', 'Connections open beyond pool_size'),
+    'orders_created_total': ('counter', 'Orders created'),
+    'payments_posted_total': ('counter', 'Payments recorded'),
+    'payments_posted_amount_total': ('counter', 'Sum of recorded payment amounts'),
+}
+
+ARCHIVE = 'archive.json'
+
+class Registry:
+    """Counters and histograms for this process.
+    
+    Each request takes the lock once to update its counters, and no I/O
+    happens under it. When METRICS_DIR is set the totals are written there
+    every METRICS_FLUSH_INTERVAL seconds so any worker can report the sum.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._next_flush = 0
+        self.counters = {}
+        self.histograms = {}
+    
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def observe_request(self, method, endpoint, status, seconds):
+        labels = (('endpoint', endpoint), ('method', method))
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        counters = self.counters
+        with self._lock:
+            key = ('http_requests_total', labels + (('status', str(status)),))
+            counters[key] = counters.get(key, 0) + 1
+            if status >= 500:
+                key = ('http_request_errors_total', labels)
+                counters[key] = counters.get(key, 0) + 1
+            key = ('http_request_duration_seconds', labels)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts (not cumulative), then the sum of observations
+                histogram = self.histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram[bucket] += 1
+            histogram[-1] += seconds
+    
+    def snapshot(self):
+        gauges = pool_gauges()
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {key: list(values) for key, values in self.histograms.items()},
+                'gauges': gauges
+            }
+    
+    def flush(self, directory):
+        """Write this process's totals to ``directory``; returns the snapshot written."""
+        snapshot = self.snapshot()
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(_encode(snapshot), f)
+        os.replace(path + '.tmp', path)
+        return snapshot
+    
+    def flush_if_due(self, directory, interval):
+        now = time.monotonic()
+        if now < self._next_flush or not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_flush = now + interval
+            os.makedirs(directory, exist_ok=True)
+            self.flush(directory)
+        except OSError:
+            current_app.logger.exception('Failed to write metrics to %s', directory)
+        finally:
+            self._flush_lock.release()
+
+registry = Registry()
+
+def inc(name, amount=1, **labels):
+    registry.inc(name, amount, **labels)
+
+def pool_gauges():
+    pool = db.engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {}
+    return {
+        ('db_pool_size', ()): pool.size(),
+        ('db_pool_checked_out', ()): pool.checkedout(),
+        ('db_pool_overflow', ()): max(0, pool.overflow())
+    }
+
+def _encode(snapshot):
+    return {
+        kind: [[name, [list(pair) for pair in labels], value] for (name, labels), value in values.items()]
+        for kind, values in snapshot.items()
+    }
+
+def _load(path):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return {
+        kind: {(name, tuple(tuple(pair) for pair in labels)): value for name, labels, value in values}
+        for kind, values in data.items()
+    }
+
+def _merge(total, snapshot, gauges=True):
+    for key, value in snapshot.get('counters', {}).items():
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for key, values in snapshot.get('histograms', {}).items():
+        current = total['histograms'].get(key)
+        total['histograms'][key] = values if current is None else [a + b for a, b in zip(current, values)]
+    if gauges:
+        for key, value in snapshot.get('gauges', {}).items():
+            total['gauges'][key] = total['gauges'].get(key, 0) + value
+    return total
+
+def collect():
+    """Totals for this process, or for every worker sharing METRICS_DIR."""
+    directory = current_app.config['METRICS_DIR']
+    if not directory:
+        return registry.snapshot()
+    
+    os.makedirs(directory, exist_ok=True)
+    own = registry.flush(directory)
+    total = _merge({'counters': {}, 'histograms': {}, 'gauges': {}}, own)
+    own_name = f'{os.getpid()}.json'
+    for name in os.listdir(directory):
+        if name.endswith('.json') and name != own_name:
+            snapshot = _load(os.path.join(directory, name))
+            if snapshot:
+                total = _merge(total, snapshot)
+    return total
+
+def mark_process_dead(directory, pid):
+    """Fold an exited worker's counters into the archive so totals never go backwards.
+    
+    Called from the gunicorn master, which is the only writer of the archive.
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    snapshot = _load(path)
+    if snapshot is None:
+        return
+    archive_path = os.path.join(directory, ARCHIVE)
+    archive = _merge(_load(archive_path) or {'counters': {}, 'histograms': {}}, snapshot, gauges=False)
+    with open(archive_path + '.tmp', 'w') as f:
+        json.dump(_encode(archive), f)
+    os.replace(archive_path + '.tmp', archive_path)
+    os.remove(path)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def render(total):
+    """Prometheus text exposition format (version 0.0.4)."""
+    series = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for (name, labels), value in total[kind].items():
+            series.setdefault(name, []).append((labels, value))
+    
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(series.get(name, ())):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {value[-1]}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+
+def _finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        registry.observe_request(
+            request.method, request.endpoint or 'unmatched',
+            response.status_code, time.perf_counter() - started
+        )
+        config = current_app.config
+        if config['METRICS_DIR']:
+            registry.flush_if_due(config['METRICS_DIR'], config['METRICS_FLUSH_INTERVAL'])
+    return response
+
+def _is_local_request():
+    # A proxy on the same host connects from loopback too, but it adds X-Forwarded-For
+    if request.headers.get('X-Forwarded-For'):
+        return False
+    try:
+        return ipaddress.ip_address(request.remote_addr or '').is_loopback
+    except ValueError:
+        return False
+
+def metrics_view():
+    config = current_app.config
+    token = config['METRICS_TOKEN']
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return current_app.response_class('Unauthorized\n', status=401, mimetype='text/plain')
+    elif not config['METRICS_PUBLIC'] and not _is_local_request():
+        return current_app.response_class('Forbidden\n', status=403, mimetype='text/plain')
+    return current_app.response_class(render(collect()), mimetype='text/plain; version=0.0.4')
+
+def init_metrics(app):
+    """Record request metrics and serve them at /metrics."""
+    if app.config['METRICS_ENABLED']:
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        app.add_url_rule('/metrics', 'metrics', metrics_view)
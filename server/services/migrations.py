@@ -0,0 +1,282 @@
+import fcntl
+import io
+import logging
+import mimetypes
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import DateTime, func, insert, inspect, literal, select, text, update
+from sqlalchemy.schema import AddConstraint, CreateColumn
+from server.extensions import db
+
+# Versioned schema and data changes for databases created by an older release.
+#
+# `db.create_all()` creates missing tables but never touches ones that exist,
+# so columns and indexes added to existing models are applied here. Each step
+# checks what is already present before changing anything: a fresh database
+# gets every column from create_all and the steps find nothing to do.
+
+def add_column(conn, model, name):
+    """ALTER TABLE ... ADD COLUMN for ``model.name`` unless the table already has it."""
+    table = model.__table__
+    if name in {c['name'] for c in inspect(conn).get_columns(table.name)}:
+        return False
+    column = table.c[name]
+    ddl = str(CreateColumn(column).compile(dialect=conn.dialect))
+    for fk in column.foreign_keys:
+        ddl += f' REFERENCES {fk.column.table.name} ({fk.column.name})'
+    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+    return True
+
+logger = logging.getLogger(__name__)
+
+def add_table(conn, model):
+    """CREATE TABLE for ``model`` unless it exists, for tables added after a database's last bootstrap."""
+    model.__table__.create(conn, checkfirst=True)
+
+def add_index(conn, model, name):
+    """CREATE INDEX for the index ``name`` declared on ``model`` unless it exists."""
+    index = next(i for i in model.__table__.indexes if i.name == name)
+    index.create(conn, checkfirst=True)
+
+def add_foreign_keys(conn, model):
+    """ALTER TABLE ... ADD CONSTRAINT for foreign keys on ``model`` the table lacks.
+    
+    SQLite cannot add constraints to an existing table; there the columns keep
+    whatever add_column or create_all gave them.
+    """
+    if conn.dialect.name == 'sqlite':
+        return
+    table = model.__table__
+    # Compared by column: one added by add_column has a name the database chose
+    existing = {tuple(fk['constrained_columns']) for fk in inspect(conn).get_foreign_keys(table.name)}
+    for constraint in table.foreign_key_constraints:
+        if tuple(constraint.column_keys) not in existing:
+            conn.execute(AddConstraint(constraint))
+
+def _columns_and_indexes(conn):
+    """Columns and indexes added by uploads, workload, route planning, artifacts, digests and the task board."""
+    from server.models import Customer, Delivery, DesignProof, DesignTask, EmployeeTask, Notification
+    
+    add_column(conn, Customer, 'latitude')
+    add_column(conn, Customer, 'longitude')
+    add_column(conn, Delivery, 'route_sequence')
+    add_column(conn, Delivery, 'signature_artifact_id')
+    add_column(conn, Delivery, 'photo_artifact_id')
+    add_column(conn, DesignTask, 'workload_weight')
+    add_column(conn, DesignProof, 'file_hash')
+    add_column(conn, DesignProof, 'file_size')
+    add_column(conn, DesignProof, 'content_type')
+    add_column(conn, Notification, 'digest_key')
+    if add_column(conn, Notification, 'occurrences'):
+        conn.execute(text('UPDATE notifications SET occurrences = 1'))
+    
+    add_index(conn, DesignProof, 'ix_design_proofs_task_version')
+    add_index(conn, Notification, 'ix_notifications_user_read_created')
+    add_index(conn, Notification, 'ix_notifications_user_digest')
+    add_index(conn, EmployeeTask, 'ix_employee_tasks_assignee_status')
+    add_index(conn, EmployeeTask, 'ix_employee_tasks_due_date')
+
+def _legacy_artifact(kind, value):
+    """(content_type, stream) for a pre-artifact signature or photo column value, or None."""
+    from server.services.blobs import decode_data_url
+    if kind == 'signature':
+        content_type, payload = decode_data_url(value)
+        if payload is None:
+            # Not a data URL: keep whatever was written, as text
+            return 'text/plain', io.BytesIO(value.encode())
+        return content_type, io.BytesIO(payload)
+    path = value if os.path.isabs(value) else os.path.join(current_app.config['UPLOAD_FOLDER'], value)
+    if not os.path.isfile(path):
+        return None
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream', open(path, 'rb')
+
+def _delivery_artifacts(conn):
+    """Move recipient_signature and delivery_photo values into delivery artifacts.
+    
+    The old columns stay in the table, unmapped, so a value that cannot be
+    converted (a photo whose file is gone) is still there to recover by hand.
+    """
+    from server.models import Delivery, DeliveryArtifact
+    from server.services.blobs import get_blob_store
+    
+    add_foreign_keys(conn, Delivery)
+    
+    columns = {c['name'] for c in inspect(conn).get_columns('deliveries')}
+    legacy = [(kind, column) for kind, column in (('signature', 'recipient_signature'), ('photo', 'delivery_photo'))
+              if column in columns]
+    store = get_blob_store()
+    artifacts = DeliveryArtifact.__table__
+    for kind, column in legacy:
+        rows = conn.execute(text(
+            f"SELECT id, {column}, actual_delivery_date FROM deliveries "
+            f"WHERE {column} IS NOT NULL AND {column} != '' AND {kind}_artifact_id IS NULL"
+        ).columns(actual_delivery_date=DateTime)).all()
+        for delivery_id, value, delivered_at in rows:
+            found = _legacy_artifact(kind, value)
+            if found is None:
+                logger.warning('Delivery %s: %s file %r not found, left in %s', delivery_id, kind, value, column)
+                continue
+            content_type, stream = found
+            with stream:
+                key, size, stored_size, compression = store.put(stream, content_type, float('inf'))
+            artifact_id = conn.execute(artifacts.insert().values(
+                delivery_id=delivery_id,
+                kind=kind,
+                storage_key=key,
+                compression=compression,
+                content_type=content_type,
+                size=size,
+                stored_size=stored_size,
+                created_at=delivered_at or datetime.utcnow()
+            )).inserted_primary_key[0]
+            conn.execute(
+                text(f'UPDATE deliveries SET {kind}_artifact_id = :artifact_id WHERE id = :id'),
+                {'artifact_id': artifact_id, 'id': delivery_id}
+            )
+
+# Read access Management gained when every route started checking its module
+MANAGEMENT_GRANTS = {'design': 'view', 'production': 'view', 'delivery': 'view', 'finance': 'view', 'notifications': True}
+
+def _management_grants(conn):
+    """Give an existing Management role the grants init_roles gives a new one.
+    
+    Modules the role already has an entry for, set by an admin, are left alone.
+    """
+    from server.models import Role
+    roles = Role.__table__
+    row = conn.execute(roles.select().where(roles.c.name == 'Management')).first()
+    if row is None:
+        return
+    permissions = dict(row.permissions or {})
+    missing = {module: level for module, level in MANAGEMENT_GRANTS.items() if module not in permissions}
+    if missing:
+        conn.execute(roles.update().where(roles.c.id == row.id).values(permissions={**permissions, **missing}))
+
+def _principal_invalidations(conn):
+    from server.models import PrincipalInvalidation
+    add_table(conn, PrincipalInvalidation)
+
+def _notification_counters(conn):
+    """Give every user without an unread counter one, counted from their notifications."""
+    from server.models import Notification, NotificationCounter, User
+    add_table(conn, NotificationCounter)
+    unread = (
+        select(func.count(Notification.id))
+        .where(Notification.user_id == User.id, Notification.is_read == False)
+        .scalar_subquery()
+    )
+    missing = select(User.id, unread, literal(datetime.utcnow())).where(
+        ~select(NotificationCounter.user_id).where(NotificationCounter.user_id == User.id).exists()
+    )
+    conn.execute(insert(NotificationCounter).from_select(['user_id', 'unread_count', 'updated_at'], missing))
+
+def _notification_purge_index(conn):
+    from server.models import Notification
+    add_index(conn, Notification, 'ix_notifications_read_created')
+
+def _designer_workloads(conn):
+    """Give every designer a workload row and count open tasks no row has counted yet."""
+    from server.models import DesignTask, DesignerWorkload
+    from server.services.workload import OPEN_STATUSES, OPEN_TASK_WEIGHT, REVISION_WEIGHT, add_designer_rows, task_pressure
+    add_table(conn, DesignerWorkload)
+    add_designer_rows(conn)
+    
+    # Tasks opened before workload tracking have no weight and are in no row's totals
+    now = datetime.utcnow()
+    tasks = conn.execute(
+        select(DesignTask.id, DesignTask.designer_id, DesignTask.priority, DesignTask.deadline, DesignTask.revision_count)
+        .where(DesignTask.designer_id.isnot(None), DesignTask.status.in_(OPEN_STATUSES), DesignTask.workload_weight.is_(None))
+    ).all()
+    totals = {}
+    for task in tasks:
+        weight = task_pressure(task, now)
+        conn.execute(update(DesignTask).where(DesignTask.id == task.id).values(workload_weight=weight))
+        row = totals.setdefault(task.designer_id, [0, 0, 0.0])
+        row[0] += 1
+        row[1] += task.revision_count or 0
+        row[2] += weight
+    workloads = DesignerWorkload.__table__
+    for designer_id, (count, revisions, pressure) in totals.items():
+        score = count * OPEN_TASK_WEIGHT + revisions * REVISION_WEIGHT + pressure
+        updated = conn.execute(update(workloads).where(workloads.c.designer_id == designer_id).values(
+            open_tasks=workloads.c.open_tasks + count,
+            revision_load=workloads.c.revision_load + revisions,
+            deadline_pressure=workloads.c.deadline_pressure + pressure,
+            load_score=workloads.c.load_score + score,
+            updated_at=now
+        )).rowcount
+        if not updated:
+            # Assigned to someone who is not a designer
+            conn.execute(workloads.insert().values(
+                designer_id=designer_id, open_tasks=count, revision_load=revisions,
+                deadline_pressure=pressure, load_score=score, updated_at=now
+            ))
+
+def _designer_workload_rows(conn):
+    """Drop the empty workload rows version 8 gave users who are not designers."""
+    from server.models import DesignerWorkload, User
+    from server.services.workload import add_designer_rows, is_designer
+    workloads = DesignerWorkload.__table__
+    conn.execute(workloads.delete().where(
+        workloads.c.open_tasks == 0,
+        workloads.c.designer_id.notin_(select(User.id).where(is_designer()))
+    ))
+    add_designer_rows(conn)
+
+# (version, step), in order; the last version is SCHEMA_VERSION
+MIGRATIONS = [
+    (2, _columns_and_indexes),
+    (3, _delivery_artifacts),
+    (4, _management_grants),
+    (5, _principal_invalidations),
+    (6, _notification_counters),
+    (7, _notification_purge_index),
+    (8, _designer_workloads),
+    (9, _designer_workload_rows),
+]
+
+# Any constant will do, as long as every instance uses the same one
+BOOTSTRAP_LOCK_KEY = 0x5A9A6800
+
+@contextmanager
+def bootstrap_lock():
+    """Hold a lock that keeps two instances from bootstrapping the database at once.
+    
+    Postgres takes a transaction-scoped advisory lock on a connection of its
+    own, released when the block ends or the process dies. SQLite locks a file
+    beside the database instead: BEGIN IMMEDIATE would take the write lock the
+    migrations themselves need on their own connections.
+    """
+    engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': BOOTSTRAP_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.rollback()
+    elif engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+        with open(f'{engine.url.database}.bootstrap-lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+    else:
+        yield
+
+def pending(current):
+    return [(version, step) for version, step in MIGRATIONS if version > current]
+
+def migrate(current):
+    """Run the steps newer than ``current``, each in its own transaction with its version row.
+    
+    Returns the versions applied.
+    """
+    from server.models import SchemaVersion
+    applied = []
+    for version, step in pending(current):
+        with db.engine.begin() as conn:
+            step(conn)
+            conn.execute(SchemaVersion.__table__.insert().values(version=version))
+        applied.append(version)
+    return applied
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from server.extensions import db
+from server.models import User, Role, Notification, NotificationCounter
+from server.services.pubsub import touch
+
+def resolve_recipients(role=None, department=None, user_ids=None):
+    """Return active user ids matching every given filter, in a single query."""
+    query = db.session.query(User.id).filter(User.is_active == True)
+    if role:
+        query = query.join(Role, User.role_id == Role.id).filter(Role.name == role)
+    if department:
+        query = query.filter(User.department == department)
+    if user_ids:
+        query = query.filter(User.id.in_(user_ids))
+    return [user_id for (user_id,) in query.all()]
+
+def notify_user(user_id, title, message, notification_type='info', action_url=None, role_based=None, digest_key=None):
+    """Create a notification, or fold it into the user's unread one with the same digest key."""
+    if digest_key:
+        existing = Notification.query.filter_by(user_id=user_id, digest_key=digest_key, is_read=False).first()
+        if existing:
+            existing.title = title
+            existing.message = message
+            existing.occurrences = (existing.occurrences or 1) + 1
+            existing.created_at = datetime.utcnow()
+            return existing
+    
+    notification = Notification(
+        user_id=user_id,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        action_url=action_url,
+        role_based=role_based,
+        digest_key=digest_key
+    )
+    db.session.add(notification)
+    adjust_unread({user_id: 1})
+    return notification
+
+def notify_users(user_ids, title, message, notification_type='info', action_url=None, role_based=None, digest_key=None):
+    """Insert one notification row per user with a single multi-row INSERT.
+    
+    With a ``digest_key``, users who still have an unread notification under
+    that key get it updated in place (one UPDATE) instead of a new row.
+    """
+    if not user_ids:
+        return 0
+    
+    recipients = len(user_ids)
+    now = datetime.utcnow()
+    if digest_key:
+        digested = [user_id for (user_id,) in db.session.query(Notification.user_id).filter(
+            Notification.user_id.in_(user_ids),
+            Notification.digest_key == digest_key,
+            Notification.is_read == False
+        ).distinct()]
+        if digested:
+            db.session.execute(
+                db.update(Notification)
+                .where(
+                    Notification.user_id.in_(digested),
+                    Notification.digest_key == digest_key,
+                    Notification.is_read == False
+                )
+                .values(
+                    title=title,
+                    message=message,
+                    occurrences=db.func.coalesce(Notification.occurrences, 1) + 1,
+                    created_at=now
+                )
+                .execution_options(synchronize_session=False)
+            )
+            touch(db.session, digested)
+            digested = set(digested)
+            user_ids = [user_id for user_id in user_ids if user_id not in digested]
+        if not user_ids:
+            return recipients
+    
+    rows = [{
+        'user_id': user_id,
+        'title': title,
+        'message': message,
+        'notification_type': notification_type,
+        'role_based': role_based,
+        'action_url': action_url,
+        'is_read': False,
+        'digest_key': digest_key,
+        'occurrences': 1,
+        'created_at': now
+    } for user_id in user_ids]
+    
+    db.session.execute(db.insert(Notification), rows)
+    touch(db.session, user_ids)
+    adjust_unread({user_id: 1 for user_id in user_ids})
+    return recipients
+
+def broadcast(title, message, role=None, department=None, user_ids=None, **kwargs):
+    recipients = resolve_recipients(role=role, department=department, user_ids=user_ids)
+    return notify_users(recipients, title, message, role_based=role, **kwargs)
+
+def adjust_unread(deltas):
+    """Apply {user_id: delta} to the unread counters, one UPDATE per distinct delta.
+    
+    Users without a counter row are skipped; their unread count is read with
+    a COUNT instead.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    
+    for delta, user_ids in by_delta.items():
+        db.session.execute(
+            db.update(NotificationCounter)
+            .where(NotificationCounter.user_id.in_(user_ids))
+            .values(unread_count=NotificationCounter.unread_count + delta, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+def unread_count(user_id):
+    """Primary-key read of the user's unread counter.
+    
+    Every user gets a counter when created (and existing users from a
+    bootstrap migration); one inserted some other way is counted directly.
+    """
+    counter = db.session.get(NotificationCounter, user_id)
+    if counter is None:
+        return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    return counter.unread_count
+
+@event.listens_for(User, 'after_insert')
+def _create_counter(mapper, connection, user):
+    # Created with the user, so no read or write ever has to insert one concurrently
+    connection.execute(db.insert(NotificationCounter).values(
+        user_id=user.id, unread_count=0, updated_at=datetime.utcnow()
+    ))
+
+def mark_read(user_id, notification_ids=None):
+    """Mark some or all of a user's notifications read with a single UPDATE."""
+    query = Notification.query.filter(Notification.user_id == user_id, Notification.is_read == False)
+    if notification_ids is not None:
+        query = query.filter(Notification.id.in_(notification_ids))
+    updated = query.update({Notification.is_read: True}, synchronize_session=False)
+    if updated:
+        touch(db.session, [user_id])
+        # By the rows this UPDATE changed, never to zero: notifications inserted
+        # meanwhile are unread and already counted
+        adjust_unread({user_id: -updated})
+    return updated
+
+def purge_read(older_than_days, batch_size=1000):
+    """Delete read notifications older than the cutoff in batches; returns rows removed."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    removed = 0
+    while True:
+        ids = [notification_id for (notification_id,) in db.session.query(Notification.id).filter(
+            Notification.is_read == True,
+            Notification.created_at < cutoff
+        ).limit(batch_size)]
+        if not ids:
+            break
+        Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
+        if len(ids) < batch_size:
+            break
+    return removed
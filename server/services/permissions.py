@@ -0,0 +1,105 @@
+import json
+import threading
+from functools import wraps
+from flask import request, jsonify
+from flask_login import current_user
+
+# Each module gets two bits in a role's mask: view, then manage.
+MODULES = [
+    'dashboard', 'orders', 'customers', 'design', 'production', 'delivery',
+    'finance', 'reports', 'users', 'tasks', 'notifications', 'inventory'
+]
+VIEW_BITS = {module: 1 << (2 * i) for i, module in enumerate(MODULES)}
+MANAGE_BITS = {module: 1 << (2 * i + 1) for i, module in enumerate(MODULES)}
+ALL_PERMISSIONS = (1 << (2 * len(MODULES))) - 1
+
+# Self-service modules every role can use; ownership is checked in the handlers.
+DEFAULT_GRANTS = {'dashboard': 'view', 'tasks': True, 'notifications': 'view'}
+
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+def compile_permissions(permissions):
+    """Turn a Role.permissions JSON document into an integer bitmask."""
+    permissions = permissions or {}
+    if permissions.get('all') is True:
+        return ALL_PERMISSIONS
+    
+    mask = 0
+    for module, level in {**DEFAULT_GRANTS, **permissions}.items():
+        if module not in VIEW_BITS or not level:
+            continue
+        mask |= VIEW_BITS[module]
+        if level is True or level == 'manage':
+            mask |= MANAGE_BITS[module]
+    return mask
+
+def compile_scopes(scopes):
+    """Turn API token scopes such as ``['orders:view', 'customers']`` into a bitmask.
+    
+    A bare module name grants view and manage; ``'*'`` grants everything.
+    Raises ValueError on an unknown module or level.
+    """
+    mask = 0
+    for scope in scopes:
+        if scope == '*':
+            return ALL_PERMISSIONS
+        module, _, level = scope.partition(':')
+        if module not in VIEW_BITS or level not in ('', 'view', 'manage'):
+            raise ValueError(f'Unknown scope: {scope}')
+        mask |= VIEW_BITS[module]
+        if level != 'view':
+            mask |= MANAGE_BITS[module]
+    return mask
+
+class RoleMasks:
+    """Compiled masks per role id, keyed on the permissions they were compiled from.
+    
+    A role edited by another worker arrives here as a role row with different
+    permissions, so the stale mask is recompiled instead of served.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._masks = {}
+    
+    def get(self, role):
+        if role is None:
+            return compile_permissions({})
+        source = json.dumps(role.permissions or {}, sort_keys=True)
+        entry = self._masks.get(role.id)
+        if entry is None or entry[0] != source:
+            entry = (source, compile_permissions(role.permissions))
+            with self._lock:
+                self._masks[role.id] = entry
+        return entry[1]
+    
+    def invalidate(self, role_ids):
+        with self._lock:
+            for role_id in role_ids:
+                self._masks.pop(role_id, None)
+
+role_masks = RoleMasks()
+
+def require_permission(module, action=None):
+    """Allow the request only if the current principal's role grants ``module``.
+    
+    Without an explicit ``action``, safe methods need view access and
+    everything else needs manage access.
+    """
+    view_bit = VIEW_BITS[module]
+    manage_bit = MANAGE_BITS[module]
+    if action is not None:
+        fixed_bit = manage_bit if action == 'manage' else view_bit
+    
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            if action is not None:
+                bit = fixed_bit
+            else:
+                bit = view_bit if request.method in SAFE_METHODS else manage_bit
+            if not getattr(current_user, 'permission_mask', 0) & bit:
+                return jsonify({'error': 'Unauthorized'}), 403
+            return f(*args, **kwargs)
+        return wrapped
+    return decorator
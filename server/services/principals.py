@@ -0,0 +1,181 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from server.extensions import db
+from server.models import User, Role, PrincipalInvalidation
+from server.services.permissions import role_masks
+
+PENDING_KEY = 'principal_invalidations'
+
+# Invalidations are re-read for this many seconds, so one whose transaction commits
+# late, or comes from a host with a skewed clock, is still applied
+INVALIDATION_OVERLAP = 10
+
+# Invalidation rows older than this are deleted by the next transaction that writes one
+INVALIDATION_RETENTION = 3600
+
+class Principal(UserMixin):
+    """Read-only snapshot of a user and their role, safe to share between requests."""
+    
+    # Set on the per-request copy when authenticated with an API token
+    token_id = None
+    
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.full_name = user.full_name
+        self.phone = user.phone
+        self.department = user.department
+        self.role_id = user.role_id
+        self.created_at = user.created_at
+        self.last_login = user.last_login
+        self._active = bool(user.is_active)
+        self.role = user.role.to_dict() if user.role else None
+        self.permission_mask = role_masks.get(user.role)
+    
+    @property
+    def is_active(self):
+        return self._active
+    
+    @property
+    def role_name(self):
+        return self.role['name'] if self.role else None
+    
+    @property
+    def permissions(self):
+        return (self.role or {}).get('permissions') or {}
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'full_name': self.full_name,
+            'phone': self.phone,
+            'role': self.role,
+            'department': self.department,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_login': self.last_login.isoformat() if self.last_login else None
+        }
+
+class PrincipalCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+    
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+    
+    def put(self, principal, ttl):
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + ttl, principal)
+    
+    def invalidate(self, user_ids=(), role_ids=()):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+            if role_ids:
+                role_ids = set(role_ids)
+                for user_id, (_, principal) in list(self._entries.items()):
+                    if principal.role_id in role_ids:
+                        del self._entries[user_id]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class InvalidationFeed:
+    """Applies user and role edits committed by other workers to this worker's cache.
+    
+    Edits made by this process apply on commit; the rest are read from
+    principal_invalidations at most every PRINCIPAL_INVALIDATION_INTERVAL.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = frozenset()
+        self._next_check = 0
+    
+    def poll(self, interval):
+        if self._next_check > time.monotonic():
+            return
+        # One request per worker does the check; the others keep using the cache meanwhile
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=INVALIDATION_OVERLAP)
+            rows = db.session.query(
+                PrincipalInvalidation.id, PrincipalInvalidation.user_id, PrincipalInvalidation.role_id
+            ).filter(PrincipalInvalidation.created_at > cutoff).all()
+            fresh = [row for row in rows if row.id not in self._seen]
+            if fresh:
+                cache.invalidate(
+                    {row.user_id for row in fresh if row.user_id is not None},
+                    {row.role_id for row in fresh if row.role_id is not None}
+                )
+            # Rows older than the window will not be returned again, so only these need remembering
+            self._seen = frozenset(row.id for row in rows)
+            self._next_check = time.monotonic() + interval
+        finally:
+            self._lock.release()
+
+cache = PrincipalCache()
+invalidations = InvalidationFeed()
+
+def load_principal(user_id):
+    """Flask-Login user loader: serve from cache, else load user and role in one query."""
+    invalidations.poll(current_app.config['PRINCIPAL_INVALIDATION_INTERVAL'])
+    principal = cache.get(user_id)
+    if principal is None:
+        user = User.query.options(db.joinedload(User.role)).filter_by(id=user_id).first()
+        if user is None:
+            return None
+        principal = Principal(user)
+        cache.put(principal, current_app.config['PRINCIPAL_CACHE_TTL'])
+    return principal if principal.is_active else None
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changed = list(session.dirty) + list(session.deleted)
+    user_ids = {obj.id for obj in changed if isinstance(obj, User)}
+    role_ids = {obj.id for obj in changed if isinstance(obj, Role)}
+    if user_ids or role_ids:
+        pending = session.info.setdefault(PENDING_KEY, (set(), set()))
+        pending[0].update(user_ids)
+        pending[1].update(role_ids)
+
+@event.listens_for(Session, 'before_commit')
+def _write_invalidations(session):
+    # Flush first so edits still pending in the session are collected too
+    session.flush()
+    pending = session.info.get(PENDING_KEY)
+    if pending:
+        now = datetime.utcnow()
+        session.query(PrincipalInvalidation).filter(
+            PrincipalInvalidation.created_at < now - timedelta(seconds=INVALIDATION_RETENTION)
+        ).delete(synchronize_session=False)
+        session.execute(insert(PrincipalInvalidation), [
+            {'user_id': user_id, 'role_id': None, 'created_at': now} for user_id in sorted(pending[0])
+        ] + [
+            {'user_id': None, 'role_id': role_id, 'created_at': now} for role_id in sorted(pending[1])
+        ])
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        cache.invalidate(*pending)
+        role_masks.invalidate(pending[1])
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,209 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+PENDING_KEY = 'notify_user_ids'
+SIGNALLED_KEY = 'notify_signalled'
+
+# A signal id skipped by the watcher is re-checked this long, in case its transaction commits late
+GAP_TIMEOUT = 10
+# A user nobody is waiting for keeps their version this long after it last changed or
+# their last waiter left, long enough for a client's next poll to arrive
+IDLE_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+class UserChannels:
+    """Per-user versions that waiting requests can block on, shared by all workers.
+    
+    A commit that changes someone's notifications also inserts a
+    notification_signals row. Each process tails that table from one watcher
+    thread, every NOTIFICATION_SIGNAL_POLL_MS or straight after a local
+    commit, and wakes the affected users. A user's version is the highest
+    signal id read when they last changed, so tokens from any worker or boot
+    compare by number and only a newer version counts as a change.
+    
+    While no request is waiting the watcher sleeps until the next local
+    commit or waiter; it keeps its place in the table, so the signals written
+    meanwhile are all read when it resumes. Users nobody has waited for in
+    IDLE_TIMEOUT seconds are forgotten.
+    """
+    
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._conditions = {}
+        self._waiters = {}
+        self._expires = {}
+        self._wake = threading.Event()
+        self._watcher_pid = None
+    
+    def _condition(self, user_id):
+        condition = self._conditions.get(user_id)
+        if condition is None:
+            condition = self._conditions[user_id] = threading.Condition(self._lock)
+        return condition
+    
+    def token(self, user_id):
+        self._ensure_watcher()
+        with self._lock:
+            return str(self._versions.get(user_id, 0))
+    
+    def publish(self, user_ids, version):
+        expires = time.monotonic() + IDLE_TIMEOUT
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+                self._expires[user_id] = expires
+                condition = self._conditions.get(user_id)
+                if condition is not None:
+                    condition.notify_all()
+    
+    def poke(self):
+        """Read new signals now instead of at the next interval."""
+        self._wake.set()
+    
+    def wait(self, user_id, token, timeout):
+        """Block until the user has a version newer than ``token`` or ``timeout`` passes.
+        
+        Returns the newer version, or ``token`` unchanged on timeout. A missing
+        or malformed token is answered at once with the current version.
+        """
+        self._ensure_watcher()
+        try:
+            seen = int(token)
+        except (TypeError, ValueError):
+            return self.token(user_id)
+        with self._lock:
+            if not self._waiters:
+                # The watcher may be asleep with nobody to read signals for
+                self._wake.set()
+            self._waiters[user_id] = self._waiters.get(user_id, 0) + 1
+            try:
+                changed = self._condition(user_id).wait_for(lambda: self._versions.get(user_id, 0) > seen, timeout)
+                return str(self._versions[user_id]) if changed else token
+            finally:
+                self._waiters[user_id] -= 1
+                if not self._waiters[user_id]:
+                    del self._waiters[user_id]
+                    del self._conditions[user_id]
+                    self._expires[user_id] = time.monotonic() + IDLE_TIMEOUT
+    
+    def _forget_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            for user_id, expires in list(self._expires.items()):
+                if expires < now and user_id not in self._waiters:
+                    del self._expires[user_id]
+                    self._versions.pop(user_id, None)
+    
+    def _ensure_watcher(self):
+        # Started on first use in each worker; a thread started in the gunicorn master would not survive the fork
+        pid = os.getpid()
+        if self._watcher_pid == pid or self.app is None:
+            return
+        with self._lock:
+            if self._watcher_pid == pid:
+                return
+            self._watcher_pid = pid
+        threading.Thread(target=self._watch, name='notification-signals', daemon=True).start()
+    
+    def _watch(self):
+        from server.extensions import db
+        from server.models import NotificationSignal
+        
+        app = self.app
+        interval = app.config['NOTIFICATION_SIGNAL_POLL_MS'] / 1000
+        with app.app_context():
+            engine = db.engine
+        table = NotificationSignal.__table__
+        last_id = None
+        # Ids below last_id not seen yet: {id: first noticed}. Sequences hand out ids at
+        # INSERT time, so a transaction can commit after a later id was already read.
+        gaps = {}
+        while True:
+            try:
+                with engine.connect() as conn:
+                    if last_id is None:
+                        last_id = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+                    condition = table.c.id > last_id
+                    if gaps:
+                        condition = or_(condition, table.c.id.in_(list(gaps)))
+                    rows = conn.execute(select(table.c.id, table.c.user_id).where(condition).order_by(table.c.id)).all()
+            except Exception:
+                logger.exception('Reading notification signals failed')
+                rows = []
+            
+            now = time.monotonic()
+            for signal_id, _ in rows:
+                gaps.pop(signal_id, None)
+                if signal_id > last_id:
+                    gaps.update((missing, now) for missing in range(last_id + 1, signal_id))
+                    last_id = signal_id
+            for signal_id, noticed in list(gaps.items()):
+                if now - noticed > GAP_TIMEOUT:
+                    del gaps[signal_id]
+            if rows:
+                self.publish({user_id for _, user_id in rows}, last_id)
+            self._forget_idle()
+            
+            with self._lock:
+                idle = not self._waiters
+            self._wake.wait(None if idle else interval)
+            self._wake.clear()
+
+channels = UserChannels()
+
+def touch(session, user_ids):
+    """Mark users as having new notification state once ``session`` commits."""
+    session.info.setdefault(PENDING_KEY, set()).update(user_ids)
+
+def purge_signals(older_than_seconds=3600):
+    """Delete signals every watcher has long since read; returns rows removed."""
+    from server.extensions import db
+    from server.models import NotificationSignal
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+    removed = NotificationSignal.query.filter(NotificationSignal.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+@event.listens_for(Session, 'after_flush')
+def _collect_new_notifications(session, flush_context):
+    from server.models import Notification
+    user_ids = {obj.user_id for obj in session.new if isinstance(obj, Notification)}
+    user_ids.update(obj.user_id for obj in session.dirty if isinstance(obj, Notification))
+    user_ids.update(obj.user_id for obj in session.deleted if isinstance(obj, Notification))
+    if user_ids:
+        touch(session, user_ids)
+
+@event.listens_for(Session, 'before_commit')
+def _write_signals(session):
+    # Flush first so changes still pending in the session are collected too
+    session.flush()
+    user_ids = session.info.pop(PENDING_KEY, None)
+    if user_ids:
+        from server.models import NotificationSignal
+        now = datetime.utcnow()
+        session.execute(insert(NotificationSignal), [
+            {'user_id': user_id, 'created_at': now} for user_id in sorted(user_ids)
+        ])
+        session.info[SIGNALLED_KEY] = True
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed(session):
+    if session.info.pop(SIGNALLED_KEY, None):
+        channels.poke()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(SIGNALLED_KEY, None)
+
+def init_pubsub(app):
+    """Let each worker's signal watcher reach the database."""
+    channels.app = app
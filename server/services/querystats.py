@@ -0,0 +1,105 @@
+import re
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Expanded IN lists differ only in their number of placeholders
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when an endpoint runs more queries than its @query_budget."""
+
+class QueryStats:
+    """SQL run while handling one request."""
+    
+    __slots__ = ('started', 'count', 'duration', 'statements')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        # Keyed by the raw statement; shapes are only worked out when a request is reported
+        self.statements = Counter()
+    
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        self.statements[statement] += 1
+    
+    def duplicates(self, threshold):
+        """(shape, count) for statements repeated at least ``threshold`` times, most frequent first."""
+        shapes = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+def statement_shape(statement):
+    return _IN_LIST.sub('(?)', _SPACES.sub(' ', statement).strip())
+
+def query_budget(limit):
+    """Declare the most queries a view may run, including any made while authenticating."""
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_stats' in g:
+        context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is not None and has_request_context():
+        stats = g.get('query_stats')
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+def _start_request():
+    g.query_stats = QueryStats()
+
+def _finish_request(response):
+    stats = g.pop('query_stats', None)
+    if stats is None:
+        return response
+    
+    app = current_app
+    config = app.config
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    db_ms = stats.duration * 1000
+    if config['QUERY_STATS_SERVER_TIMING']:
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+        )
+    
+    duplicates = stats.duplicates(config['QUERY_DUPLICATE_THRESHOLD'])
+    view = app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and stats.count > budget:
+        message = f'{request.method} {request.path} ran {stats.count} queries (budget {budget})'
+        if duplicates:
+            message += '; repeated: ' + '; '.join(f'{count}x {shape}' for shape, count in duplicates)
+        if app.testing or config['QUERY_BUDGET_STRICT']:
+            raise QueryBudgetExceeded(message)
+        app.logger.warning(message)
+    
+    slow = total_ms >= config['SLOW_REQUEST_MS']
+    if slow or duplicates:
+        app.logger.warning(
+            '%s %s %s -> %s: %.0fms, %d queries in %.0fms%s',
+            'Slow request' if slow else 'Repeated queries in', request.method, request.path,
+            response.status_code, total_ms, stats.count, db_ms,
+            ''.join(f'\n  {count}x {shape}' for shape, count in duplicates)
+        )
+    return response
+
+def init_query_stats(app):
+    """Count and time each request's SQL; see DEPLOYMENT.md for the knobs."""
+    if app.config['QUERY_STATS_ENABLED']:
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
@@ -0,0 +1,66 @@
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+# Requests that never write, so their SELECTs may be served by the replica
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# Request header that keeps a read on the primary, for clients without a session cookie
+PRIMARY_HEADER = 'X-Use-Primary'
+
+class RoutingSession(Session):
+    """Sends the SELECTs of read-only requests to the ``replica`` bind.
+    
+    Everything else (flushes, bulk UPDATE/DELETE, SELECT ... FOR UPDATE, raw
+    text) and every query outside such a request uses the primary, as does
+    the whole app when SQLALCHEMY_BINDS has no replica.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context() and g.get('read_replica')
+                and getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def use_primary(f):
+    """Keep a GET view on the primary: it writes, or must see other users' commits at once."""
+    f.use_primary = True
+    return f
+
+def _start_request():
+    if request.method not in READ_METHODS:
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'use_primary', False):
+        return
+    # Read-your-writes: after this user's own write, stay on the primary until the replica has caught up.
+    # Token clients keep no cookie, so they ask for the primary per request instead.
+    if session.get('primary_until', 0) > time.time() or request.headers.get(PRIMARY_HEADER):
+        return
+    g.read_replica = True
+
+def _finish_request(response):
+    if request.method not in READ_METHODS and response.status_code < 400:
+        session['primary_until'] = int(time.time()) + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+def init_replicas(app):
+    """Route read-only requests to the replica when REPLICA_DATABASE_URL is configured."""
+    if REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+
+def sync_sqlite_replica(engines):
+    """Copy the primary SQLite database over the replica, standing in for replication locally."""
+    primary, replica = engines[None], engines[REPLICA_BIND]
+    if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise ValueError('replica-sync only copies SQLite databases; use streaming replication for Postgres')
+    replica.dispose()
+    source, target = primary.raw_connection(), replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
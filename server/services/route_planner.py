@@ -0,0 +1,140 @@
+import math
+import time
+from collections import defaultdict
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(a, b):
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+class Stop:
+    __slots__ = ('delivery_id', 'zone', 'point', 'located', 'rider_id', 'payload')
+    
+    def __init__(self, delivery_id, zone, point=None, rider_id=None, payload=None):
+        self.delivery_id = delivery_id
+        self.zone = zone or 'unknown'
+        self.point = point
+        self.located = point is not None
+        self.rider_id = rider_id
+        self.payload = payload or {}
+
+def fill_missing_points(stops, depot):
+    """Place stops without coordinates at their zone's centroid, or the depot."""
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    for stop in stops:
+        if stop.located:
+            acc = sums[stop.zone]
+            acc[0] += stop.point[0]
+            acc[1] += stop.point[1]
+            acc[2] += 1
+    for stop in stops:
+        if not stop.located:
+            acc = sums.get(stop.zone)
+            stop.point = (acc[0] / acc[2], acc[1] / acc[2]) if acc else depot
+
+def split_zone(stops, depot, size):
+    """Cut an oversized zone into sweep sectors around the depot."""
+    ordered = sorted(stops, key=lambda s: math.atan2(s.point[0] - depot[0], s.point[1] - depot[1]))
+    return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+def assign_riders(stops, rider_ids, depot):
+    """Hand zones to the least-loaded rider, largest first, up to an even share each."""
+    buckets = {rider_id: [] for rider_id in rider_ids}
+    free = []
+    for stop in stops:
+        if stop.rider_id in buckets:
+            buckets[stop.rider_id].append(stop)
+        else:
+            free.append(stop)
+    
+    zones = defaultdict(list)
+    for stop in free:
+        zones[stop.zone].append(stop)
+    
+    capacity = max(1, math.ceil(len(stops) / len(rider_ids)))
+    groups = []
+    for zone_stops in zones.values():
+        if len(zone_stops) > capacity:
+            groups.extend(split_zone(zone_stops, depot, capacity))
+        else:
+            groups.append(zone_stops)
+    
+    pending = sorted(groups, key=len, reverse=True)
+    while pending:
+        group = pending.pop(0)
+        rider_id = min(rider_ids, key=lambda r: (len(buckets[r]), r))
+        room = capacity - len(buckets[rider_id])
+        if len(group) > room > 0:
+            # Keep zones whole where possible; only the overflow moves to another rider.
+            parts = split_zone(group, depot, room)
+            buckets[rider_id].extend(parts[0])
+            pending.append([stop for part in parts[1:] for stop in part])
+            pending.sort(key=len, reverse=True)
+        else:
+            buckets[rider_id].extend(group)
+    return buckets
+
+def order_route(stops, depot, deadline):
+    """Nearest-neighbour tour from the depot, then 2-opt until no gain or time runs out."""
+    if len(stops) < 2:
+        return list(stops)
+    
+    points = [depot] + [s.point for s in stops]
+    n = len(points)
+    dist = [[haversine_km(points[i], points[j]) for j in range(n)] for i in range(n)]
+    
+    tour = [0]
+    remaining = set(range(1, n))
+    while remaining:
+        last = tour[-1]
+        nearest = min(remaining, key=lambda j: dist[last][j])
+        tour.append(nearest)
+        remaining.remove(nearest)
+    
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            for j in range(i + 1, n):
+                c = tour[j]
+                d = tour[j + 1] if j + 1 < n else None
+                before = dist[a][b] + (dist[c][d] if d is not None else 0)
+                after = dist[a][c] + (dist[b][d] if d is not None else 0)
+                if after < before - 1e-9:
+                    tour[i:j + 1] = reversed(tour[i:j + 1])
+                    b = tour[i]
+                    improved = True
+            if time.perf_counter() >= deadline:
+                break
+    
+    return [stops[k - 1] for k in tour[1:]]
+
+def route_distance(route, depot):
+    total = 0.0
+    previous = depot
+    legs = []
+    for stop in route:
+        leg = haversine_km(previous, stop.point)
+        legs.append(leg)
+        total += leg
+        previous = stop.point
+    return total, legs
+
+def plan_routes(stops, rider_ids, depot, time_budget=0.8):
+    """Split stops between riders and order each route; returns {rider_id: [(stop, leg_km), ...]}."""
+    if not rider_ids:
+        return {}
+    deadline = time.perf_counter() + time_budget
+    fill_missing_points(stops, depot)
+    buckets = assign_riders(stops, rider_ids, depot)
+    
+    plans = {}
+    for rider_id, rider_stops in buckets.items():
+        route = order_route(rider_stops, depot, deadline)
+        _, legs = route_distance(route, depot)
+        plans[rider_id] = list(zip(route, legs))
+    return plans
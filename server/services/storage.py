@@ -0,0 +1,103 @@
+import fcntl
+import hashlib
+import os
+from flask import current_app
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+class UploadOffsetError(Exception):
+    """Raised when a chunk does not start where the stored part file ends."""
+    
+    def __init__(self, expected):
+        super().__init__(f'Chunk must start at byte {expected}')
+        self.expected = expected
+
+class ContentStore:
+    """Content-addressed file store; identical files share one copy on disk."""
+    
+    def __init__(self, root):
+        self.root = root
+        for name in ('parts', 'objects', 'thumbnails'):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+    
+    def part_path(self, upload_id):
+        return os.path.join(self.root, 'parts', upload_id)
+    
+    def object_path(self, sha256):
+        return os.path.join(self.root, 'objects', sha256[:2], sha256[2:4], sha256)
+    
+    def thumbnail_path(self, sha256):
+        return os.path.join(self.root, 'thumbnails', sha256[:2], f'{sha256}.jpg')
+    
+    def has_object(self, sha256):
+        return os.path.exists(self.object_path(sha256))
+    
+    def part_size(self, upload_id):
+        try:
+            return os.path.getsize(self.part_path(upload_id))
+        except FileNotFoundError:
+            return 0
+    
+    def create_part(self, upload_id):
+        """Start an empty part file, so a zero-byte upload can be committed straight away."""
+        open(self.part_path(upload_id), 'ab').close()
+    
+    def append_chunk(self, upload_id, stream, offset, length):
+        """Append a chunk to the part file, returning the new part size.
+        
+        The part file is locked for the whole write, so concurrent PUTs for
+        one upload (from any worker) are applied one at a time and the loser
+        sees the new offset rather than interleaving its bytes.
+        """
+        with open(self.part_path(upload_id), 'ab') as part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            current = os.fstat(part.fileno()).st_size
+            if offset != current:
+                raise UploadOffsetError(current)
+            
+            remaining = length
+            while remaining > 0:
+                block = stream.read(min(COPY_BUFFER_SIZE, remaining))
+                if not block:
+                    break
+                part.write(block)
+                remaining -= len(block)
+            part.flush()
+            return os.fstat(part.fileno()).st_size
+    
+    def commit(self, upload_id):
+        """Move a finished part file into the object store as (sha256, size, created).
+        
+        Raises FileNotFoundError if the part file is gone; callers serialise
+        completion so that only one of them ever gets here for an upload.
+        """
+        path = self.part_path(upload_id)
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as part:
+            for block in iter(lambda: part.read(COPY_BUFFER_SIZE), b''):
+                digest.update(block)
+                size += len(block)
+        sha256 = digest.hexdigest()
+        
+        target = self.object_path(sha256)
+        if os.path.exists(target):
+            os.remove(path)
+            return sha256, size, False
+        
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        return sha256, size, True
+    
+    def discard(self, upload_id):
+        try:
+            os.remove(self.part_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+def get_content_store():
+    store = current_app.extensions.get('content_store')
+    if store is None:
+        store = ContentStore(current_app.config['UPLOAD_FOLDER'])
+        current_app.extensions['content_store'] = store
+    return store
@@ -0,0 +1,65 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from server.extensions import db
+from server.models.upload import StoredFile
+from server.services.storage import get_content_store
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnails')
+
+def schedule_thumbnail(app, sha256):
+    """Queue thumbnail generation so the upload request can return immediately."""
+    _executor.submit(_run, app, sha256)
+
+def _run(app, sha256):
+    with app.app_context():
+        stored = db.session.get(StoredFile, sha256)
+        if stored is None or stored.thumbnail_status == 'ready':
+            return
+        try:
+            stored.thumbnail_status = _generate(stored)
+        except Exception:
+            app.logger.exception('Thumbnail generation failed for %s', sha256)
+            stored.thumbnail_status = 'failed'
+        db.session.commit()
+        db.session.remove()
+
+def _generate(stored):
+    store = get_content_store()
+    source = store.object_path(stored.sha256)
+    target = store.thumbnail_path(stored.sha256)
+    content_type = stored.content_type or ''
+    
+    if Image is None:
+        return 'unsupported'
+    
+    if content_type == 'application/pdf':
+        if not shutil.which('pdftoppm'):
+            return 'unsupported'
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, 'page')
+            subprocess.run(
+                ['pdftoppm', '-jpeg', '-r', '72', '-f', '1', '-l', '1', '-singlefile', source, prefix],
+                check=True, timeout=60, capture_output=True
+            )
+            return _save_thumbnail(f'{prefix}.jpg', target)
+    
+    if content_type.startswith('image/'):
+        return _save_thumbnail(source, target)
+    
+    return 'unsupported'
+
+def _save_thumbnail(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(source) as image:
+        image.thumbnail(current_app.config['THUMBNAIL_SIZE'])
+        image.convert('RGB').save(target, 'JPEG', quality=80)
+    return 'ready'
@@ -0,0 +1,125 @@
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import current_app
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from server.extensions import db
+from server.models import ApiToken
+from server.services.permissions import compile_scopes
+from server.services.principals import load_principal
+
+PENDING_KEY = 'revoked_token_ids'
+
+class RevocationList:
+    """In-memory set of revoked, unexpired token ids, refreshed from the database.
+    
+    Revocations made by this process apply on commit; those made by other
+    workers are picked up on the next refresh.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = frozenset()
+        self._expires = 0
+    
+    def contains(self, token_id, ttl):
+        if self._expires <= time.monotonic():
+            self.refresh(ttl)
+        return token_id in self._revoked
+    
+    def refresh(self, ttl):
+        with self._lock:
+            if self._expires > time.monotonic():
+                return
+            rows = db.session.query(ApiToken.id).filter(
+                ApiToken.revoked_at.isnot(None),
+                ApiToken.expires_at > datetime.utcnow()
+            )
+            self._revoked = frozenset(token_id for (token_id,) in rows)
+            self._expires = time.monotonic() + ttl
+    
+    def add(self, token_ids):
+        with self._lock:
+            self._revoked = self._revoked | frozenset(token_ids)
+
+revocations = RevocationList()
+
+def get_serializer():
+    serializer = current_app.extensions.get('token_serializer')
+    if serializer is None:
+        serializer = URLSafeSerializer(current_app.config['SECRET_KEY'], salt='api-token')
+        current_app.extensions['token_serializer'] = serializer
+    return serializer
+
+def issue(user_id, name, scopes, expires_in_days):
+    """Record a new token and return (ApiToken, signed token string).
+    
+    Raises ValueError for unknown scopes.
+    """
+    mask = compile_scopes(scopes)
+    expires = int(time.time()) + expires_in_days * 86400
+    token = ApiToken(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        name=name,
+        scopes=list(scopes),
+        expires_at=datetime.utcfromtimestamp(expires)
+    )
+    db.session.add(token)
+    signed = get_serializer().dumps({
+        'jti': token.id,
+        'uid': user_id,
+        'scp': mask,
+        'exp': expires
+    })
+    return token, signed
+
+def revoke(token):
+    token.revoked_at = datetime.utcnow()
+    db.session.info.setdefault(PENDING_KEY, set()).add(token.id)
+
+def verify(signed):
+    """Return the token claims if the signature, expiry and revocation checks pass."""
+    try:
+        claims = get_serializer().loads(signed)
+    except BadSignature:
+        return None
+    if claims.get('exp', 0) <= time.time():
+        return None
+    if revocations.contains(claims['jti'], current_app.config['API_TOKEN_REVOCATION_TTL']):
+        return None
+    return claims
+
+def load_token_principal(request):
+    """Flask-Login request loader for ``Authorization: Bearer <token>``.
+    
+    The returned principal is the user's cached principal with its
+    permissions narrowed to the token's scopes.
+    """
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    claims = verify(header[7:].strip())
+    if claims is None:
+        return None
+    principal = load_principal(claims['uid'])
+    if principal is None:
+        return None
+    scoped = copy.copy(principal)
+    scoped.permission_mask = principal.permission_mask & claims['scp']
+    scoped.token_id = claims['jti']
+    return scoped
+
+@event.listens_for(Session, 'after_commit')
+def _publish_revocations(session):
+    token_ids = session.info.pop(PENDING_KEY, None)
+    if token_ids:
+        revocations.add(token_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
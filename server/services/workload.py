@@ -0,0 +1,161 @@
+from datetime import datetime
+from sqlalchemy import and_, event, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from server.extensions import db
+from server.models import User, Role, DesignTask, DesignerWorkload
+
+OPEN_STATUSES = ['pending', 'in_progress', 'proof_sent', 'revision_requested']
+
+PRIORITY_WEIGHTS = {'low': 0.5, 'normal': 1.0, 'high': 1.5, 'urgent': 2.5}
+
+OPEN_TASK_WEIGHT = 1.0
+REVISION_WEIGHT = 0.5
+MAX_DEADLINE_WEIGHT = 3.0
+
+def is_designer():
+    """Users with the Designer role, or in the Design department if no such role exists."""
+    designer_roles = select(Role.id).where(Role.name == 'Designer')
+    return or_(User.role_id.in_(designer_roles), and_(~designer_roles.exists(), User.department == 'Design'))
+
+def designer_query():
+    return User.query.filter(is_designer(), User.is_active == True)
+
+def add_designer_rows(conn, user_ids=None):
+    """Give designers without a workload row an empty one, so ranking can inner join."""
+    missing = select(User.id, literal(0), literal(0), literal(0.0), literal(0.0), literal(datetime.utcnow())).where(
+        is_designer(),
+        ~select(DesignerWorkload.designer_id).where(DesignerWorkload.designer_id == User.id).exists()
+    )
+    if user_ids is not None:
+        missing = missing.where(User.id.in_(user_ids))
+    conn.execute(insert(DesignerWorkload).from_select(
+        ['designer_id', 'open_tasks', 'revision_load', 'deadline_pressure', 'load_score', 'updated_at'], missing
+    ))
+
+def task_pressure(task, now=None):
+    """Priority weight plus a bonus that grows as the deadline gets closer."""
+    now = now or datetime.utcnow()
+    pressure = PRIORITY_WEIGHTS.get(task.priority, PRIORITY_WEIGHTS['normal'])
+    if task.deadline:
+        days_left = max((task.deadline - now).total_seconds() / 86400, 0)
+        pressure += min(MAX_DEADLINE_WEIGHT, MAX_DEADLINE_WEIGHT / (days_left + 1))
+    return pressure
+
+def _bump(open_tasks, revisions, pressure):
+    """UPDATE adding a task's (or tasks') contribution to workload rows."""
+    score = open_tasks * OPEN_TASK_WEIGHT + revisions * REVISION_WEIGHT + pressure
+    return update(DesignerWorkload).values(
+        open_tasks=DesignerWorkload.open_tasks + open_tasks,
+        revision_load=DesignerWorkload.revision_load + revisions,
+        deadline_pressure=DesignerWorkload.deadline_pressure + pressure,
+        load_score=DesignerWorkload.load_score + score,
+        updated_at=datetime.utcnow()
+    )
+
+def adjust(designer_id, open_tasks, revisions, pressure):
+    bump = _bump(open_tasks, revisions, pressure).where(DesignerWorkload.designer_id == designer_id)
+    if db.session.execute(bump).rowcount or open_tasks <= 0:
+        return
+    # First task for someone who was not a designer when their row would have been made
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(DesignerWorkload).values(
+                designer_id=designer_id, open_tasks=open_tasks, revision_load=revisions, deadline_pressure=pressure,
+                load_score=open_tasks * OPEN_TASK_WEIGHT + revisions * REVISION_WEIGHT + pressure,
+                updated_at=datetime.utcnow()
+            ))
+    except IntegrityError:
+        db.session.execute(bump)
+
+def release(task):
+    """Remove a task's contribution from its designer's workload row."""
+    if task.designer_id and task.workload_weight is not None:
+        adjust(task.designer_id, -1, -(task.revision_count or 0), -task.workload_weight)
+    task.workload_weight = None
+
+def claim(task, now=None):
+    """Add an open task's contribution to its designer's workload row."""
+    if task.designer_id and task.status in OPEN_STATUSES:
+        task.workload_weight = task_pressure(task, now)
+        adjust(task.designer_id, 1, task.revision_count or 0, task.workload_weight)
+
+def rank_candidates(limit=5):
+    return designer_query().join(
+        DesignerWorkload, DesignerWorkload.designer_id == User.id
+    ).add_entity(DesignerWorkload).options(
+        db.joinedload(User.role)
+    ).order_by(DesignerWorkload.load_score, User.id).limit(limit).all()
+
+def claim_least_loaded(task, now=None):
+    """Give a new task to the active designer with the lowest load score and count it there.
+    
+    Picking and bumping is one UPDATE, so concurrent auto-assignments never
+    both see the same designer as least loaded. On Postgres SKIP LOCKED sends
+    the second to the next designer rather than waiting for the first to
+    commit; SQLite runs one writer at a time anyway. Returns the designer id,
+    or None if there is no designer.
+    """
+    weight = task_pressure(task, now)
+    least_loaded = select(DesignerWorkload.designer_id).join(
+        User, User.id == DesignerWorkload.designer_id
+    ).where(is_designer(), User.is_active == True).order_by(
+        DesignerWorkload.load_score, DesignerWorkload.designer_id
+    ).limit(1).with_for_update(of=DesignerWorkload, skip_locked=True)
+    designer_id = db.session.execute(
+        _bump(1, task.revision_count or 0, weight)
+        .where(DesignerWorkload.designer_id == least_loaded.scalar_subquery())
+        .returning(DesignerWorkload.designer_id)
+    ).scalar()
+    if designer_id is not None:
+        task.designer_id = designer_id
+        task.workload_weight = weight
+    return designer_id
+
+def rebuild():
+    """Recompute the workload rows of designers and assignees from open tasks, refreshing deadline pressure."""
+    now = datetime.utcnow()
+    DesignerWorkload.query.delete()
+    DesignTask.query.filter(DesignTask.workload_weight.isnot(None)).update(
+        {DesignTask.workload_weight: None}, synchronize_session=False
+    )
+    
+    totals = {}
+    open_tasks = DesignTask.query.filter(
+        DesignTask.designer_id.isnot(None),
+        DesignTask.status.in_(OPEN_STATUSES)
+    ).all()
+    for task in open_tasks:
+        task.workload_weight = task_pressure(task, now)
+        row = totals.setdefault(task.designer_id, [0, 0, 0.0])
+        row[0] += 1
+        row[1] += task.revision_count or 0
+        row[2] += task.workload_weight
+    
+    rows = []
+    designer_ids = {user_id for (user_id,) in db.session.query(User.id).filter(is_designer())}
+    for user_id in sorted(designer_ids | set(totals)):
+        count, revisions, pressure = totals.get(user_id, (0, 0, 0.0))
+        rows.append({
+            'designer_id': user_id,
+            'open_tasks': count,
+            'revision_load': revisions,
+            'deadline_pressure': pressure,
+            'load_score': count * OPEN_TASK_WEIGHT + revisions * REVISION_WEIGHT + pressure,
+            'updated_at': now
+        })
+    if rows:
+        db.session.execute(db.insert(DesignerWorkload), rows)
+    
+    db.session.commit()
+    return len(totals)
+
+@event.listens_for(User, 'after_insert')
+def _create_workload(mapper, connection, user):
+    # Only designers are ranked; anyone else gets a row from adjust() on their first task
+    add_designer_rows(connection, [user.id])
+
+@event.listens_for(User, 'after_update')
+def _became_designer(mapper, connection, user):
+    state = db.inspect(user)
+    if state.attrs.role_id.history.has_changes() or state.attrs.department.history.has_changes():
+        add_designer_rows(connection, [user.id])
@@ -1,5 +1,8 @@
 #!/bin/bash
 
+# Create tables, roles and the admin user once, with sample data on first run
+flask --app main bootstrap --seed
+
 # Start Flask backend on port 5001
 python main.py &
 BACKEND_PID=$!